@@ -0,0 +1 @@
+"""Offline benchmarks for bofa_crawler parsers and crawl flow."""
@@ -0,0 +1,130 @@
+"""Synthetic Bank of America pages for benchmarking."""
+
+import random
+from datetime import date, timedelta
+
+DESCRIPTIONS = [
+    "GROCERY STORE",
+    "COFFEE SHOP",
+    "GAS STATION",
+    "ONLINE PAYMENT - THANK YOU",
+    "PAYROLL DEPOSIT",
+    "RESTAURANT",
+    "UTILITY BILL",
+    "ATM WITHDRAWAL",
+]
+
+
+def account_names(count: int) -> list:
+    """Get names for `count` synthetic accounts."""
+    return ["Account {:05d}".format(index) for index in range(count)]
+
+
+def account_list_page(count: int) -> str:
+    """Get an accounts overview page listing `count` accounts."""
+    items = []
+    for index, name in enumerate(account_names(count)):
+        kind = "CreditCard" if index % 2 else "Deposit"
+        items.append(
+            '<div class="AccountItem AccountItem{kind}">'
+            '<span class="AccountName">'
+            '<a href="/myaccounts/details/{index}">{name}</a>'
+            "</span></div>".format(kind=kind, index=index, name=name)
+        )
+    return '<html><body><div class="Accounts">{}</div></body></html>'.format(
+        "".join(items)
+    )
+
+
+def format_amount(cents: int) -> str:
+    """Format `cents` the way amounts appear on account pages."""
+    sign = "-" if cents < 0 else ""
+    return "{}${:,}.{:02d}".format(sign, abs(cents) // 100, abs(cents) % 100)
+
+
+def _rows(count: int, seed: int):
+    rng = random.Random(seed)
+    balance = rng.randint(100000, 10000000)
+    day = date(2021, 6, 30)
+    for index in range(count):
+        amount = rng.randint(-50000, 50000)
+        yield (
+            index < 2,
+            day.strftime("%m/%d/%Y"),
+            rng.choice(DESCRIPTIONS),
+            amount,
+            balance,
+        )
+        balance -= amount
+        if rng.random() < 0.3:
+            day -= timedelta(days=1)
+
+
+def account_title(name: str) -> str:
+    """Get the account title element of a detail page."""
+    return (
+        '<a name="page_title_acct_switcher"><span>Account:</span>'
+        "<span>{}</span></a>".format(name)
+    )
+
+
+def credit_card_page(rows: int, name: str = "Card", seed: int = 0) -> str:
+    """Get a credit card detail page with `rows` transactions."""
+    parts = []
+    for is_pending, day, description, amount, balance in _rows(rows, seed):
+        parts.append(
+            '<tr class="{}">'
+            '<td class="trans-date-cell">{}</td>'
+            '<td class="trans-desc-cell"><a href="#">'
+            '<span class="ada-hidden">Description</span> {}</a></td>'
+            '<td class="trans-amount-cell">{}</td>'
+            '<td class="trans-balance-cell">{}</td></tr>'.format(
+                "trans-pending-row" if is_pending else "trans-row",
+                "Pending" if is_pending else day,
+                description,
+                format_amount(amount),
+                format_amount(balance),
+            )
+        )
+    return (
+        "<html><body>{}"
+        '<div class="summary-details-row"><div class="summary-acct-row">'
+        '<span class="TL_NPI_L1">$1,234.56</span></div></div>'
+        '<table id="transactions"><tbody>{}</tbody></table>'
+        "</body></html>".format(account_title(name), "".join(parts))
+    )
+
+
+def deposit_page(rows: int, name: str = "Checking", seed: int = 0) -> str:
+    """Get a deposit account detail page with `rows` transactions."""
+    parts = []
+    for is_pending, day, description, amount, balance in _rows(rows, seed):
+        parts.append(
+            '<tr class="{}">'
+            '<td class="date-action"><span>{}</span></td>'
+            '<td class="description">'
+            '<span class="transTitleForEditDesc">{}</span></td>'
+            '<td class="amount">{}</td>'
+            '<td class="balance">{}</td></tr>'.format(
+                "in-transit-record" if is_pending else "record",
+                "Processing" if is_pending else day,
+                description,
+                format_amount(amount),
+                format_amount(balance),
+            )
+        )
+    return (
+        "<html><body>{}"
+        '<div class="ad-acct-summary-module-deposit-skin">'
+        '<span class="TL_NPI_Amt">$2,500.00</span></div>'
+        '<table class="transaction-records"><tbody>{}</tbody></table>'
+        "</body></html>".format(account_title(name), "".join(parts))
+    )
+
+
+def amount_cells(count: int, seed: int = 0) -> list:
+    """Get `count` amount cell strings."""
+    rng = random.Random(seed)
+    return [
+        format_amount(rng.randint(-10000000, 10000000)) for _ in range(count)
+    ]
@@ -0,0 +1,265 @@
+"""Run the benchmarks and write machine readable results."""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter
+from unittest.mock import patch
+
+from bofa_crawler.bank import Account, User
+from bofa_crawler.constants import SECURE_BASE_URL
+from bofa_crawler.crawler import BofaCrawler
+from bofa_crawler.parser import (
+    AccountListParser,
+    CreditCardParser,
+    DepositParser,
+)
+from bofa_crawler.util import dollars_to_cents
+
+from benchmarks import pages
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+
+class FakeElement:
+    def __init__(self, text: str):
+        self.text = text
+
+    def get_attribute(self, name):
+        """Get the element text for any attribute."""
+        return self.text
+
+    def is_displayed(self):
+        """Report the element as visible."""
+        return True
+
+    def is_enabled(self):
+        """Report the element as enabled."""
+        return True
+
+    def send_keys(self, *keys):
+        """Ignore typed keys."""
+
+
+class FakeBrowser:
+    """A webdriver stand-in serving pre-generated pages instantly."""
+
+    def __init__(self, pages_by_url: dict, start_page: str):
+        self.pages_by_url = pages_by_url
+        self.current_url = None
+        self.page_source = start_page
+        self.title = ""
+
+    def get(self, url: str):
+        """Load the page generated for `url`."""
+        self.current_url = url
+        if url in self.pages_by_url:
+            self.title, self.page_source = self.pages_by_url[url]
+
+    def execute_script(self, script, *args):
+        """Answer the readiness and location scripts used by the crawler."""
+        if "readyState" in script:
+            return "complete"
+        return self.current_url
+
+    def find_element(self, by, value):
+        """Get an element whose text is the loaded account name."""
+        return FakeElement(self.title)
+
+    def quit(self):
+        """Do nothing."""
+
+
+def measure(func, repeat: int):
+    """Get the best wall time of `repeat` calls and the peak allocation."""
+    best = None
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def bench_account_list(size):
+    """Parse an accounts overview listing `size` accounts."""
+    source = pages.account_list_page(size)
+    names = pages.account_names(size)
+    return lambda: AccountListParser(source).get_accounts(names)
+
+
+def bench_credit_card(size):
+    """Parse a credit card page with `size` rows."""
+    source = pages.credit_card_page(size)
+    account = Account("Card", "CreditCard", "link")
+
+    def run():
+        parser = CreditCardParser(account, source)
+        parser.get_balance()
+        parser.get_transactions()
+
+    return run
+
+
+def bench_deposit(size):
+    """Parse a deposit account page with `size` rows."""
+    source = pages.deposit_page(size)
+    account = Account("Checking", "Deposit", "link")
+
+    def run():
+        parser = DepositParser(account, source)
+        parser.get_balance()
+        parser.get_transactions()
+
+    return run
+
+
+def bench_dollars_to_cents(size):
+    """Convert `size` amount cells to cents."""
+    cells = pages.amount_cells(size)
+    return lambda: [dollars_to_cents(cell) for cell in cells]
+
+
+def bench_crawl(size):
+    """Crawl four accounts of `size` rows each through a fake browser."""
+    names = pages.account_names(4)
+    pages_by_url = {}
+    for index, name in enumerate(names):
+        url = SECURE_BASE_URL + "/myaccounts/details/{}".format(index)
+        page = pages.credit_card_page if index % 2 else pages.deposit_page
+        pages_by_url[url] = (name, page(size, name, seed=index))
+    start_page = pages.account_list_page(len(names))
+
+    def run():
+        browser = FakeBrowser(pages_by_url, start_page)
+        crawler = BofaCrawler(User("user", "passcode"), names, browser=browser)
+        with patch("bofa_crawler.crawler.navigate"):
+            crawler.start()
+
+    return run
+
+
+BENCHMARKS = {
+    "account_list": bench_account_list,
+    "credit_card": bench_credit_card,
+    "deposit": bench_deposit,
+    "dollars_to_cents": bench_dollars_to_cents,
+    "crawl": bench_crawl,
+}
+
+
+def get_commit():
+    """Get the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: list, sizes: list, repeat: int) -> dict:
+    """Run benchmarks `names` at each of `sizes`."""
+    results = []
+    for name in names:
+        for size in sizes:
+            seconds, peak_bytes = measure(BENCHMARKS[name](size), repeat)
+            results.append(
+                {
+                    "benchmark": name,
+                    "size": size,
+                    "seconds": seconds,
+                    "items_per_second": size / seconds if seconds else None,
+                    "peak_bytes": peak_bytes,
+                }
+            )
+            print(
+                "{:<18} {:>7} {:>10.4f}s {:>12,} B".format(
+                    name, size, seconds, peak_bytes
+                ),
+                file=sys.stderr,
+            )
+
+    return {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, report: dict) -> list:
+    """Get the time ratio of `report` to `baseline` per benchmark and size.
+
+    Ratios above 1 are slower than the baseline.
+    """
+    previous = {
+        (result["benchmark"], result["size"]): result["seconds"]
+        for result in baseline["results"]
+    }
+    ratios = []
+    for result in report["results"]:
+        key = (result["benchmark"], result["size"])
+        if previous.get(key):
+            ratios.append(
+                {
+                    "benchmark": key[0],
+                    "size": key[1],
+                    "ratio": result["seconds"] / previous[key],
+                }
+            )
+
+    return ratios
+
+
+def main(argv=None):
+    """Run benchmarks from the command line."""
+    arg_parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    arg_parser.add_argument("benchmarks", nargs="*", help=", ".join(BENCHMARKS))
+    arg_parser.add_argument("--sizes", nargs="+", type=int, default=None)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--output", "-o", default="-")
+    arg_parser.add_argument(
+        "--compare", help="earlier results file to compare timings against"
+    )
+    args = arg_parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        arg_parser.error("unknown benchmarks: " + ", ".join(sorted(unknown)))
+
+    report = run(
+        args.benchmarks or list(BENCHMARKS),
+        args.sizes or DEFAULT_SIZES,
+        args.repeat,
+    )
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for result in compare(baseline, report):
+            print(
+                "{benchmark:<18} {size:>7} {ratio:>6.2f}x".format(**result),
+                file=sys.stderr,
+            )
+
+    return report
@@ -0,0 +1,263 @@
+import asyncio
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver import Firefox
+from selenium.webdriver.common.keys import Keys
+
+from bofa_crawler.browser import load_cookies
+from bofa_crawler.constants import (
+    ACCOUNTS_OVERVIEW_URL,
+    BOFA_SIGN_IN_URL,
+    SECURE_BASE_URL,
+)
+from bofa_crawler.crawler import (
+    ACCOUNT_NAME_SELECTOR,
+    SIGN_IN_OUTCOMES,
+    SIGNED_IN,
+    SIGNED_OUT,
+    BofaCrawler,
+    SignInError,
+    _account_not_loaded,
+)
+from bofa_crawler.util import (
+    DEFAULT_RETRY_POLICY,
+    RetryPolicy,
+    get_any_condition,
+    get_condition,
+    is_current_url,
+)
+
+
+async def async_wait(
+    browser: Firefox,
+    condition,
+    timeout: float = 10,
+    poll_frequency: float = 0.5,
+):
+    """Poll `condition` for up to `timeout` seconds without blocking.
+
+    Each check runs in a worker thread only for the duration of the
+    WebDriver call, so the event loop is free between polls.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        try:
+            result = await asyncio.to_thread(condition, browser)
+        except NoSuchElementException:
+            result = False
+
+        if result:
+            return result
+
+        if loop.time() >= deadline:
+            return False
+
+        await asyncio.sleep(poll_frequency)
+
+
+async def async_wait_until(
+    browser: Firefox,
+    ec_params,
+    condition_type: str = "POEL",
+    timeout: float = 10,
+    poll_frequency: float = 0.5,
+):
+    """Wait a maximum of `timeout` seconds until condition is met."""
+    condition = get_condition(ec_params, condition_type)
+    return await async_wait(browser, condition, timeout, poll_frequency)
+
+
+async def async_navigate(
+    browser: Firefox,
+    link: str,
+    retry_policy: RetryPolicy = None,
+    ready_timeout: float = 10,
+):
+    """Navigate to `link` like `util.navigate`, without blocking the loop.
+
+    Returns the number of retries.
+    """
+    retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+    if await asyncio.to_thread(is_current_url, browser, link):
+        return 0
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    total_timeouts = 0
+    while True:
+        try:
+            await asyncio.to_thread(browser.get, link)
+            break
+        except TimeoutException as e:
+            delay = retry_policy.get_delay(total_timeouts)
+            elapsed = loop.time() - started
+            if not retry_policy.should_retry(total_timeouts, elapsed, delay):
+                raise TimeoutException(
+                    "Retried {} times to GET '{}' webpage "
+                    "but failed out of a timeout!\n\t{}".format(
+                        total_timeouts, link, e
+                    )
+                )
+
+            total_timeouts += 1
+            await asyncio.sleep(delay)
+
+    await async_wait_until(browser, None, "PFL", ready_timeout)
+    return total_timeouts
+
+
+async def async_wait_for_any(
+    browser: Firefox,
+    conditions: dict,
+    timeout: float = 10,
+    poll_frequency: float = 0.1,
+):
+    """Wait like `util.wait_for_any` without blocking the loop."""
+    condition = get_any_condition(conditions)
+    result = await async_wait(browser, condition, timeout, poll_frequency)
+    return result or (None, False)
+
+
+class AsyncBofaCrawler(BofaCrawler):
+    """A `BofaCrawler` whose crawl steps are awaitable.
+
+    WebDriver calls run briefly in worker threads and all waits are
+    asynchronous polls, so many crawlers can share one event loop. The
+    coroutines are named apart from the sync methods they mirror, which
+    tab and HTTP modes still run in a worker thread.
+    """
+
+    @classmethod
+    async def create(cls, *args, **kwargs):
+        """Create a crawler without blocking the loop on browser startup."""
+        return await asyncio.to_thread(cls, *args, **kwargs)
+
+    async def async_start(self):
+        """Begin crawling, returning whether sign in succeeded."""
+        if await self._async_resume_session() or await self._async_sign_in():
+            await self._async_get_accounts()
+            return True
+
+        return False
+
+    async def async_end(self):
+        """End crawling."""
+        await asyncio.to_thread(self.end)
+
+    async def _async_resume_session(self):
+        if not self.profile_dir:
+            return False
+
+        try:
+            await self._async_navigate(SECURE_BASE_URL)
+            await asyncio.to_thread(
+                load_cookies, self.browser, self._get_cookies_path()
+            )
+            await self._async_navigate(ACCOUNTS_OVERVIEW_URL)
+            outcome, _ = await self._async_wait_for_any(
+                {
+                    SIGNED_IN: SIGN_IN_OUTCOMES[SIGNED_IN],
+                    SIGNED_OUT: ("#oid", "POEL"),
+                },
+                timeout=5,
+            )
+            return outcome == SIGNED_IN
+        except WebDriverException:
+            return False
+
+    async def _async_sign_in(self):
+        try:
+            await self._async_navigate(BOFA_SIGN_IN_URL)
+
+            oid = await self._async_wait_until("#oid")
+            await asyncio.to_thread(oid.send_keys, self.user.online_id)
+
+            passcode = await self._async_wait_until("#pass", "CLICK")
+            await asyncio.to_thread(passcode.send_keys, self.user.passcode)
+            await asyncio.to_thread(passcode.send_keys, Keys.RETURN)
+
+            outcome, _ = await self._async_wait_for_any(SIGN_IN_OUTCOMES)
+            if outcome is None:
+                raise TimeoutException("No page loaded after signing in")
+            if outcome != SIGNED_IN:
+                raise SignInError(outcome)
+        except Exception as e:
+            self.sign_in_error = e
+            return False
+
+        return True
+
+    async def _async_get_accounts(self):
+        cached = await asyncio.to_thread(self._get_cached_accounts)
+        if cached is None:
+            page_source = await self._async_get_page_source()
+            await asyncio.to_thread(self._add_user_accounts, page_source)
+            await self._async_get_user_accounts_detail()
+            return
+
+        self.user.accounts.extend(cached)
+        await self._async_get_user_accounts_detail()
+        stale = self._get_stale_accounts(cached)
+        if stale:
+            await asyncio.to_thread(self._rediscover_accounts, stale)
+
+    async def _async_get_user_accounts_detail(self, accounts: list = None):
+        if accounts is None:
+            accounts = self.user.accounts
+
+        if self.http_mode or self.max_tabs > 1:
+            await asyncio.to_thread(self._get_user_accounts_detail, accounts)
+            return
+
+        futures = []
+        for account in accounts:
+            try:
+                future = await self._async_get_account_detail(account)
+            except Exception as e:
+                self.errors[account.name] = e
+                continue
+            if future:
+                futures.append((account, future))
+
+        await asyncio.to_thread(self._finish_parsing, futures)
+
+    async def _async_get_account_detail(self, account):
+        """Load an account page like `_get_account_detail`."""
+        await asyncio.to_thread(self.browser.get, account.link)
+        if not self.script_extraction:
+            if not await self._async_wait_until(
+                [ACCOUNT_NAME_SELECTOR, account.name], "TPE", account=account
+            ):
+                raise _account_not_loaded(account)
+
+        return await asyncio.to_thread(self._read_account_detail, account)
+
+    async def _async_navigate(self, link: str):
+        labels = self._labels()
+        with self.metrics.phase("navigate", **labels):
+            retries = await async_navigate(
+                self.browser, link, self.retry_policy
+            )
+        if self.metrics.enabled:
+            self.metrics.incr("navigate_retries", retries, **labels)
+
+    async def _async_wait_until(
+        self, ec_params, condition_type="POEL", timeout=10, account=None
+    ):
+        labels = self._labels(account)
+        with self.metrics.phase("wait", condition=condition_type, **labels):
+            return await async_wait_until(
+                self.browser, ec_params, condition_type, timeout
+            )
+
+    async def _async_wait_for_any(self, conditions: dict, timeout=10):
+        with self.metrics.phase("wait", condition="ANY", **self._labels()):
+            return await async_wait_for_any(self.browser, conditions, timeout)
+
+    async def _async_get_page_source(self, account=None):
+        return await asyncio.to_thread(self._get_page_source, account)
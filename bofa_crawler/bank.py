@@ -1,3 +1,9 @@
+import sys
+from array import array
+from datetime import date
+from itertools import compress
+
+
 class User:
     def __init__(
         self, online_id: str, passcode: str, security_responses: dict = None
@@ -15,6 +21,7 @@ class Account:
         self.link = link
         self.balance: int = None
         self.transactions: list[Transaction] = None
+        self.changes: list = None
 
     def __str__(self):
         transaction_count = len(self.transactions) if self.transactions else 0
@@ -24,14 +31,172 @@ class Account:
 
 
 class Transaction:
+    """An immutable account transaction."""
+
+    __slots__ = (
+        "description",
+        "amount",
+        "is_pending",
+        "ending_balance",
+        "date",
+    )
+
     def __init__(
         self,
         description: str,
         amount: int,
         is_pending: bool = False,
         ending_balance: int = None,
+        date: date = None,
     ):
-        self.description = description
-        self.amount = amount
-        self.is_pending = is_pending
-        self.ending_balance = ending_balance
+        set_attr = object.__setattr__
+        set_attr(self, "description", description)
+        set_attr(self, "amount", amount)
+        set_attr(self, "is_pending", is_pending)
+        set_attr(self, "ending_balance", ending_balance)
+        set_attr(self, "date", date)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Transaction is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Transaction is immutable")
+
+    def __reduce__(self):
+        return (Transaction, self._astuple())
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def __hash__(self):
+        return hash(self._astuple())
+
+    def __repr__(self):
+        return "Transaction({!r}, {!r}, {!r}, {!r}, {!r})".format(
+            *self._astuple()
+        )
+
+    def as_dict(self) -> dict:
+        """Get the transaction fields as a dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def _astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+# Marks a missing amount or balance in the integer columns of a batch
+NULL_CENTS = -(2**63)
+
+
+class TransactionBatch:
+    """Columnar storage for many transactions.
+
+    Amounts, balances, pending flags and dates are kept in compact
+    `array` buffers and descriptions are interned, so large histories can be
+    totalled and filtered without a `Transaction` object per row.
+    """
+
+    def __init__(self, transactions=()):
+        self.descriptions: list[str] = []
+        self.amounts = array("q")
+        self.ending_balances = array("q")
+        self.pending = array("b")
+        # Dates as proleptic Gregorian ordinals, 0 when unknown
+        self.dates = array("l")
+        self.extend(transactions)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> Transaction:
+        return Transaction(
+            self.descriptions[index],
+            _from_cents(self.amounts[index]),
+            bool(self.pending[index]),
+            _from_cents(self.ending_balances[index]),
+            _from_ordinal(self.dates[index]),
+        )
+
+    def append(self, transaction: Transaction):
+        """Add a transaction to the batch."""
+        description = transaction.description
+        if isinstance(description, str):
+            description = sys.intern(description)
+        self.descriptions.append(description)
+        self.amounts.append(_to_cents(transaction.amount))
+        self.ending_balances.append(_to_cents(transaction.ending_balance))
+        self.pending.append(bool(transaction.is_pending))
+        self.dates.append(_to_ordinal(transaction.date))
+
+    def extend(self, transactions):
+        """Add each of `transactions` to the batch."""
+        for transaction in transactions:
+            self.append(transaction)
+
+    def total(self, is_pending: bool = None) -> int:
+        """Sum amounts, optionally of only pending or cleared rows."""
+        amounts = self.amounts
+        if is_pending is not None:
+            amounts = compress(amounts, self._pending_mask(is_pending))
+        return sum(amount for amount in amounts if amount != NULL_CENTS)
+
+    def filter(
+        self,
+        is_pending: bool = None,
+        min_amount: int = None,
+        max_amount: int = None,
+        start_date: date = None,
+    ):
+        """Get a new batch of the rows matching every given criterion.
+
+        Rows without a date are kept when filtering by `start_date`.
+        """
+        mask = [True] * len(self)
+        if start_date is not None:
+            start = start_date.toordinal()
+            on_or_after = (not day or day >= start for day in self.dates)
+            mask = list(map(all, zip(mask, on_or_after)))
+        if is_pending is not None:
+            mask = list(map(all, zip(mask, self._pending_mask(is_pending))))
+        if min_amount is not None or max_amount is not None:
+            low = NULL_CENTS + 1 if min_amount is None else min_amount
+            high = -NULL_CENTS - 1 if max_amount is None else max_amount
+            in_range = (low <= amount <= high for amount in self.amounts)
+            mask = list(map(all, zip(mask, in_range)))
+
+        batch = TransactionBatch()
+        batch.descriptions = list(compress(self.descriptions, mask))
+        batch.amounts = array("q", compress(self.amounts, mask))
+        batch.ending_balances = array("q", compress(self.ending_balances, mask))
+        batch.pending = array("b", compress(self.pending, mask))
+        batch.dates = array("l", compress(self.dates, mask))
+        return batch
+
+    def to_transactions(self) -> list:
+        """Get the rows of the batch as `Transaction` objects."""
+        return list(self)
+
+    def _pending_mask(self, is_pending: bool):
+        return (bool(pending) == is_pending for pending in self.pending)
+
+
+def _to_cents(value):
+    return NULL_CENTS if value is None else value
+
+
+def _from_cents(value):
+    return None if value == NULL_CENTS else value
+
+
+def _to_ordinal(value):
+    return 0 if value is None else value.toordinal()
+
+
+def _from_ordinal(value):
+    return None if value == 0 else date.fromordinal(value)
@@ -1,7 +1,58 @@
+import json
+import os
 import shutil
+from functools import lru_cache
+from urllib.parse import quote
 
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver import Firefox, FirefoxOptions, FirefoxProfile
 
+from bofa_crawler.constants import BOFA_SIGN_IN_URL, SECURE_BASE_URL
+
+# Hosts of analytics, ad and tag-manager scripts loaded alongside
+# account pages. Patterns are shell-style globs matched against the host.
+BLOCKED_HOST_PATTERNS = (
+    "*.doubleclick.net",
+    "*.google-analytics.com",
+    "*.googletagmanager.com",
+    "*.googleadservices.com",
+    "*.facebook.net",
+    "*.demdex.net",
+    "*.omtrdc.net",
+    "*.everesttech.net",
+    "*.tealiumiq.com",
+    "*.tiqcdn.com",
+    "*.adobedtm.com",
+    "*.bing.com",
+)
+
+# Pages on each host a crawl stores cookies and storage for. Cookies and
+# storage can only be cleared for the host of the current page.
+SESSION_URLS = (BOFA_SIGN_IN_URL, SECURE_BASE_URL)
+
+# Preferences that skip fonts, media and animations and shrink caches.
+LIGHTWEIGHT_PREFERENCES = {
+    "permissions.default.image": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+    "media.autoplay.default": 5,
+    "media.autoplay.blocking_policy": 2,
+    "ui.prefersReducedMotion": 1,
+    "toolkit.cosmeticAnimations.enabled": False,
+    "browser.cache.disk.enable": False,
+    "browser.cache.memory.capacity": 16384,
+    "browser.sessionhistory.max_entries": 5,
+    "browser.sessionhistory.max_total_viewers": 0,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+    "dom.ipc.processCount": 1,
+}
+
+# Blocked requests are sent to a proxy on the discard port, where they fail
+# immediately instead of loading.
+BLOCKING_PROXY = "PROXY 127.0.0.1:9"
+
 
 class GeckodriverNotFoundError(Exception):
     """Raised when geckodriver path cannot be found."""
@@ -16,20 +67,69 @@ def get_geckodriver():
     raise (GeckodriverNotFoundError)
 
 
+@lru_cache(maxsize=None)
+def get_cached_geckodriver():
+    """Get path for geckodriver binary, searching only on the first call."""
+    return get_geckodriver()
+
+
 def get_browser(
-    headless=False, disable_images=False, geckodriver_path: str = None
+    headless=False,
+    disable_images=False,
+    geckodriver_path: str = None,
+    profile_dir: str = None,
+    lightweight: bool = False,
+    blocklist=None,
+    template_profile: bool = False,
 ):
-    """Get a new webdriver instance."""
-    options = FirefoxOptions()
-    profile = FirefoxProfile()
+    """Get a new webdriver instance.
+
+    When `profile_dir` is given, Firefox runs directly on that profile
+    so cookies and local storage persist between browsers.
+
+    `lightweight` disables images, fonts, media and animations, reduces
+    cache sizes and blocks requests to `BLOCKED_HOST_PATTERNS`. A custom
+    `blocklist` of host patterns may be given with or without it.
+
+    With `template_profile`, a temporary profile is built and encoded once
+    per set of preferences and shared by later browsers.
+    """
+    preferences = {}
+    if lightweight:
+        preferences.update(LIGHTWEIGHT_PREFERENCES)
+        if blocklist is None:
+            blocklist = BLOCKED_HOST_PATTERNS
+    elif disable_images:
+        preferences["permissions.default.image"] = 2
+
+    if blocklist:
+        preferences["network.proxy.type"] = 2
+        preferences["network.proxy.autoconfig_url"] = get_blocklist_pac(
+            blocklist
+        )
+
+    profile = None
+    if profile_dir:
+        options = FirefoxOptions()
+        os.makedirs(profile_dir, exist_ok=True)
+        options.add_argument("-profile")
+        options.add_argument(profile_dir)
+        for name, value in preferences.items():
+            options.set_preference(name, value)
+    elif template_profile:
+        options = TemplateProfileOptions(
+            get_template_profile(tuple(preferences.items()))
+        )
+    else:
+        options = FirefoxOptions()
+        profile = FirefoxProfile()
+        for name, value in preferences.items():
+            profile.set_preference(name, value)
 
     if headless:
         options.add_argument("-headless")
 
-    if disable_images:
-        profile.set_preference("permissions.default.image", 2)
-
-    driver = geckodriver_path or get_geckodriver()
+    driver = geckodriver_path or get_cached_geckodriver()
 
     browser = Firefox(
         options=options,
@@ -37,3 +137,151 @@ def get_browser(
         executable_path=driver,
     )
     return browser
+
+
+@lru_cache(maxsize=16)
+def get_template_profile(preferences: tuple) -> str:
+    """Get an encoded profile with `preferences`, building it only once."""
+    profile = FirefoxProfile()
+    try:
+        for name, value in preferences:
+            profile.set_preference(name, value)
+        return profile.encoded
+    finally:
+        shutil.rmtree(profile.path, ignore_errors=True)
+
+
+class TemplateProfileOptions(FirefoxOptions):
+    """Options that send a prebuilt encoded profile to geckodriver.
+
+    Unlike `FirefoxProfile`, no profile directory is copied or zipped per
+    browser, and quitting the browser leaves the template intact.
+    """
+
+    def __init__(self, encoded_profile: str):
+        super().__init__()
+        self.encoded_profile = encoded_profile
+
+    def to_capabilities(self):
+        """Get capabilities including the encoded profile."""
+        capabilities = super().to_capabilities()
+        capabilities.setdefault(self.KEY, {})["profile"] = self.encoded_profile
+        return capabilities
+
+
+def get_browser_memory(browser: Firefox) -> int:
+    """Get resident memory in bytes of the browser's processes.
+
+    Sums the Firefox process and its content processes using `/proc`, so
+    None is returned where that is unavailable.
+    """
+    try:
+        pid = browser.capabilities.get("moz:processID")
+    except (AttributeError, WebDriverException):
+        return None
+    if not pid or not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/{}/stat".format(entry)) as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so fields are counted from
+        # its closing parenthesis.
+        ppid = int(stat[stat.rindex(")") + 2 :].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    pids = [int(pid)]
+    while pids:
+        pid = pids.pop()
+        rss = _get_rss(pid)
+        if rss is None:
+            continue
+        total += rss
+        pids.extend(children.get(pid, ()))
+
+    return total or None
+
+
+def _get_rss(pid: int) -> int:
+    try:
+        with open("/proc/{}/status".format(pid)) as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+def get_blocklist_pac(patterns) -> str:
+    """Get a proxy auto-config data URL that blocks hosts in `patterns`."""
+    conditions = " || ".join(
+        "shExpMatch(host, {})".format(json.dumps(pattern))
+        for pattern in patterns
+    )
+    script = (
+        "function FindProxyForURL(url, host) {{ "
+        "if ({}) return {}; return 'DIRECT'; }}"
+    ).format(conditions, json.dumps(BLOCKING_PROXY))
+    return "data:application/x-ns-proxy-autoconfig," + quote(script)
+
+
+def reset_browser(browser: Firefox):
+    """Clear session state so `browser` can be reused for another user."""
+    handles = browser.window_handles
+    for handle in handles[1:]:
+        browser.switch_to.window(handle)
+        browser.close()
+    browser.switch_to.window(handles[0])
+
+    for url in SESSION_URLS:
+        browser.get(url)
+        browser.delete_all_cookies()
+        browser.execute_script(
+            "try { window.localStorage.clear(); "
+            "window.sessionStorage.clear(); } catch (e) {}"
+        )
+    browser.get("about:blank")
+
+
+def save_cookies(browser: Firefox, path: str):
+    """Write the cookies visible to `browser` to a JSON file.
+
+    The cookies hold a live session, so only the owner may read the file.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    # The mode above only applies when the file is created
+    os.chmod(path, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(browser.get_cookies(), f)
+
+
+def load_cookies(browser: Firefox, path: str) -> int:
+    """Add cookies saved by `save_cookies`, returning how many were added.
+
+    Cookies whose domain does not match the loaded page are skipped.
+    """
+    try:
+        with open(path) as f:
+            cookies = json.load(f)
+    except (OSError, ValueError):
+        return 0
+
+    added = 0
+    for cookie in cookies:
+        if "expiry" in cookie:
+            cookie["expiry"] = int(cookie["expiry"])
+        try:
+            browser.add_cookie(cookie)
+        except WebDriverException:
+            continue
+        added += 1
+
+    return added
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from bofa_crawler.bank import Account, Transaction
+from bofa_crawler.parser import ACCOUNT_PARSERS, get_account_parser
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def get_cache_key(account_type: str, page_source: str) -> str:
+    """Get the cache key of `page_source` parsed for `account_type`."""
+    parser_name = ACCOUNT_PARSERS[account_type].__name__
+    normalized = WHITESPACE_RE.sub(" ", page_source).strip()
+    digest = hashlib.sha256(parser_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def dump_result(result) -> str:
+    """Serialize a `(balance, transactions)` parse result as JSON."""
+    balance, transactions = result
+    rows = []
+    for transaction in transactions:
+        row = transaction.as_dict()
+        if row["date"] is not None:
+            row["date"] = row["date"].isoformat()
+        rows.append(row)
+    return json.dumps({"balance": balance, "transactions": rows})
+
+
+def load_result(data: str):
+    """Read a parse result serialized by `dump_result`."""
+    data = json.loads(data)
+    transactions = []
+    for row in data["transactions"]:
+        if row["date"] is not None:
+            row["date"] = date.fromisoformat(row["date"])
+        transactions.append(Transaction(**row))
+    return data["balance"], tuple(transactions)
+
+
+class ParseCache:
+    """Parsed account pages keyed by a hash of their normalized source.
+
+    Results are held in an in-memory LRU of `maxsize` entries and, when
+    `directory` is given, also written to disk as JSON, where the least
+    recently used files are evicted once they exceed `max_disk_bytes`.
+    The files hold balances and transactions, so only the owner may read
+    them.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        directory: str = None,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def parse(self, account: Account, page_source: str, features: str = None):
+        """Get `(balance, transactions)` for the page, parsing on a miss."""
+        key = get_cache_key(account.account_type, page_source)
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        parser = get_account_parser(account, page_source, features)
+        result = (parser.get_balance(), tuple(parser.iter_transactions()))
+        self.set(key, result)
+        return result
+
+    def get(self, key: str):
+        """Get a cached result, or None if `key` is not cached."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, result)
+        return result
+
+    def set(self, key: str, result):
+        """Cache `result` under `key`."""
+        self._remember(key, result)
+        self._write_disk(key, result)
+
+    def _remember(self, key: str, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _read_disk(self, key: str):
+        if not self.directory:
+            return None
+
+        path = self._get_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = load_result(f.read())
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        return result
+
+    def _write_disk(self, key: str, result):
+        if not self.directory:
+            return
+
+        path = self._get_path(key)
+        tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(dump_result(result))
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
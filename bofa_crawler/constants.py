@@ -1,2 +1,5 @@
 BOFA_SIGN_IN_URL = "https://www.bankofamerica.com/online-banking/sign-in/"
 SECURE_BASE_URL = "https://secure.bankofamerica.com"
+ACCOUNTS_OVERVIEW_URL = (
+    SECURE_BASE_URL + "/myaccounts/brain/redirect.go?target=accountsoverview"
+)
@@ -1,10 +1,66 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from html import unescape
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver import Firefox
 from selenium.webdriver.common.keys import Keys
 
-from bofa_crawler.bank import User
-from bofa_crawler.browser import get_browser
-from bofa_crawler.constants import BOFA_SIGN_IN_URL
-from bofa_crawler.parser import AccountListParser, get_account_parser
-from bofa_crawler.util import navigate, wait_until
+from bofa_crawler.bank import Account, User
+from bofa_crawler.browser import get_browser, load_cookies, save_cookies
+from bofa_crawler.cache import ParseCache
+from bofa_crawler.constants import (
+    ACCOUNTS_OVERVIEW_URL,
+    BOFA_SIGN_IN_URL,
+    SECURE_BASE_URL,
+)
+from bofa_crawler.export import Exporter
+from bofa_crawler.extract import ExtractedParser, extract_account
+from bofa_crawler.history import PERIOD_SCRIPT, merge_transactions
+from bofa_crawler.http_client import HttpSession
+from bofa_crawler.metrics import NULL_METRICS, Metrics
+from bofa_crawler.parser import (
+    ACCOUNT_PARSERS,
+    AccountListParser,
+    get_account_parser,
+)
+from bofa_crawler.pipeline import ParsePipeline
+from bofa_crawler.state import StateStore, get_account_key
+from bofa_crawler.util import (
+    RetryPolicy,
+    get_page_load_time,
+    html_whitespace,
+    navigate,
+    parse_date,
+    wait_for_any,
+    wait_until,
+)
+
+SESSION_COOKIES_FILE = "bofa_crawler_cookies.json"
+ACCOUNT_NAME_SELECTOR = "a[name='page_title_acct_switcher'] > span:nth-child(2)"
+
+# Pages that can follow submitting the sign in form, so failures are
+# recognized as soon as they show instead of after a full timeout
+SIGNED_IN = "signed_in"
+SECURITY_QUESTION = "security_question"
+BAD_CREDENTIALS = "bad_credentials"
+MAINTENANCE = "maintenance"
+SIGN_IN_OUTCOMES = {
+    SIGNED_IN: ("div.Accounts", "VOEL"),
+    SECURITY_QUESTION: ("#tlpvt-challenge-answer", "VOEL"),
+    BAD_CREDENTIALS: ("#signInErrorMessage, .error-message-box", "VOEL"),
+    MAINTENANCE: ("Maintenance", "TC"),
+}
+SIGNED_OUT = "signed_out"
+
+
+class SignInError(Exception):
+    """Raised when signing in shows a page other than the accounts."""
+
+    def __init__(self, outcome: str):
+        super().__init__(outcome)
+        self.outcome = outcome
 
 
 class BofaCrawler:
@@ -15,61 +71,469 @@ class BofaCrawler:
         headless: bool = False,
         disable_images: bool = False,
         geckodriver_path: str = None,
+        browser: Firefox = None,
+        max_tabs: int = 1,
+        retry_policy: RetryPolicy = None,
+        http_mode: bool = False,
+        parser_features: str = None,
+        state_store: StateStore = None,
+        parse_cache: ParseCache = None,
+        profile_dir: str = None,
+        metrics: Metrics = None,
+        exporter: Exporter = None,
+        keep_transactions: bool = True,
+        lightweight: bool = False,
+        blocklist=None,
+        script_extraction: bool = False,
+        parse_pipeline: ParsePipeline = None,
     ):
         self.user = user
         self.accounts = accounts
-        self.browser = get_browser(
-            headless=headless,
-            disable_images=disable_images,
-            geckodriver_path=geckodriver_path,
-        )
+        self.max_tabs = max_tabs
+        self.retry_policy = retry_policy
+        self.http_mode = http_mode
+        self.parser_features = parser_features
+        self.state_store = state_store
+        self.parse_cache = parse_cache
+        self.profile_dir = profile_dir
+        self.metrics = metrics or NULL_METRICS
+        self.exporter = exporter
+        self.keep_transactions = keep_transactions
+        self.script_extraction = script_extraction
+        self.parse_pipeline = parse_pipeline
+        # Errors of accounts that could not be crawled, by account name
+        self.errors = {}
+        self.sign_in_error: Exception = None
+        if browser is None:
+            with self.metrics.phase("browser_start", **self._labels()):
+                browser = get_browser(
+                    headless=headless,
+                    disable_images=disable_images,
+                    geckodriver_path=geckodriver_path,
+                    profile_dir=profile_dir,
+                    lightweight=lightweight,
+                    blocklist=blocklist,
+                )
+        self.browser = browser
 
     def start(self):
-        """Begin crawling."""
-        if self._sign_in():
+        """Begin crawling, returning whether sign in succeeded."""
+        if self._resume_session() or self._sign_in():
             self._get_accounts()
+            return True
+
+        return False
 
     def end(self):
         """End crawling."""
+        if self.profile_dir:
+            try:
+                save_cookies(self.browser, self._get_cookies_path())
+            except (OSError, WebDriverException):
+                pass
         self.browser.quit()
 
+    def get_account_history(
+        self, account: Account, start_date: date = None, max_periods: int = 12
+    ) -> list:
+        """Collect transactions of `account` across statement periods.
+
+        Periods are walked newest first, parsing each page while the
+        previous one loads, until there is no earlier period, the oldest
+        transaction on a page is before `start_date`, or `max_periods`
+        pages have been read. The merged series is stored on the account.
+        Raises `TimeoutException` if any period page does not load.
+        """
+        parser_class = ACCOUNT_PARSERS[account.account_type]
+        link = account.link
+        futures = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for _ in range(max_periods):
+                self.browser.get(link)
+                if not self._wait_for_account(account):
+                    # A missing period would pass for a shorter history
+                    raise _account_not_loaded(account)
+
+                futures.append(
+                    executor.submit(
+                        self._parse_history_page,
+                        account,
+                        self._get_page_source(account),
+                    )
+                )
+                date_texts, link = self.browser.execute_script(
+                    PERIOD_SCRIPT,
+                    parser_class.date_cell_selector,
+                    parser_class.previous_period_selector,
+                )
+                dates = [d for d in map(parse_date, date_texts) if d]
+                reached_start = start_date and dates and min(dates) < start_date
+                if not link or reached_start:
+                    break
+
+            pages = [future.result() for future in futures]
+
+        if pages:
+            account.balance = pages[0][0]
+        account.transactions = merge_transactions(
+            [transactions for _, transactions in pages], start_date
+        )
+        return account.transactions
+
+    def _parse_history_page(self, account: Account, page_source: str):
+        if self.parse_cache:
+            return self.parse_cache.parse(
+                account, page_source, self.parser_features
+            )
+
+        parser = get_account_parser(account, page_source, self.parser_features)
+        return parser.get_balance(), parser.get_transactions()
+
+    def _get_cookies_path(self):
+        return os.path.join(self.profile_dir, SESSION_COOKIES_FILE)
+
+    def _resume_session(self):
+        """Attempt to reuse a saved session instead of signing in."""
+        if not self.profile_dir:
+            return False
+
+        try:
+            self._navigate(SECURE_BASE_URL)
+            load_cookies(self.browser, self._get_cookies_path())
+            self._navigate(ACCOUNTS_OVERVIEW_URL)
+            outcome, _ = self._wait_for_any(
+                {
+                    SIGNED_IN: SIGN_IN_OUTCOMES[SIGNED_IN],
+                    SIGNED_OUT: ("#oid", "POEL"),
+                },
+                timeout=5,
+            )
+            return outcome == SIGNED_IN
+        except WebDriverException:
+            return False
+
     def _sign_in(self):
         """Attempt to sign in using user credentials."""
         # TODO: handle security questions if prompted
         try:
-            navigate(self.browser, BOFA_SIGN_IN_URL)
+            self._navigate(BOFA_SIGN_IN_URL)
 
-            oid = wait_until(self.browser, "#oid")
+            oid = self._wait_until("#oid")
             oid.send_keys(self.user.online_id)
 
-            passcode = wait_until(self.browser, "#pass", "CLICK")
+            passcode = self._wait_until("#pass", "CLICK")
             passcode.send_keys(self.user.passcode)
             passcode.send_keys(Keys.RETURN)
 
-            wait_until(self.browser, "div.Accounts", "VOEL")
-        except Exception:
+            outcome, _ = self._wait_for_any(SIGN_IN_OUTCOMES)
+            if outcome is None:
+                raise TimeoutException("No page loaded after signing in")
+            if outcome != SIGNED_IN:
+                raise SignInError(outcome)
+        except Exception as e:
+            self.sign_in_error = e
             return False
 
         return True
 
     def _get_accounts(self):
-        account_list_parser = AccountListParser(self.browser.page_source)
-        self.user.accounts.extend(
-            account_list_parser.get_accounts(self.accounts)
-        )
+        cached = self._get_cached_accounts()
+        if cached is None:
+            self._add_user_accounts(self._get_page_source())
+            self._get_user_accounts_detail()
+            return
 
+        self.user.accounts.extend(cached)
         self._get_user_accounts_detail()
+        stale = self._get_stale_accounts(cached)
+        if stale:
+            self._rediscover_accounts(stale)
 
-    def _get_user_accounts_detail(self):
-        for account in self.user.accounts:
-            self.browser.get(account.link)
-            name_selector = (
-                "a[name='page_title_acct_switcher'] > span:nth-child(2)"
-            )
-            if not wait_until(
-                self.browser, [name_selector, account.name], "TPE"
-            ):
+    def _get_cached_accounts(self):
+        """Get accounts discovered by earlier crawls, if all are known."""
+        if not self.state_store or not self.accounts:
+            return None
+
+        discovered = self.state_store.get_accounts(self.user.online_id)
+        if any(name not in discovered for name in self.accounts):
+            return None
+
+        return [discovered[name] for name in self.accounts]
+
+    def _get_stale_accounts(self, cached: list) -> list:
+        """Get cached accounts whose pages did not load from their link."""
+        return [
+            account
+            for account in cached
+            if isinstance(self.errors.get(account.name), TimeoutException)
+        ]
+
+    def _add_user_accounts(self, page_source: str, names: list = None):
+        account_list_parser = AccountListParser(page_source)
+        accounts = account_list_parser.get_accounts(
+            self.accounts if names is None else names
+        )
+        if self.state_store:
+            self.state_store.set_accounts(self.user.online_id, accounts)
+        self.user.accounts.extend(accounts)
+        return accounts
+
+    def _rediscover_accounts(self, stale: list):
+        """Find new links for cached accounts whose pages did not load."""
+        self._navigate(ACCOUNTS_OVERVIEW_URL)
+        if not self._wait_until("div.Accounts", "VOEL"):
+            return
+
+        for account in stale:
+            self.user.accounts.remove(account)
+        accounts = self._add_user_accounts(
+            self._get_page_source(), [account.name for account in stale]
+        )
+        for account in accounts:
+            del self.errors[account.name]
+        self._get_user_accounts_detail(accounts)
+
+    def _get_user_accounts_detail(self, accounts: list = None):
+        if accounts is None:
+            accounts = self.user.accounts
+
+        if self.http_mode:
+            self._get_user_accounts_detail_over_http(accounts)
+            return
+
+        if self.max_tabs > 1:
+            self._get_user_accounts_detail_in_tabs(accounts)
+            return
+
+        futures = []
+        for account in accounts:
+            try:
+                future = self._get_account_detail(account)
+            except Exception as e:
+                self.errors[account.name] = e
                 continue
-            parser = get_account_parser(account, self.browser.page_source)
-            account.balance = parser.get_balance()
-            account.transactions = parser.get_transactions()
+            if future:
+                futures.append((account, future))
+
+        self._finish_parsing(futures)
+
+    def _get_account_detail(self, account):
+        """Load and parse an account page.
+
+        Returns a future of the parsed page when it was handed to the parse
+        pipeline instead of being parsed on this thread.
+        """
+        self.browser.get(account.link)
+        if not self.script_extraction and not self._wait_for_account(account):
+            raise _account_not_loaded(account)
+        return self._read_account_detail(account)
+
+    def _read_account_detail(self, account):
+        """Parse the loaded page of `account` like `_get_account_detail`.
+
+        With script extraction, waits for the page as part of extracting.
+        """
+        if self.script_extraction:
+            extracted = self._extract_account(account)
+            if extracted is None:
+                raise _account_not_loaded(account)
+            self._parse_account(account, extracted=extracted)
+            return None
+
+        page_source = self._get_page_source(account)
+        if self.parse_pipeline:
+            return self._submit_parse(account, page_source)
+        self._parse_account(account, page_source)
+        return None
+
+    def _get_user_accounts_detail_in_tabs(self, accounts: list):
+        """Load account pages in parallel tabs, parsing while others load."""
+        main_handle = self.browser.current_window_handle
+        futures = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for start in range(0, len(accounts), self.max_tabs):
+                batch = accounts[start : start + self.max_tabs]
+                handles = self._open_tabs([account.link for account in batch])
+                for account, handle in zip(batch, handles):
+                    try:
+                        future = self._read_account_tab(
+                            account, handle, executor
+                        )
+                    except Exception as e:
+                        self.errors[account.name] = e
+                        continue
+                    futures.append((account, future))
+                self.browser.switch_to.window(main_handle)
+
+            self._finish_parsing(futures)
+
+    def _read_account_tab(self, account, handle: str, executor):
+        """Read the page of `account` in tab `handle`, then close the tab.
+
+        Returns a future of the parsed page.
+        """
+        self.browser.switch_to.window(handle)
+        try:
+            if not self._wait_for_account(account):
+                raise _account_not_loaded(account)
+            page_source = self._get_page_source(account)
+            if self.parse_pipeline:
+                return self._submit_parse(account, page_source)
+            return executor.submit(self._parse_account, account, page_source)
+        finally:
+            self.browser.close()
+
+    def _get_user_accounts_detail_over_http(self, accounts: list):
+        """Fetch account pages directly using the browser's session cookies."""
+        with HttpSession.from_browser(self.browser) as session:
+            for account in accounts:
+                try:
+                    self._get_account_detail_over_http(session, account)
+                except Exception as e:
+                    self.errors[account.name] = e
+
+    def _get_account_detail_over_http(self, session: HttpSession, account):
+        labels = self._labels(account)
+        with self.metrics.phase("http_fetch", **labels):
+            page_source = session.get(account.link)
+        if self.metrics.enabled:
+            self.metrics.observe("page_bytes", len(page_source), **labels)
+        if account.name not in html_whitespace(unescape(page_source)):
+            raise _account_not_loaded(account)
+        self._parse_account(account, page_source)
+
+    def _submit_parse(self, account, page_source: str):
+        return self.parse_pipeline.submit(
+            account, page_source, self.parser_features, self.parse_cache
+        )
+
+    def _finish_parsing(self, futures: list):
+        """Wait for `(account, future)` parses, storing pipeline results."""
+        for account, future in futures:
+            try:
+                result = future.result()
+                # Pages parsed on a local thread have already been stored
+                if result is not None:
+                    balance, transactions = result
+                    rows = self._store_parsed(
+                        account, balance, iter(transactions)
+                    )
+                    self.metrics.observe("rows", rows, **self._labels(account))
+            except Exception as e:
+                self.errors[account.name] = e
+
+    def _open_tabs(self, links: list) -> list:
+        """Open each of `links` in a new tab, returning the tab handles."""
+        handles = []
+        for link in links:
+            known_handles = set(self.browser.window_handles)
+            self.browser.execute_script(
+                "window.open(arguments[0], '_blank');", link
+            )
+            new_handles = [
+                handle
+                for handle in self.browser.window_handles
+                if handle not in known_handles
+            ]
+            handles.append(new_handles[0])
+
+        return handles
+
+    def _wait_for_account(self, account):
+        return self._wait_until(
+            [ACCOUNT_NAME_SELECTOR, account.name], "TPE", account=account
+        )
+
+    def _extract_account(self, account):
+        """Wait for and read the rows of an account page in one script."""
+        with self.metrics.phase("extract", **self._labels(account)):
+            return extract_account(self.browser, account, ACCOUNT_NAME_SELECTOR)
+
+    def _labels(self, account=None) -> dict:
+        labels = {"user": self.user.online_id}
+        if account is not None:
+            labels["account"] = account.name
+        return labels
+
+    def _navigate(self, link: str):
+        labels = self._labels()
+        with self.metrics.phase("navigate", **labels):
+            retries = navigate(self.browser, link, self.retry_policy)
+        if self.metrics.enabled:
+            self.metrics.incr("navigate_retries", retries, **labels)
+
+    def _wait_until(
+        self, ec_params, condition_type="POEL", timeout=10, account=None
+    ):
+        labels = self._labels(account)
+        with self.metrics.phase("wait", condition=condition_type, **labels):
+            return wait_until(self.browser, ec_params, condition_type, timeout)
+
+    def _wait_for_any(self, conditions: dict, timeout=10):
+        with self.metrics.phase("wait", condition="ANY", **self._labels()):
+            return wait_for_any(self.browser, conditions, timeout)
+
+    def _get_page_source(self, account=None) -> str:
+        labels = self._labels(account)
+        with self.metrics.phase("page_source", **labels):
+            page_source = self.browser.page_source
+        if self.metrics.enabled:
+            self.metrics.observe("page_bytes", len(page_source), **labels)
+            load_time = account and get_page_load_time(self.browser)
+            if load_time:
+                self.metrics.observe("page_load_seconds", load_time, **labels)
+        return page_source
+
+    def _parse_account(
+        self, account, page_source: str = None, extracted: dict = None
+    ):
+        labels = self._labels(account)
+        with self.metrics.phase("parse", **labels):
+            rows = self._parse_account_source(account, page_source, extracted)
+        self.metrics.observe("rows", rows, **labels)
+
+    def _parse_account_source(
+        self, account, page_source: str = None, extracted: dict = None
+    ):
+        if extracted is not None:
+            parser = ExtractedParser(account, extracted)
+            balance = parser.get_balance()
+            transactions = parser.iter_transactions()
+        elif self.parse_cache:
+            balance, transactions = self.parse_cache.parse(
+                account, page_source, self.parser_features
+            )
+            transactions = iter(transactions)
+        else:
+            parser = get_account_parser(
+                account, page_source, self.parser_features
+            )
+            balance = parser.get_balance()
+            transactions = parser.iter_transactions()
+
+        return self._store_parsed(account, balance, transactions)
+
+    def _store_parsed(self, account, balance, transactions) -> int:
+        """Set parsed results on `account`, returning the row count."""
+        account.balance = balance
+        if self.state_store:
+            account.changes = self.state_store.update_account(
+                get_account_key(self.user, account), transactions
+            )
+            transactions = [change.transaction for change in account.changes]
+
+        if self.keep_transactions:
+            transactions = account.transactions = list(transactions)
+
+        if self.exporter:
+            return self.exporter.write(
+                account, transactions, self.user.online_id
+            )
+
+        return len(account.transactions or ())
+
+
+def _account_not_loaded(account) -> TimeoutException:
+    return TimeoutException(
+        "Page of account '{}' did not load".format(account.name)
+    )
@@ -0,0 +1,254 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from time import monotonic
+
+from bofa_crawler.bank import Account, User
+from bofa_crawler.crawler import BofaCrawler
+from bofa_crawler.pool import CrawlResult
+from bofa_crawler.scheduler import AUTH, classify_error, run_crawler
+
+# Seconds between crawls of an account that keeps changing
+MIN_INTERVAL = 15 * 60
+# Seconds between crawls of a dormant account
+MAX_INTERVAL = 24 * 60 * 60
+# Factor by which intervals shrink on activity and grow without it
+BACKOFF = 2
+
+
+def get_activity(account: Account, previous_balance: int = None) -> int:
+    """Count signs that `account` changed since its previous crawl.
+
+    With a state store, new, posted and newly pending transactions are
+    counted. Without one every row looks new, so only pending rows, which
+    are about to post, are counted. A moved balance counts once.
+    """
+    if account.changes is not None:
+        activity = len(account.changes)
+    else:
+        activity = sum(1 for t in account.transactions or () if t.is_pending)
+
+    if previous_balance is not None and account.balance != previous_balance:
+        activity += 1
+
+    return activity
+
+
+class UserSchedule:
+    """When each account of a user is next due to be crawled."""
+
+    def __init__(self, user: User, accounts: list, now: float, interval):
+        self.user = user
+        self.accounts = accounts
+        self.intervals = {name: interval for name in accounts}
+        self.due = {name: now for name in accounts}
+        self.balances = {}
+        self.auth_failures = 0
+
+    @property
+    def next_due(self) -> float:
+        """Get when the earliest due account should be crawled."""
+        return min(self.due.values())
+
+    def get_due(self, until: float) -> list:
+        """Get names of accounts due to be crawled by `until`."""
+        return [name for name in self.accounts if self.due[name] <= until]
+
+
+class CrawlDaemon:
+    """Keep crawling users, more often for the accounts that change.
+
+    Each account starts at `min_interval` between crawls. After a crawl,
+    the interval is divided by `backoff` if the account showed activity
+    (see `get_activity`) and multiplied by it otherwise, staying between
+    `min_interval` and `max_interval`. Pass a `state_store` in
+    `crawler_kwargs` so new transactions can be told apart from old ones.
+
+    A user is crawled when any of its accounts is due, together with the
+    accounts due within `min_interval`, so one sign in covers them. At
+    most `max_browsers` crawlers run at once. Crawlers are created with
+    `crawler_factory(user, accounts, **crawler_kwargs)`.
+
+    Accounts that time out or fail to parse are retried after
+    `min_interval`. A rejected sign in is retried after `max_interval`
+    up to `max_auth_retries` times in a row, after which the user is
+    parked until `resume` is called, so bad credentials do not lock the
+    user out.
+    """
+
+    def __init__(
+        self,
+        jobs,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        backoff: float = BACKOFF,
+        max_browsers: int = 4,
+        max_auth_retries: int = 1,
+        crawler_factory=BofaCrawler,
+        clock=monotonic,
+        sleep=None,
+        **crawler_kwargs,
+    ):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < min <= max")
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_browsers = max_browsers
+        self.max_auth_retries = max_auth_retries
+        self.crawler_factory = crawler_factory
+        self.clock = clock
+        self._stopped = threading.Event()
+        # Waiting on the stop event lets `stop` end an idle wait early
+        self.sleep = sleep or self._stopped.wait
+        self.crawler_kwargs = crawler_kwargs
+        self.schedules = {}
+        self.parked = {}
+        self._queue = []
+        self._counter = itertools.count()
+
+        now = self.clock()
+        for user, accounts in jobs:
+            schedule = UserSchedule(user, accounts, now, min_interval)
+            self.schedules[user.online_id] = schedule
+            self._push(schedule)
+
+    def run(self, max_crawls: int = None):
+        """Crawl users as they fall due, yielding a result per crawl.
+
+        Runs until `stop` is called or `max_crawls` crawls have finished.
+        """
+        started = 0
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_browsers) as executor:
+            while True:
+                accepting = not self._stopped.is_set() and (
+                    max_crawls is None or started < max_crawls
+                )
+                if not accepting and not running:
+                    return
+
+                now = self.clock()
+                slots = 0
+                if accepting:
+                    slots = self.max_browsers - len(running)
+                    if max_crawls is not None:
+                        slots = min(slots, max_crawls - started)
+
+                due = self._pop_due(now, slots)
+                slots -= len(due)
+                for schedule in due:
+                    names = schedule.get_due(now + self.min_interval)
+                    future = executor.submit(self._crawl, schedule.user, names)
+                    running[future] = schedule, names
+                    started += 1
+
+                if not running:
+                    if not self._queue:
+                        return
+                    self.sleep(max(self._queue[0][0] - now, 0))
+                    continue
+
+                # Wake up for the next due user only if a browser is free
+                timeout = None
+                if accepting and self._queue and slots > 0:
+                    timeout = max(self._queue[0][0] - now, 0)
+                done, _ = wait(running, timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    schedule, names = running.pop(future)
+                    result, crawled = future.result()
+                    self._reschedule(schedule, names, result, crawled)
+                    yield result
+
+    def stop(self):
+        """Stop starting crawls; `run` returns once running ones finish."""
+        self._stopped.set()
+
+    def resume(self, online_id: str):
+        """Queue a parked user again, e.g. after its credentials are fixed."""
+        if self.parked.pop(online_id, None) is None:
+            return
+
+        schedule = self.schedules[online_id]
+        schedule.auth_failures = 0
+        now = self.clock()
+        for name in schedule.accounts:
+            schedule.due[name] = min(schedule.due[name], now)
+        self._push(schedule)
+
+    def get_next_interval(self, interval: float, activity: int) -> float:
+        """Get the interval to wait after a crawl with `activity`."""
+        if activity:
+            interval /= self.backoff
+        else:
+            interval *= self.backoff
+
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _crawl(self, user: User, names: list):
+        """Crawl `names` of `user` once.
+
+        Returns the result and the crawled accounts by name.
+        """
+        user.accounts.clear()
+        crawler, error = run_crawler(
+            self.crawler_factory, user, names, **self.crawler_kwargs
+        )
+        if error is not None:
+            return CrawlResult(user, error), {}
+
+        crawled = {
+            account.name: account
+            for account in user.accounts
+            if account.name not in crawler.errors
+        }
+        return CrawlResult(user, errors=dict(crawler.errors)), crawled
+
+    def _reschedule(self, schedule: UserSchedule, names: list, result, crawled):
+        now = self.clock()
+        retry_delay = self.min_interval
+        if result.error is not None and classify_error(result.error) == AUTH:
+            schedule.auth_failures += 1
+            if schedule.auth_failures > self.max_auth_retries:
+                self.parked[schedule.user.online_id] = result.error
+                return
+            # Retrying a rejected sign in soon risks locking the user out
+            retry_delay = self.max_interval
+        elif crawled:
+            schedule.auth_failures = 0
+
+        for name in names:
+            account = crawled.get(name)
+            if account is None:
+                # Failed accounts keep their interval
+                schedule.due[name] = now + retry_delay
+                continue
+
+            activity = get_activity(account, schedule.balances.get(name))
+            interval = self.get_next_interval(
+                schedule.intervals[name], activity
+            )
+            schedule.intervals[name] = interval
+            schedule.due[name] = now + interval
+            schedule.balances[name] = account.balance
+
+        self._push(schedule)
+
+    def _pop_due(self, now: float, limit: int) -> list:
+        """Take up to `limit` users that are due by `now` off the queue."""
+        schedules = []
+        while len(schedules) < limit and self._queue:
+            if self._queue[0][0] > now:
+                break
+            _, _, online_id = heapq.heappop(self._queue)
+            schedules.append(self.schedules[online_id])
+
+        return schedules
+
+    def _push(self, schedule: UserSchedule):
+        heapq.heappush(
+            self._queue,
+            (schedule.next_due, next(self._counter), schedule.user.online_id),
+        )
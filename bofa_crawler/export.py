@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from bofa_crawler.bank import Account
+
+EXPORT_FIELDS = (
+    "user",
+    "account",
+    "account_type",
+    "date",
+    "description",
+    "amount",
+    "is_pending",
+    "ending_balance",
+)
+
+
+class Exporter(ABC):
+    """Stream transactions to a file in buffered batches.
+
+    Rows are buffered and written `batch_size` at a time. With
+    `flush_per_account`, each account's rows are written as soon as the
+    account finishes. With `append`, an existing file is extended rather
+    than replaced.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 1000,
+        append: bool = False,
+        flush_per_account: bool = True,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.append = append
+        self.flush_per_account = flush_per_account
+        self.rows_written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._opened = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, account: Account, transactions, user: str = None) -> int:
+        """Export `transactions` of `account`, returning the row count."""
+        count = 0
+        with self._lock:
+            for transaction in transactions:
+                self._buffer.append(
+                    {
+                        "user": user,
+                        "account": account.name,
+                        "account_type": account.account_type,
+                        "date": transaction.date,
+                        "description": transaction.description,
+                        "amount": transaction.amount,
+                        "is_pending": transaction.is_pending,
+                        "ending_balance": transaction.ending_balance,
+                    }
+                )
+                count += 1
+                if len(self._buffer) >= self.batch_size:
+                    self._flush()
+
+            if self.flush_per_account:
+                self._flush()
+
+        return count
+
+    def flush(self):
+        """Write any buffered rows."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Write any buffered rows and close the file."""
+        with self._lock:
+            self._flush()
+            if self._opened:
+                self._close()
+                self._opened = False
+
+    def _flush(self):
+        if not self._buffer:
+            return
+
+        if not self._opened:
+            self._open()
+            self._opened = True
+
+        self._write_rows(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    @abstractmethod
+    def _open(self):
+        pass
+
+    @abstractmethod
+    def _write_rows(self, rows: list):
+        pass
+
+    @abstractmethod
+    def _close(self):
+        pass
+
+
+class CsvExporter(Exporter):
+    def _open(self):
+        has_rows = os.path.exists(self.path) and os.path.getsize(self.path)
+        write_header = not (self.append and has_rows)
+        self._file = open(self.path, "a" if self.append else "w", newline="")
+        self._writer = csv.DictWriter(self._file, EXPORT_FIELDS)
+        if write_header:
+            self._writer.writeheader()
+
+    def _write_rows(self, rows: list):
+        for row in rows:
+            if row["date"] is not None:
+                row["date"] = row["date"].isoformat()
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonLinesExporter(Exporter):
+    def _open(self):
+        self._file = open(self.path, "a" if self.append else "w")
+
+    def _write_rows(self, rows: list):
+        self._file.write(
+            "".join(json.dumps(row, default=str) + "\n" for row in rows)
+        )
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class ColumnarExporter(Exporter):
+    """Write Parquet files with one row group per batch.
+
+    Requires the optional `pyarrow` package. Parquet files cannot be
+    extended, so `append` is not supported.
+    """
+
+    def __init__(self, path: str, batch_size: int = 10000, **kwargs):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "ColumnarExporter requires the 'pyarrow' package"
+            ) from e
+
+        if kwargs.get("append"):
+            raise ValueError("ColumnarExporter cannot append to a file")
+
+        super().__init__(path, batch_size, **kwargs)
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self._schema = pyarrow.schema(
+            [
+                ("user", pyarrow.string()),
+                ("account", pyarrow.string()),
+                ("account_type", pyarrow.string()),
+                ("date", pyarrow.date32()),
+                ("description", pyarrow.string()),
+                ("amount", pyarrow.int64()),
+                ("is_pending", pyarrow.bool_()),
+                ("ending_balance", pyarrow.int64()),
+            ]
+        )
+
+    def _open(self):
+        self._writer = self._parquet.ParquetWriter(self.path, self._schema)
+
+    def _write_rows(self, rows: list):
+        columns = {name: [row[name] for row in rows] for name in EXPORT_FIELDS}
+        table = self._pyarrow.table(columns, schema=self._schema)
+        self._writer.write_table(table)
+
+    def _close(self):
+        self._writer.close()
@@ -0,0 +1,148 @@
+import json
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Firefox
+
+from bofa_crawler.bank import Account, Transaction
+from bofa_crawler.parser import ACCOUNT_PARSERS
+from bofa_crawler.util import dollars_to_cents, parse_date, wait
+
+# Returns null until the title names the account, then a JSON string of
+# the balance text and, for each transaction row, whether it is pending
+# and the text of its description, amount, balance and date cells.
+EXTRACT_SCRIPT = """
+var spec = arguments[0];
+var title = document.querySelector(spec.title);
+if (!title || (title.textContent.indexOf(spec.name) < 0
+        && (title.innerText || "").indexOf(spec.name) < 0)) {
+    return null;
+}
+
+function text(node) {
+    return node ? node.textContent.trim() : null;
+}
+
+function findCell(row, cellClass) {
+    for (var i = 0; i < row.children.length; i++) {
+        var cell = row.children[i];
+        if (cell.tagName === "TD" && cell.classList.contains(cellClass)) {
+            return cell;
+        }
+    }
+    return null;
+}
+
+function description(cell) {
+    if (!cell) {
+        return null;
+    }
+    var match = cell.querySelector(spec.description);
+    if (spec.follows) {
+        return match ? text(match.nextSibling) : null;
+    }
+    return text(match || cell);
+}
+
+var rows = Array.prototype.map.call(
+    document.querySelectorAll(spec.rows),
+    function (row) {
+        return [
+            row.classList.contains(spec.pending),
+            description(findCell(row, spec.cells[0])),
+            text(findCell(row, spec.cells[1])),
+            text(findCell(row, spec.cells[2])),
+            text(findCell(row, spec.cells[3]))
+        ];
+    }
+);
+return JSON.stringify({
+    balance: text(document.querySelector(spec.balance)),
+    rows: rows
+});
+"""
+
+
+def get_extract_spec(account: Account, title_selector: str) -> dict:
+    """Get the `EXTRACT_SCRIPT` argument for pages of `account`."""
+    parser_class = ACCOUNT_PARSERS[account.account_type]
+    return {
+        "name": account.name,
+        "title": title_selector,
+        "rows": parser_class.row_selector,
+        "pending": parser_class.pending_row_class,
+        "balance": parser_class.balance_selector,
+        "description": parser_class.description_selector,
+        "follows": parser_class.description_follows_selector,
+        "cells": [
+            parser_class.description_cell_class,
+            parser_class.amount_cell_class,
+            parser_class.balance_cell_class,
+            parser_class.date_cell_class,
+        ],
+    }
+
+
+def extract_account(
+    browser: Firefox, account: Account, title_selector: str, timeout=10
+):
+    """Wait for the page of `account` and extract its transaction rows.
+
+    The title check and the extraction run in a single script, so each
+    poll is one WebDriver round trip. Returns the decoded data, or None
+    if the page did not show the account within `timeout` seconds.
+    """
+    spec = get_extract_spec(account, title_selector)
+
+    def condition(driver):
+        try:
+            return driver.execute_script(EXTRACT_SCRIPT, spec)
+        except WebDriverException:
+            return None
+
+    result = wait(browser, condition, timeout)
+    if not result:
+        return None
+
+    return json.loads(result)
+
+
+class ExtractedParser:
+    """Parse transactions from `extract_account` data instead of HTML."""
+
+    def __init__(self, account: Account, data: dict):
+        self.account = account
+        self.data = data
+        self.parser_class = ACCOUNT_PARSERS[account.account_type]
+
+    def get_balance(self):
+        """Retrieve account balance."""
+        pending_balance = None
+        if self.parser_class.pending_balance:
+            transaction = next(self.iter_transactions(), None)
+            if transaction and transaction.is_pending:
+                pending_balance = transaction.ending_balance
+
+        return pending_balance or _to_cents(self.data["balance"])
+
+    def get_transactions(self):
+        """Retrieve recent transactions."""
+        return list(self.iter_transactions())
+
+    def iter_transactions(self):
+        """Yield recent transactions one row at a time."""
+        for row in self.data["rows"]:
+            is_pending, description, amount, balance, date = row
+            yield Transaction(
+                description,
+                _to_cents(amount),
+                is_pending,
+                _to_cents(balance),
+                parse_date(date) if date else None,
+            )
+
+
+def _to_cents(text):
+    if text is None:
+        return None
+
+    return dollars_to_cents(text)
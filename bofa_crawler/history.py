@@ -0,0 +1,53 @@
+from collections import Counter
+from datetime import date
+
+from bofa_crawler.state import get_fingerprint
+
+# Returns the text of the date cells and the previous period link of a
+# detail page, so history crawls can decide where to go next without
+# waiting for the page to be parsed.
+PERIOD_SCRIPT = """
+var dates = Array.prototype.map.call(
+    document.querySelectorAll(arguments[0]),
+    function (cell) { return cell.textContent.trim(); }
+);
+var link = document.querySelector(arguments[1]);
+return [dates, link ? link.href : null];
+"""
+
+
+def merge_transactions(pages, start_date: date = None) -> list:
+    """Merge per-period transaction lists into one series.
+
+    `pages` are lists of transactions ordered newest period first.
+    Transactions repeated on overlapping pages are kept once, while
+    identical transactions within a single page are all kept. The result
+    is ordered newest first with undated (pending) transactions on top,
+    and transactions before `start_date` are dropped.
+    """
+    merged = []
+    emitted = Counter()
+    for transactions in pages:
+        seen = Counter()
+        for transaction in transactions:
+            fingerprint = get_fingerprint(transaction)
+            seen[fingerprint] += 1
+            if seen[fingerprint] > emitted[fingerprint]:
+                emitted[fingerprint] += 1
+                merged.append(transaction)
+
+    if start_date is not None:
+        merged = [
+            transaction
+            for transaction in merged
+            if transaction.date is None or transaction.date >= start_date
+        ]
+
+    merged.sort(key=_newest_first)
+    return merged
+
+
+def _newest_first(transaction):
+    if transaction.date is None:
+        return (0, 0)
+    return (1, -transaction.date.toordinal())
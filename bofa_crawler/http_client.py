@@ -0,0 +1,168 @@
+from email.utils import parsedate_to_datetime
+from http.cookies import SimpleCookie
+from time import time
+from urllib.parse import urljoin, urlsplit
+
+import urllib3
+from selenium.webdriver import Firefox
+
+
+class HttpFetchError(Exception):
+    """Raised when a page cannot be fetched over HTTP."""
+
+
+class HttpSession:
+    """Fetch pages over pooled keep-alive connections with browser cookies."""
+
+    def __init__(
+        self,
+        cookies: list = None,
+        user_agent: str = None,
+        maxsize: int = 4,
+        timeout: float = 10,
+        max_redirects: int = 5,
+    ):
+        headers = {"User-Agent": user_agent} if user_agent else {}
+        self.pool = urllib3.PoolManager(
+            maxsize=maxsize,
+            headers=headers,
+            timeout=urllib3.Timeout(total=timeout),
+            retries=False,
+        )
+        self.max_redirects = max_redirects
+        self.cookies = {}
+        for cookie in cookies or []:
+            self.set_cookie(cookie)
+
+    @classmethod
+    def from_browser(cls, browser: Firefox, **kwargs):
+        """Create a session sharing the cookies of a signed in `browser`."""
+        user_agent = browser.execute_script("return navigator.userAgent")
+        return cls(browser.get_cookies(), user_agent, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def set_cookie(self, cookie: dict):
+        """Add or replace a cookie given in webdriver `get_cookies` form.
+
+        A cookie whose `expiry` has passed removes the stored one instead.
+        """
+        domain = cookie.get("domain", "").lstrip(".").lower()
+        path = cookie.get("path") or "/"
+        key = (cookie["name"], domain, path)
+        if _is_expired(cookie):
+            self.cookies.pop(key, None)
+            return
+
+        self.cookies[key] = dict(cookie, domain=domain, path=path)
+
+    def get(self, url: str) -> str:
+        """Get the decoded body of `url`, following redirects."""
+        for _ in range(self.max_redirects + 1):
+            headers = {}
+            cookie_header = self._get_cookie_header(url)
+            if cookie_header:
+                headers["Cookie"] = cookie_header
+
+            try:
+                response = self.pool.request(
+                    "GET", url, headers=headers, redirect=False
+                )
+            except urllib3.exceptions.HTTPError as e:
+                raise HttpFetchError("GET '{}' failed: {}".format(url, e))
+
+            self._store_response_cookies(url, response)
+
+            location = response.get_redirect_location()
+            if location:
+                url = urljoin(url, location)
+                continue
+
+            if response.status >= 400:
+                raise HttpFetchError(
+                    "GET '{}' returned {}".format(url, response.status)
+                )
+
+            return self._decode(response)
+
+        raise HttpFetchError(
+            "Exceeded {} redirects for '{}'".format(self.max_redirects, url)
+        )
+
+    def close(self):
+        """Close all pooled connections."""
+        self.pool.clear()
+
+    def _get_cookie_header(self, url: str) -> str:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        path = parts.path or "/"
+        pairs = []
+        for cookie in self.cookies.values():
+            if _is_expired(cookie):
+                continue
+            domain = cookie["domain"]
+            if host != domain and not host.endswith("." + domain):
+                continue
+            if not path.startswith(cookie["path"]):
+                continue
+            if cookie.get("secure") and parts.scheme != "https":
+                continue
+            pairs.append("{}={}".format(cookie["name"], cookie["value"]))
+
+        return "; ".join(pairs)
+
+    def _store_response_cookies(self, url: str, response):
+        host = urlsplit(url).hostname or ""
+        for header in response.headers.getlist("Set-Cookie"):
+            parsed = SimpleCookie()
+            parsed.load(header)
+            for name, morsel in parsed.items():
+                cookie = {
+                    "name": name,
+                    "value": morsel.value,
+                    "domain": morsel["domain"] or host,
+                    "path": morsel["path"] or "/",
+                    "secure": bool(morsel["secure"]),
+                }
+                expiry = _get_expiry(morsel)
+                if expiry is not None:
+                    cookie["expiry"] = expiry
+                self.set_cookie(cookie)
+
+    def _decode(self, response) -> str:
+        content_type = response.headers.get("Content-Type", "")
+        charset = "utf-8"
+        for param in content_type.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "charset" and value:
+                charset = value.strip('"')
+
+        return response.data.decode(charset, errors="replace")
+
+
+def _get_expiry(morsel) -> float:
+    """Get when a response cookie expires, in seconds since the epoch."""
+    # Max-Age takes precedence over Expires
+    if morsel["max-age"]:
+        try:
+            return time() + int(morsel["max-age"])
+        except ValueError:
+            pass
+
+    if morsel["expires"]:
+        try:
+            return parsedate_to_datetime(morsel["expires"]).timestamp()
+        except (TypeError, ValueError):
+            pass
+
+    return None
+
+
+def _is_expired(cookie: dict) -> bool:
+    expiry = cookie.get("expiry")
+    return expiry is not None and expiry <= time()
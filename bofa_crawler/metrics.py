@@ -0,0 +1,150 @@
+import json
+import threading
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+class Metrics:
+    """Per-phase timings, observations and counters for crawls.
+
+    Each metric is recorded under a name and a set of string labels such
+    as `user` and `account`. Timings from `phase` are stored as the
+    observation `<name>_seconds`.
+    """
+
+    enabled = True
+
+    def __init__(self, namespace: str = "bofa_crawler", clock=perf_counter):
+        self.namespace = namespace
+        self.clock = clock
+        self._observations = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, **labels):
+        """Time the enclosed block as an observation of `name`."""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.observe(name + "_seconds", self.clock() - started, **labels)
+
+    def observe(self, name: str, value, **labels):
+        """Record a value such as a duration, page size or row count."""
+        key = (name, _freeze_labels(labels))
+        with self._lock:
+            stats = self._observations.get(key)
+            if stats is None:
+                self._observations[key] = [1, value, value]
+            else:
+                stats[0] += 1
+                stats[1] += value
+                stats[2] = max(stats[2], value)
+
+    def incr(self, name: str, value=1, **labels):
+        """Add `value` to the counter `name`."""
+        key = (name, _freeze_labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """Get all recorded metrics as plain data."""
+        with self._lock:
+            observations = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": count,
+                    "sum": total,
+                    "max": maximum,
+                }
+                for (name, labels), (count, total, maximum) in sorted(
+                    self._observations.items()
+                )
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+
+        return {"observations": observations, "counters": counters}
+
+    def to_json(self) -> str:
+        """Export recorded metrics as JSON."""
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self) -> str:
+        """Export recorded metrics in the Prometheus text format."""
+        snapshot = self.snapshot()
+        # Samples of a family must be contiguous, and summaries may only
+        # hold _count and _sum, so each max is a separate gauge family.
+        families = {}
+        for observation in snapshot["observations"]:
+            name = "{}_{}".format(self.namespace, observation["name"])
+            labels = _format_labels(observation["labels"])
+            summary = families.setdefault(name, ("summary", []))[1]
+            for suffix in ("count", "sum"):
+                summary.append(
+                    "{}_{}{} {}".format(
+                        name, suffix, labels, observation[suffix]
+                    )
+                )
+            families.setdefault(name + "_max", ("gauge", []))[1].append(
+                "{}_max{} {}".format(name, labels, observation["max"])
+            )
+
+        for counter in snapshot["counters"]:
+            name = "{}_{}_total".format(self.namespace, counter["name"])
+            labels = _format_labels(counter["labels"])
+            families.setdefault(name, ("counter", []))[1].append(
+                "{}{} {}".format(name, labels, counter["value"])
+            )
+
+        lines = []
+        for name, (kind, samples) in families.items():
+            lines.append("# TYPE {} {}".format(name, kind))
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics:
+    """Metrics that are not recorded, used when instrumentation is off."""
+
+    enabled = False
+    _phase = nullcontext()
+
+    def phase(self, name: str, **labels):
+        """Do nothing."""
+        return self._phase
+
+    def observe(self, name: str, value, **labels):
+        """Do nothing."""
+
+    def incr(self, name: str, value=1, **labels):
+        """Do nothing."""
+
+
+NULL_METRICS = NullMetrics()
+
+
+def _freeze_labels(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+
+    def escape(value):
+        return (
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+
+    return "{{{}}}".format(
+        ",".join(
+            '{}="{}"'.format(key, escape(value))
+            for key, value in labels.items()
+        )
+    )
@@ -1,33 +1,54 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
 
 from bs4 import BeautifulSoup
 from bs4.element import PageElement
 
 from bofa_crawler.bank import Account, Transaction
 from bofa_crawler.constants import SECURE_BASE_URL
-from bofa_crawler.util import dollars_to_cents, html_whitespace
+from bofa_crawler.util import dollars_to_cents, html_whitespace, parse_date
+
+DEFAULT_FEATURES = "html.parser"
+
+
+@lru_cache(maxsize=None)
+def get_fast_features() -> str:
+    """Get the fastest installed BeautifulSoup tree builder.
+
+    lxml is used when installed, e.g. with the `lxml` extra.
+    """
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return DEFAULT_FEATURES
+
+    return "lxml"
 
 
 class HtmlParser(ABC):
-    def __init__(self, page_source: str):
-        self.soup = BeautifulSoup(page_source, "html.parser")
+    def __init__(self, page_source: str, features: str = None):
+        self.soup = BeautifulSoup(page_source, features or get_fast_features())
 
 
 class AccountListParser(HtmlParser):
     """Get bank accounts from desired `accounts`."""
 
     def get_accounts(self, accounts):
-        """Get accounts."""
+        """Get accounts, stopping once every desired account is found."""
         user_accounts = []
+        remaining = set(accounts)
         account_item_elems = self.soup.select(".Accounts .AccountItem")
         for account_item_elem in account_item_elems:
             name_elem = account_item_elem.select_one(".AccountName > a")
             name = html_whitespace(name_elem.text) if name_elem else None
-            if name in accounts:
+            if name in remaining:
+                remaining.discard(name)
                 account_type = self._get_account_type(account_item_elem)
                 link = SECURE_BASE_URL + name_elem.get("href")
                 account = Account(name, account_type, link)
                 user_accounts.append(account)
+                if not remaining:
+                    break
 
         return user_accounts
 
@@ -43,8 +64,28 @@ class AccountListParser(HtmlParser):
 
 
 class AccountParser(HtmlParser, ABC):
-    def __init__(self, account: Account, page_source: str):
-        super().__init__(page_source)
+    pending_row_class: str
+    amount_cell_class: str
+    balance_cell_class: str
+    description_cell_class: str
+    date_cell_class: str
+    row_selector: str
+    balance_selector: str
+    # Whether a pending first row's ending balance is the account balance
+    pending_balance: bool = False
+    # Used by history crawls to read dates and find earlier periods
+    date_cell_selector: str
+    previous_period_selector: str
+    # Used by script extraction to read descriptions without BeautifulSoup:
+    # the text of the matched element, of the cell when nothing matches, or
+    # of the node after the match when `description_follows_selector` is set
+    description_selector: str
+    description_follows_selector: bool = False
+
+    def __init__(
+        self, account: Account, page_source: str, features: str = None
+    ):
+        super().__init__(page_source, features)
         self.account = account
 
     @abstractmethod
@@ -52,130 +93,127 @@ class AccountParser(HtmlParser, ABC):
         """Retrieve account balance."""
         pass
 
-    @abstractmethod
     def get_transactions(self):
         """Retrieve recent transactions."""
+        return list(self.iter_transactions())
+
+    @abstractmethod
+    def iter_transactions(self):
+        """Yield recent transactions one row at a time."""
         pass
 
+    def _parse_row(self, trans_row: PageElement):
+        """Read every field of a transaction row in one pass over its cells."""
+        is_pending = self.pending_row_class in trans_row["class"]
+        description = amount = ending_balance = transaction_date = None
+        for cell in trans_row.find_all("td", recursive=False):
+            cell_classes = cell.get("class") or []
+            if self.amount_cell_class in cell_classes:
+                amount = dollars_to_cents(cell.text)
+            elif self.balance_cell_class in cell_classes:
+                ending_balance = dollars_to_cents(cell.text)
+            elif self.description_cell_class in cell_classes:
+                description = self._get_transaction_description(cell)
+            elif self.date_cell_class in cell_classes:
+                transaction_date = parse_date(cell.text)
+
+        return Transaction(
+            description, amount, is_pending, ending_balance, transaction_date
+        )
 
-class CreditCardParser(AccountParser):
-    def __init__(self, account: Account, page_source: str):
-        super().__init__(account, page_source)
-        # Load transactions now because pending transactions are used
-        # for determining pending balance
-        self.transactions = self._get_transactions()
+    @abstractmethod
+    def _get_transaction_description(self, desc_cell: PageElement):
+        pass
 
-    def get_transactions(self):
-        """Retrieve recent transactions."""
-        return self.transactions
+
+class CreditCardParser(AccountParser):
+    pending_row_class = "trans-pending-row"
+    amount_cell_class = "trans-amount-cell"
+    balance_cell_class = "trans-balance-cell"
+    description_cell_class = "trans-desc-cell"
+    date_cell_class = "trans-date-cell"
+    row_selector = "table#transactions > tbody > tr"
+    balance_selector = ".summary-details-row .summary-acct-row .TL_NPI_L1"
+    pending_balance = True
+    date_cell_selector = "table#transactions > tbody > tr > td.trans-date-cell"
+    previous_period_selector = "a[name='prev_stmt_link']"
+    description_selector = ":scope > a > span"
+    description_follows_selector = True
 
     def get_balance(self):
         """Retrieve account balance."""
         pending_balance = self._get_pending_balance()
         return pending_balance or self._get_current_balance()
 
-    def _get_transactions(self):
-        transactions = []
-        trans_row_elems_selector = "table#transactions > tbody > tr"
-        trans_row_elems = self.soup.select(trans_row_elems_selector)
-        for trans_row in trans_row_elems:
-            is_pending = "trans-pending-row" in trans_row["class"]
-            amount = self._get_transaction_amount(trans_row)
-            description = self._get_transaction_description(trans_row)
-            ending_balance = self._get_transaction_ending_balance(trans_row)
-            transaction = Transaction(
-                description, amount, is_pending, ending_balance
-            )
-            transactions.append(transaction)
-
-        return transactions
-
-    def _get_transaction_amount(self, trans_row: PageElement):
-        selector = ".trans-amount-cell"
-        elem = trans_row.select_one(selector)
-        if elem:
-            return dollars_to_cents(elem.text)
+    def iter_transactions(self):
+        """Yield recent transactions one row at a time."""
+        for trans_row in self.soup.select(self.row_selector):
+            yield self._parse_row(trans_row)
 
-    def _get_transaction_description(self, trans_row: PageElement):
-        selector = ".trans-desc-cell > a > span"
-        elem = trans_row.select_one(selector).next_sibling
+    def _get_transaction_description(self, desc_cell: PageElement):
+        link = desc_cell.find("a", recursive=False)
+        span = link.find("span", recursive=False) if link else None
+        elem = span.next_sibling if span else None
         if elem:
             return elem.strip()
 
-    def _get_transaction_ending_balance(self, trans_row: PageElement):
-        selector = ".trans-balance-cell"
-        elem = trans_row.select_one(selector)
-        if elem:
-            return dollars_to_cents(elem.text)
-
     def _get_current_balance(self):
-        cur_bal_selector = ".summary-details-row .summary-acct-row .TL_NPI_L1"
-        cur_bal_elem = self.soup.select_one(cur_bal_selector)
+        cur_bal_elem = self.soup.select_one(self.balance_selector)
         if cur_bal_elem:
             return dollars_to_cents(cur_bal_elem.text)
 
     def _get_pending_balance(self):
-        if self.transactions:
-            transaction = self.transactions[0]
-            if transaction.is_pending:
-                return transaction.ending_balance
+        # Only the first row is needed; pending rows are listed first
+        transaction = next(self.iter_transactions(), None)
+        if transaction and transaction.is_pending:
+            return transaction.ending_balance
 
 
 class DepositParser(AccountParser):
+    pending_row_class = "in-transit-record"
+    amount_cell_class = "amount"
+    balance_cell_class = "balance"
+    description_cell_class = "description"
+    date_cell_class = "date-action"
+    row_selector = (
+        "table.transaction-records > tbody tr.record, "
+        "table.transaction-records > tbody tr.in-transit-record"
+    )
+    balance_selector = ".ad-acct-summary-module-deposit-skin .TL_NPI_Amt"
+    date_cell_selector = "table.transaction-records > tbody td.date-action"
+    previous_period_selector = "a[name='prev_trans_nav']"
+    description_selector = ".transTitleForEditDesc"
+
     def get_balance(self):
         """Retrieve account balance."""
-        balance_selector = ".ad-acct-summary-module-deposit-skin .TL_NPI_Amt"
-        balance_elem = self.soup.select_one(balance_selector)
+        balance_elem = self.soup.select_one(self.balance_selector)
         if balance_elem:
             return dollars_to_cents(balance_elem.text)
 
-    def get_transactions(self):
-        """Retrieve recent transactions."""
+    def iter_transactions(self):
+        """Yield recent transactions one row at a time."""
 
         def is_transaction(class_):
             return class_ in ["record", "in-transit-record"]
 
-        transactions = []
         trans_table = self.soup.select_one("table.transaction-records > tbody")
-        trans_row_elems = trans_table.find_all("tr", class_=is_transaction)
-        for trans_row in trans_row_elems:
-            is_pending = "in-transit-record" in trans_row["class"]
-            amount = self._get_transaction_amount(trans_row)
-            description = self._get_transaction_description(trans_row)
-            ending_balance = self._get_transaction_ending_balance(trans_row)
-            transaction = Transaction(
-                description, amount, is_pending, ending_balance
-            )
-            transactions.append(transaction)
-
-        return transactions
-
-    def _get_transaction_amount(self, trans_row: PageElement):
-        selector = "td.amount"
-        elem = trans_row.select_one(selector)
-        if elem:
-            return dollars_to_cents(elem.text)
-
-    def _get_transaction_description(self, trans_row: PageElement):
-        td_selector = "td.description"
-        cleared_desc_selector = ".transTitleForEditDesc"
-        td = trans_row.select_one(td_selector)
-        if td:
-            cleared_desc = td.select_one(cleared_desc_selector)
-            if cleared_desc:
-                return cleared_desc.text.strip()
-
-            return td.text.strip()
-
-    def _get_transaction_ending_balance(self, trans_row: PageElement):
-        selector = "td.balance"
-        elem = trans_row.select_one(selector)
-        if elem:
-            return dollars_to_cents(elem.text)
+        for trans_row in trans_table.find_all("tr", class_=is_transaction):
+            yield self._parse_row(trans_row)
 
+    def _get_transaction_description(self, desc_cell: PageElement):
+        cleared_desc = desc_cell.find(class_="transTitleForEditDesc")
+        if cleared_desc:
+            return cleared_desc.text.strip()
+
+        return desc_cell.text.strip()
 
-def get_account_parser(account: Account, page_source: str):
-    """Get parser instance for the account based on type."""
-    parsers = {"CreditCard": CreditCardParser, "Deposit": DepositParser}
 
-    return parsers[account.account_type](account, page_source)
+ACCOUNT_PARSERS = {"CreditCard": CreditCardParser, "Deposit": DepositParser}
+
+
+def get_account_parser(
+    account: Account, page_source: str, features: str = None
+):
+    """Get parser instance for the account based on type."""
+    parser_class = ACCOUNT_PARSERS[account.account_type]
+    return parser_class(account, page_source, features)
@@ -0,0 +1,88 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from bofa_crawler.bank import Account
+from bofa_crawler.cache import ParseCache, get_cache_key
+from bofa_crawler.parser import get_account_parser
+
+
+def parse_page(account: Account, page_source: str, features: str = None):
+    """Get `(balance, transactions)` of an account page.
+
+    Runs in worker processes, so the result is returned rather than set
+    on `account`, which is only a copy there.
+    """
+    parser = get_account_parser(account, page_source, features)
+    return parser.get_balance(), tuple(parser.iter_transactions())
+
+
+class ParsePipeline:
+    """Parse account pages in worker processes while browsers keep loading.
+
+    At most `max_pending` pages are queued or being parsed at once;
+    `submit` blocks until a slot frees up, so crawlers cannot outrun the
+    workers and hold every page in memory. A pipeline may be shared by
+    crawlers running in different threads.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        max_pending: int = None,
+        executor=None,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.max_workers
+        self._executor = executor or ProcessPoolExecutor(self.max_workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(
+        self,
+        account: Account,
+        page_source: str,
+        features: str = None,
+        cache: ParseCache = None,
+    ) -> Future:
+        """Queue a page for parsing, returning a future of its result.
+
+        The future resolves to `(balance, transactions)`. Pages found in
+        `cache` resolve immediately and parsed pages are added to it.
+        """
+        key = None
+        if cache:
+            key = get_cache_key(account.account_type, page_source)
+            result = cache.get(key)
+            if result is not None:
+                future = Future()
+                future.set_result(result)
+                return future
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(
+                parse_page, account, page_source, features
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        if key:
+
+            def remember(done: Future):
+                if not done.cancelled() and done.exception() is None:
+                    cache.set(key, done.result())
+
+            future.add_done_callback(remember)
+        return future
+
+    def close(self):
+        """Wait for queued pages and stop the workers."""
+        self._executor.shutdown(wait=True)
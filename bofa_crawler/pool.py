@@ -0,0 +1,306 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Firefox
+
+from bofa_crawler.bank import User
+from bofa_crawler.browser import (
+    get_browser,
+    get_browser_memory,
+    reset_browser,
+)
+from bofa_crawler.crawler import BofaCrawler
+
+
+class BrowserPool:
+    """A bounded set of browsers that are reused between users.
+
+    With `warm`, up to that many browsers are launched in the background
+    ahead of demand so `acquire` can return one immediately. Browsers are
+    quit rather than reused after `max_uses` crawls, or once their
+    processes use more than `max_memory` bytes, and are replaced in the
+    background.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        headless: bool = True,
+        disable_images: bool = False,
+        geckodriver_path: str = None,
+        lightweight: bool = False,
+        blocklist=None,
+        warm: int = 0,
+        max_uses: int = None,
+        max_memory: int = None,
+    ):
+        self.size = size
+        self.headless = headless
+        self.disable_images = disable_images
+        self.geckodriver_path = geckodriver_path
+        self.lightweight = lightweight
+        self.blocklist = blocklist
+        self.warm = min(warm, size)
+        self.max_uses = max_uses
+        self.max_memory = max_memory
+        self._idle = deque()
+        self._browsers: list[Firefox] = []
+        self._uses = {}
+        self._lock = threading.Lock()
+        # Signalled when a browser becomes idle or a slot frees up
+        self._available = threading.Condition(self._lock)
+        self._closed = False
+        self._warmer = None
+        if self.warm:
+            self._start_warming()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def acquire(self) -> Firefox:
+        """Get an idle browser, launching one if the pool is not full.
+
+        Blocks until a browser is released or a slot in the pool frees up.
+        """
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    browser = self._idle.popleft()
+                    break
+                if len(self._browsers) < self.size:
+                    self._browsers.append(None)
+                    browser = None
+                    break
+                self._available.wait()
+
+        if browser is None:
+            return self._launch()
+
+        if self.warm:
+            self._start_warming()
+        return browser
+
+    def release(self, browser: Firefox):
+        """Reset `browser` and return it to the pool."""
+        with self._lock:
+            uses = self._uses.get(id(browser), 0) + 1
+            self._uses[id(browser)] = uses
+
+        if self._should_recycle(browser, uses):
+            self.discard(browser)
+            return
+
+        try:
+            reset_browser(browser)
+        except WebDriverException:
+            self.discard(browser)
+            return
+
+        self._put_idle(browser)
+
+    def discard(self, browser: Firefox):
+        """Quit `browser` and free its slot in the pool."""
+        with self._lock:
+            if browser in self._browsers:
+                self._browsers.remove(browser)
+            self._uses.pop(id(browser), None)
+            self._available.notify()
+
+        try:
+            browser.quit()
+        except WebDriverException:
+            pass
+
+        if self.warm:
+            self._start_warming()
+
+    def warm_up(self):
+        """Launch browsers until `warm` are idle or the pool is full."""
+        while not self._closed and len(self._idle) < self.warm:
+            if not self._reserve():
+                return
+            try:
+                browser = self._launch()
+            except Exception:
+                return
+            self._put_idle(browser)
+
+    def close(self):
+        """Quit every browser launched by the pool."""
+        with self._lock:
+            self._closed = True
+            browsers = [b for b in self._browsers if b is not None]
+            self._browsers.clear()
+            self._idle.clear()
+            self._uses.clear()
+            self._available.notify_all()
+
+        for browser in browsers:
+            try:
+                browser.quit()
+            except WebDriverException:
+                pass
+
+    def _start_warming(self):
+        with self._lock:
+            if self._closed or (self._warmer and self._warmer.is_alive()):
+                return
+            self._warmer = threading.Thread(target=self.warm_up, daemon=True)
+            self._warmer.start()
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if len(self._browsers) >= self.size:
+                return False
+            # Reserve the slot before launching so other threads waiting
+            # on the lock do not overfill the pool.
+            self._browsers.append(None)
+            return True
+
+    def _launch(self) -> Firefox:
+        try:
+            browser = get_browser(
+                headless=self.headless,
+                disable_images=self.disable_images,
+                geckodriver_path=self.geckodriver_path,
+                lightweight=self.lightweight,
+                blocklist=self.blocklist,
+                template_profile=True,
+            )
+        except Exception:
+            with self._available:
+                if None in self._browsers:
+                    self._browsers.remove(None)
+                # Let a thread waiting in `acquire` launch in this slot
+                self._available.notify()
+            raise
+
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._browsers[self._browsers.index(None)] = browser
+
+        if closed:
+            try:
+                browser.quit()
+            except WebDriverException:
+                pass
+            raise RuntimeError("Browser pool is closed")
+
+        return browser
+
+    def _put_idle(self, browser: Firefox):
+        with self._available:
+            self._idle.append(browser)
+            self._available.notify()
+
+    def _should_recycle(self, browser: Firefox, uses: int) -> bool:
+        if self.max_uses and uses >= self.max_uses:
+            return True
+
+        if self.max_memory:
+            memory = get_browser_memory(browser)
+            return memory is not None and memory > self.max_memory
+
+        return False
+
+
+class CrawlResult:
+    """The outcome of crawling a user.
+
+    `errors` holds the errors of accounts that failed by name, and `error`
+    is the error that failed the whole user or else the first of those.
+    """
+
+    def __init__(self, user: User, error: Exception = None, errors=None):
+        self.user = user
+        self.errors = errors or {}
+        if error is None:
+            error = next(iter(self.errors.values()), None)
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the user was crawled successfully."""
+        return self.error is None
+
+    def __str__(self):
+        status = "ok" if self.ok else "failed: {!r}".format(self.error)
+        return "<CrawlResult {} {}>".format(self.user.online_id, status)
+
+
+class SignInFailedError(Exception):
+    """Raised when a pooled crawl could not sign the user in."""
+
+
+class CrawlerPool:
+    """Crawl many users concurrently across a pool of reusable browsers."""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        headless: bool = True,
+        disable_images: bool = False,
+        geckodriver_path: str = None,
+        lightweight: bool = False,
+        blocklist=None,
+        warm: int = 0,
+        max_uses: int = None,
+        max_memory: int = None,
+    ):
+        self.max_workers = max_workers
+        self.browser_pool = BrowserPool(
+            size=max_workers,
+            headless=headless,
+            disable_images=disable_images,
+            geckodriver_path=geckodriver_path,
+            lightweight=lightweight,
+            blocklist=blocklist,
+            warm=warm,
+            max_uses=max_uses,
+            max_memory=max_memory,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def crawl(self, jobs):
+        """Crawl `(user, accounts)` jobs, yielding results as they finish."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._crawl_user, user, accounts)
+                for user, accounts in jobs
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        """Quit all pooled browsers."""
+        self.browser_pool.close()
+
+    def _crawl_user(self, user: User, accounts: list) -> CrawlResult:
+        try:
+            browser = self.browser_pool.acquire()
+        except Exception as e:
+            return CrawlResult(user, e)
+
+        try:
+            crawler = BofaCrawler(user, accounts, browser=browser)
+            if not crawler.start():
+                raise SignInFailedError(user.online_id)
+        except Exception as e:
+            return CrawlResult(user, e)
+        finally:
+            self.browser_pool.release(browser)
+
+        return CrawlResult(user, errors=dict(crawler.errors))
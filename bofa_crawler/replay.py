@@ -0,0 +1,365 @@
+import gzip
+import hashlib
+import json
+from time import perf_counter, sleep
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    NoSuchWindowException,
+    WebDriverException,
+)
+from selenium.webdriver import Firefox
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+from bofa_crawler.parser import get_fast_features
+
+ARCHIVE_VERSION = 1
+
+
+def get_script_key(url: str, script: str, args) -> str:
+    """Get the key of a script result recorded on the page at `url`."""
+    key = json.dumps([url, script, list(args)], default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class CrawlArchive:
+    """Pages, navigations and script results recorded from a crawl.
+
+    Identical page snapshots are stored once. Archives are saved as
+    gzipped JSON.
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+        self.pages = {}
+        self.redirects = {}
+        self.transitions = {}
+        self.scripts = {}
+        self.timings = {}
+
+    @classmethod
+    def load(cls, path: str):
+        """Read an archive written by `save`."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != ARCHIVE_VERSION:
+            raise ValueError("Unsupported archive version")
+
+        archive = cls()
+        for name in (
+            "snapshots",
+            "pages",
+            "redirects",
+            "transitions",
+            "scripts",
+            "timings",
+        ):
+            setattr(archive, name, data[name])
+        return archive
+
+    def save(self, path: str):
+        """Write the archive to `path`."""
+        data = {
+            "version": ARCHIVE_VERSION,
+            "snapshots": self.snapshots,
+            "pages": self.pages,
+            "redirects": self.redirects,
+            "transitions": self.transitions,
+            "scripts": self.scripts,
+            "timings": self.timings,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    def add_navigation(self, url: str, landed_url: str, seconds: float):
+        """Record that loading `url` ended on `landed_url`."""
+        if landed_url != url:
+            self.redirects[url] = landed_url
+        self.timings[landed_url] = seconds
+
+    def add_transition(self, url: str, next_url: str):
+        """Record that the page at `url` moved to `next_url` by itself."""
+        self.transitions[url] = next_url
+
+    def add_page(self, url: str, page_source: str):
+        """Record the latest source of the page at `url`."""
+        digest = hashlib.sha1(page_source.encode("utf-8")).hexdigest()
+        self.snapshots.setdefault(digest, page_source)
+        self.pages[url] = digest
+
+    def add_script(self, url: str, script: str, args, result):
+        """Record the result of a script run on the page at `url`."""
+        try:
+            json.dumps(result)
+        except (TypeError, ValueError):
+            # Elements and other driver objects cannot be replayed
+            return
+        self.scripts[get_script_key(url, script, args)] = result
+
+    def get_page(self, url: str) -> str:
+        """Get the recorded source of the page at `url`, if any."""
+        digest = self.pages.get(url)
+        return self.snapshots[digest] if digest else None
+
+
+class RecordingBrowser:
+    """Wrap a webdriver, recording what a crawl sees into an archive.
+
+    Navigations, page sources and script results are recorded; every
+    other attribute is passed through to the wrapped `browser`.
+    """
+
+    def __init__(
+        self, browser: Firefox, archive: CrawlArchive = None, clock=perf_counter
+    ):
+        self.browser = browser
+        self.archive = archive or CrawlArchive()
+        self.clock = clock
+        self._url = None
+
+    def __getattr__(self, name):
+        return getattr(self.browser, name)
+
+    def get(self, url: str):
+        """Load `url`, recording where it lands and how long it took."""
+        started = self.clock()
+        self.browser.get(url)
+        seconds = self.clock() - started
+        self._url = self.browser.current_url
+        self.archive.add_navigation(url, self._url, seconds)
+        self._snapshot()
+
+    @property
+    def page_source(self) -> str:
+        """Get and record the source of the current page."""
+        self._sync_url()
+        page_source = self.browser.page_source
+        self.archive.add_page(self._url, page_source)
+        return page_source
+
+    def execute_script(self, script: str, *args):
+        """Run `script`, recording its result."""
+        self._sync_url()
+        result = self.browser.execute_script(script, *args)
+        self.archive.add_script(self._url, script, args, result)
+        return result
+
+    def find_element(self, by=By.ID, value=None):
+        """Find an element, first recording any change of page."""
+        self._sync_url()
+        return self.browser.find_element(by, value)
+
+    def save(self, path: str):
+        """Write the recording to `path`."""
+        self.archive.save(path)
+
+    def _sync_url(self):
+        url = self.browser.current_url
+        if url == self._url:
+            return
+
+        if self._url is not None:
+            self.archive.add_transition(self._url, url)
+        self._url = url
+        self._snapshot()
+
+    def _snapshot(self):
+        self.archive.add_page(self._url, self.browser.page_source)
+
+
+class ReplayElement:
+    """An element of a replayed page, backed by BeautifulSoup."""
+
+    def __init__(self, browser, tag):
+        self.browser = browser
+        self.tag = tag
+
+    @property
+    def text(self) -> str:
+        """Get the text of the element."""
+        return self.tag.get_text()
+
+    def get_attribute(self, name: str):
+        """Get an attribute, or the text for `innerText`."""
+        if name in ("innerText", "textContent"):
+            return self.text
+        value = self.tag.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def is_displayed(self) -> bool:
+        """Treat every recorded element as visible."""
+        return True
+
+    def is_enabled(self) -> bool:
+        """Treat every recorded element as enabled."""
+        return True
+
+    def send_keys(self, *keys):
+        """Follow the recorded transition when RETURN is sent."""
+        if Keys.RETURN in "".join(keys):
+            self.browser._follow_transition()
+
+    def click(self):
+        """Follow the recorded transition of the page."""
+        self.browser._follow_transition()
+
+    def clear(self):
+        """Do nothing."""
+
+
+class _SwitchTo:
+    def __init__(self, browser):
+        self.browser = browser
+
+    def window(self, handle: str):
+        """Switch to the tab `handle`."""
+        if handle not in self.browser._windows:
+            raise NoSuchWindowException(handle)
+        self.browser.current_window_handle = handle
+
+
+class ReplayBrowser:
+    """A webdriver stand-in that serves a `CrawlArchive`.
+
+    Pages load instantly by default. With `latency`, each navigation
+    sleeps that many seconds; with `recorded_latency`, it sleeps as long
+    as the recorded load took. Element lookups are answered from the
+    recorded page source, and script results are replayed for the page
+    they were recorded on.
+    """
+
+    def __init__(
+        self,
+        archive: CrawlArchive,
+        latency: float = 0,
+        recorded_latency: bool = False,
+        features: str = None,
+        sleep=sleep,
+    ):
+        self.archive = archive
+        self.latency = latency
+        self.recorded_latency = recorded_latency
+        self.features = features or get_fast_features()
+        self.sleep = sleep
+        self.switch_to = _SwitchTo(self)
+        self.current_window_handle = "0"
+        self._windows = {"0": "about:blank"}
+        self._next_handle = 1
+        self._soups = {}
+
+    @property
+    def current_url(self) -> str:
+        """Get the URL of the current tab."""
+        return self._windows[self.current_window_handle]
+
+    @property
+    def window_handles(self) -> list:
+        """Get the handles of open tabs."""
+        return list(self._windows)
+
+    @property
+    def page_source(self) -> str:
+        """Get the recorded source of the current page."""
+        return self.archive.get_page(self.current_url) or ""
+
+    @property
+    def title(self) -> str:
+        """Get the title of the current page."""
+        title = self._get_soup().title
+        return title.get_text() if title else ""
+
+    def get(self, url: str):
+        """Load the recorded page for `url`."""
+        url = self.archive.redirects.get(url, url)
+        if self.archive.get_page(url) is None and url != "about:blank":
+            raise WebDriverException("No recording of '{}'".format(url))
+
+        delay = self.latency
+        if self.recorded_latency:
+            delay = self.archive.timings.get(url, delay)
+        if delay:
+            self.sleep(delay)
+
+        self._windows[self.current_window_handle] = url
+
+    def execute_script(self, script: str, *args):
+        """Replay the recorded result of `script` on the current page."""
+        # Opening a tab must happen whatever result was recorded for it
+        if script.startswith("window.open("):
+            handle = str(self._next_handle)
+            self._next_handle += 1
+            self._windows[handle] = "about:blank"
+            previous_handle = self.current_window_handle
+            self.current_window_handle = handle
+            self.get(args[0])
+            self.current_window_handle = previous_handle
+            return None
+
+        key = get_script_key(self.current_url, script, args)
+        if key in self.archive.scripts:
+            return self.archive.scripts[key]
+
+        if script == "return window.location.href":
+            return self.current_url
+        elif script == "return document.readyState":
+            return "complete"
+
+        return None
+
+    def find_element(self, by=By.ID, value=None):
+        """Find the first element matching the locator on the page."""
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException("{}={}".format(by, value))
+        return elements[0]
+
+    def find_elements(self, by=By.ID, value=None) -> list:
+        """Find elements matching the locator on the page."""
+        if by == By.ID:
+            selector = "#" + value
+        elif by == By.CLASS_NAME:
+            selector = "." + value
+        elif by == By.CSS_SELECTOR:
+            selector = value
+        else:
+            raise WebDriverException("Replay cannot find elements by " + by)
+
+        return [
+            ReplayElement(self, tag)
+            for tag in self._get_soup().select(selector)
+        ]
+
+    def close(self):
+        """Close the current tab."""
+        del self._windows[self.current_window_handle]
+
+    def quit(self):
+        """Close every tab."""
+        self._windows.clear()
+
+    def get_cookies(self) -> list:
+        """Get no cookies, as none are recorded."""
+        return []
+
+    def add_cookie(self, cookie: dict):
+        """Ignore `cookie`."""
+
+    def delete_all_cookies(self):
+        """Do nothing."""
+
+    def _get_soup(self):
+        page_source = self.page_source
+        soup = self._soups.get(page_source)
+        if soup is None:
+            soup = self._soups[page_source] = BeautifulSoup(
+                page_source, self.features
+            )
+        return soup
+
+    def _follow_transition(self):
+        next_url = self.archive.transitions.get(self.current_url)
+        if next_url:
+            self.get(next_url)
@@ -0,0 +1,195 @@
+from collections import Counter
+from time import monotonic, sleep
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from bofa_crawler.bank import User
+from bofa_crawler.crawler import MAINTENANCE, BofaCrawler, SignInError
+from bofa_crawler.http_client import HttpFetchError
+from bofa_crawler.pool import CrawlResult, SignInFailedError
+from bofa_crawler.state import StateStore
+from bofa_crawler.util import RetryPolicy
+
+TIMEOUT = "timeout"
+AUTH = "auth"
+PARSE = "parse"
+
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_RETRY_POLICIES = {
+    # Slow or unreachable pages usually recover after a short wait
+    TIMEOUT: RetryPolicy(
+        max_retries=3, base_delay=5, max_delay=60, deadline=900
+    ),
+    # Repeated sign in failures can lock the user out, so retry once
+    AUTH: RetryPolicy(max_retries=1, base_delay=30, max_delay=30, deadline=900),
+    # Unexpected markup rarely changes between attempts
+    PARSE: RetryPolicy(max_retries=1, base_delay=1, max_delay=1, deadline=900),
+}
+
+
+def classify_error(error: Exception) -> str:
+    """Get whether `error` is a timeout, auth or parse failure."""
+    if isinstance(error, SignInFailedError):
+        return AUTH
+
+    if isinstance(error, SignInError):
+        # Maintenance pages go away on their own, unlike a rejected sign in
+        return TIMEOUT if error.outcome == MAINTENANCE else AUTH
+
+    # Socket timeouts and connection errors are OSErrors
+    transient = (TimeoutException, WebDriverException, HttpFetchError, OSError)
+    if isinstance(error, transient):
+        return TIMEOUT
+
+    return PARSE
+
+
+def get_sign_in_error(user: User, crawler) -> Exception:
+    """Get the error to report for a crawler that did not sign in."""
+    error = crawler.sign_in_error
+    if error is not None and classify_error(error) == TIMEOUT:
+        return error
+
+    sign_in_error = SignInFailedError(user.online_id)
+    sign_in_error.__cause__ = error
+    return sign_in_error
+
+
+def run_crawler(crawler_factory, user: User, accounts: list, **crawler_kwargs):
+    """Create a crawler for `accounts` of `user`, start it and end it.
+
+    Returns the crawler, or None if it could not be created, and an error
+    that failed the whole user, if any. Per-account errors are left in
+    the crawler's `errors`.
+    """
+    crawler = None
+    try:
+        # Creating a crawler launches a browser, which can fail too
+        crawler = crawler_factory(user, accounts, **crawler_kwargs)
+        if not crawler.start():
+            return crawler, get_sign_in_error(user, crawler)
+    except Exception as e:
+        return crawler, e
+    finally:
+        if crawler is not None:
+            try:
+                crawler.end()
+            except Exception:
+                pass
+
+    return crawler, None
+
+
+def get_account_unit(user: User, account_name: str) -> str:
+    """Get the checkpoint unit of one account of `user`."""
+    return "{}:{}".format(user.online_id, account_name)
+
+
+class CrawlScheduler:
+    """Crawl users and their accounts as resumable units of work.
+
+    The status of each user and account is checkpointed in `state_store`
+    under `run_id`, so running the same jobs again after an interruption
+    skips finished units. A failed unit is retried with the policy for its
+    failure class from `retry_policies`; when only some accounts of a user
+    fail, only those accounts are crawled again.
+
+    Crawlers are created with `crawler_factory(user, accounts,
+    **crawler_kwargs)` and ended after each attempt.
+    """
+
+    def __init__(
+        self,
+        state_store: StateStore,
+        run_id: str,
+        retry_policies: dict = None,
+        crawler_factory=BofaCrawler,
+        clock=monotonic,
+        sleep=sleep,
+        **crawler_kwargs,
+    ):
+        self.state_store = state_store
+        self.run_id = run_id
+        self.retry_policies = {
+            **DEFAULT_RETRY_POLICIES,
+            **(retry_policies or {}),
+        }
+        self.crawler_factory = crawler_factory
+        self.clock = clock
+        self.sleep = sleep
+        self.crawler_kwargs = crawler_kwargs
+
+    def run(self, jobs):
+        """Crawl `(user, accounts)` jobs, yielding a result for each user."""
+        for user, accounts in jobs:
+            yield self.crawl_user(user, accounts)
+
+    def crawl_user(self, user: User, accounts: list) -> CrawlResult:
+        """Crawl the unfinished accounts of `user`, retrying failures."""
+        checkpoints = self.state_store.get_checkpoints(self.run_id)
+        if checkpoints.get(user.online_id) == DONE:
+            return CrawlResult(user)
+
+        pending = [
+            name
+            for name in accounts
+            if checkpoints.get(get_account_unit(user, name)) != DONE
+        ]
+        attempts = Counter()
+        started = self.clock()
+        while pending:
+            error, failed = self._attempt(user, pending)
+            if error is None and not failed:
+                break
+
+            if error is None:
+                pending = list(failed)
+                error = failed[pending[0]]
+
+            kind = classify_error(error)
+            policy = self.retry_policies[kind]
+            delay = policy.get_delay(attempts[kind])
+            elapsed = self.clock() - started
+            if not policy.should_retry(attempts[kind], elapsed, delay):
+                self.state_store.set_checkpoint(
+                    self.run_id, user.online_id, FAILED, repr(error)
+                )
+                return CrawlResult(user, error)
+
+            attempts[kind] += 1
+            self.sleep(delay)
+
+        self.state_store.set_checkpoint(self.run_id, user.online_id, DONE)
+        return CrawlResult(user)
+
+    def _attempt(self, user: User, pending: list):
+        """Crawl `pending` accounts once.
+
+        Returns an error that failed the whole user, if any, and the
+        errors of individual accounts by name.
+        """
+        # Drop accounts left over from a failed attempt before re-adding
+        user.accounts[:] = [a for a in user.accounts if a.name not in pending]
+        crawler, error = run_crawler(
+            self.crawler_factory, user, pending, **self.crawler_kwargs
+        )
+        if error is not None:
+            return error, {}
+
+        found = {account.name for account in user.accounts}
+        failed = {}
+        for name in pending:
+            error = crawler.errors.get(name)
+            if error is None and name not in found:
+                # Renamed accounts or an overview that did not load
+                error = LookupError("Account '{}' was not found".format(name))
+            if error is None:
+                self.state_store.set_checkpoint(
+                    self.run_id, get_account_unit(user, name), DONE
+                )
+            else:
+                failed[name] = error
+
+        return None, failed
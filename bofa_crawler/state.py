@@ -0,0 +1,204 @@
+import hashlib
+import sqlite3
+import threading
+from collections import Counter
+
+from bofa_crawler.bank import Account, Transaction, User
+
+
+def get_fingerprint(transaction: Transaction) -> str:
+    """Get a stable identifier for the contents of `transaction`."""
+    fields = [
+        transaction.description,
+        transaction.amount,
+        transaction.ending_balance,
+    ]
+    if transaction.date is not None:
+        fields.append(transaction.date.isoformat())
+    key = "\x1f".join("" if field is None else str(field) for field in fields)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def get_account_key(user: User, account: Account) -> str:
+    """Get the key under which state for a user's account is stored."""
+    return "{}:{}".format(user.online_id, account.name)
+
+
+class TransactionChange:
+    NEW = "new"
+    POSTED = "posted"
+    PENDING = "pending"
+
+    def __init__(self, kind: str, transaction: Transaction):
+        self.kind = kind
+        self.transaction = transaction
+
+    def __repr__(self):
+        return "TransactionChange({!r}, {!r})".format(
+            self.kind, self.transaction
+        )
+
+
+class StateStore:
+    """SQLite backed crawl state shared between runs."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS watermarks (
+                    account_key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pending (
+                    account_key TEXT NOT NULL,
+                    description TEXT,
+                    amount INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS pending_account
+                    ON pending (account_key);
+                CREATE TABLE IF NOT EXISTS accounts (
+                    online_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    account_type TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    PRIMARY KEY (online_id, name)
+                );
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    run_id TEXT NOT NULL,
+                    unit TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    PRIMARY KEY (run_id, unit)
+                );
+                """)
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def get_watermark(self, account_key: str) -> str:
+        """Get the fingerprint of the newest cleared transaction seen."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT fingerprint FROM watermarks WHERE account_key = ?",
+                (account_key,),
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def update_account(self, account_key: str, transactions) -> list:
+        """Record `transactions`, returning what changed since the last run.
+
+        `transactions` is consumed newest first and only until the cleared
+        transaction matching the stored watermark, so it should be a lazy
+        iterator such as `AccountParser.iter_transactions()`.
+        """
+        watermark = self.get_watermark(account_key)
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT description, amount FROM pending WHERE account_key = ?",
+                (account_key,),
+            ).fetchall()
+        previously_pending = Counter(rows)
+        unposted = Counter(rows)
+
+        changes = []
+        pending = []
+        newest_cleared = None
+        for transaction in transactions:
+            key = (transaction.description, transaction.amount)
+            if transaction.is_pending:
+                pending.append(key)
+                if previously_pending[key]:
+                    previously_pending[key] -= 1
+                else:
+                    changes.append(
+                        TransactionChange(
+                            TransactionChange.PENDING, transaction
+                        )
+                    )
+                continue
+
+            fingerprint = get_fingerprint(transaction)
+            if fingerprint == watermark:
+                break
+
+            newest_cleared = newest_cleared or fingerprint
+            if unposted[key]:
+                unposted[key] -= 1
+                kind = TransactionChange.POSTED
+            else:
+                kind = TransactionChange.NEW
+            changes.append(TransactionChange(kind, transaction))
+
+        with self._lock, self.connection:
+            if newest_cleared:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO watermarks VALUES (?, ?)",
+                    (account_key, newest_cleared),
+                )
+            self.connection.execute(
+                "DELETE FROM pending WHERE account_key = ?", (account_key,)
+            )
+            self.connection.executemany(
+                "INSERT INTO pending VALUES (?, ?, ?)",
+                [(account_key, *key) for key in pending],
+            )
+
+        return changes
+
+    def get_accounts(self, online_id: str) -> dict:
+        """Get the accounts discovered for a user, by name."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT name, account_type, link FROM accounts "
+                "WHERE online_id = ?",
+                (online_id,),
+            ).fetchall()
+
+        return {name: Account(name, type_, link) for name, type_, link in rows}
+
+    def set_accounts(self, online_id: str, accounts: list):
+        """Remember the type and link of each of a user's `accounts`."""
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        online_id,
+                        account.name,
+                        account.account_type,
+                        account.link,
+                    )
+                    for account in accounts
+                ],
+            )
+
+    def get_checkpoints(self, run_id: str) -> dict:
+        """Get the status of each unit of work recorded for `run_id`."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT unit, status FROM checkpoints WHERE run_id = ?",
+                (run_id,),
+            ).fetchall()
+
+        return dict(rows)
+
+    def set_checkpoint(
+        self, run_id: str, unit: str, status: str, error: str = None
+    ):
+        """Record the status of a unit of work of `run_id`."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+                (run_id, unit, status, error),
+            )
+
+    def clear_checkpoints(self, run_id: str):
+        """Forget the progress of `run_id` so it can be run again."""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM checkpoints WHERE run_id = ?", (run_id,)
+            )
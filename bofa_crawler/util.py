@@ -1,7 +1,14 @@
+import random
 import re
-from time import sleep
+from datetime import date, datetime
+from time import monotonic, sleep
 
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver import Firefox
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as ec
@@ -21,24 +28,109 @@ def get_current_url(browser: Firefox):
             return None
 
 
-def navigate(browser: Firefox, link: str):
-    """Navigates to `link` if `link` does not match current url."""
+PAGE_LOAD_TIME_SCRIPT = """
+var entry = performance.getEntriesByType("navigation")[0];
+if (entry) return entry.loadEventEnd ? entry.loadEventEnd - entry.startTime : null;
+var timing = performance.timing;
+return timing.loadEventEnd ? timing.loadEventEnd - timing.navigationStart : null;
+"""
+
+
+def get_page_load_time(browser: Firefox) -> float:
+    """Get seconds taken to load the current page, or None if unknown."""
+    try:
+        milliseconds = browser.execute_script(PAGE_LOAD_TIME_SCRIPT)
+    except WebDriverException:
+        return None
+
+    if not isinstance(milliseconds, (int, float)) or milliseconds <= 0:
+        return None
+
+    return milliseconds / 1000
+
+
+# Default seconds between checks of a waited condition, as in WebDriverWait
+POLL_FREQUENCY = 0.5
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter, bounded by retries and a deadline.
+
+    The `deadline` counts all seconds since the first attempt, including
+    time spent in the failed attempts, and is unbounded when None.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 7,
+        base_delay: float = 0.5,
+        max_delay: float = 8,
+        jitter: float = 0.5,
+        deadline: float = None,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+
+    def get_delay(self, attempt: int) -> float:
+        """Get seconds to wait before retrying after `attempt` failures."""
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return delay * (1 - self.jitter * random.random())
+
+    def should_retry(self, attempt: int, elapsed: float, delay: float):
+        """Whether another attempt fits within the retry and time budget."""
+        if attempt >= self.max_retries:
+            return False
+
+        return self.deadline is None or elapsed + delay <= self.deadline
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def is_current_url(browser: Firefox, link: str) -> bool:
+    """Whether `link` matches the url of the loaded webpage."""
     current_url = get_current_url(browser)
-    total_timeouts = 0
+    if current_url is None:
+        return False
 
-    if current_url is not None and current_url.endswith("/"):
+    if current_url.endswith("/"):
         current_url = current_url[:-1]
 
     link_compare = link[:-1] if link.endswith("/") else link
+    return current_url == link_compare
+
 
-    if current_url is None or current_url != link_compare:
+def navigate(
+    browser: Firefox,
+    link: str,
+    retry_policy: RetryPolicy = None,
+    ready_selector: str = None,
+    ready_timeout: int = 10,
+):
+    """Navigates to `link` if `link` does not match current url.
+
+    Page loads that time out are retried according to `retry_policy`.
+    Once loaded, waits for the document to be ready and, if given, for
+    `ready_selector` to be visible. Returns the number of retries.
+    """
+    retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+    total_timeouts = 0
+
+    if not is_current_url(browser, link):
+        started = monotonic()
         while True:
             try:
                 browser.get(link)
-                sleep(2)
                 break
             except TimeoutException as e:
-                if total_timeouts >= 7:
+                delay = retry_policy.get_delay(total_timeouts)
+                elapsed = monotonic() - started
+                if not retry_policy.should_retry(
+                    total_timeouts, elapsed, delay
+                ):
                     raise TimeoutException(
                         "Retried {} times to GET '{}' webpage "
                         "but failed out of a timeout!\n\t{}".format(
@@ -49,13 +141,26 @@ def navigate(browser: Firefox, link: str):
                     )
 
                 total_timeouts += 1
-                sleep(2)
+                sleep(delay)
+
+        wait_until(browser, None, "PFL", ready_timeout)
+        if ready_selector:
+            wait_until(browser, ready_selector, "VOEL", ready_timeout)
 
+    return total_timeouts
 
-def wait(browser: Firefox, condition, timeout: int = 10):
+
+def wait(
+    browser: Firefox,
+    condition,
+    timeout: int = 10,
+    poll_frequency: float = POLL_FREQUENCY,
+):
     """Wait a maximum of `timeout` seconds until condition is met."""
     try:
-        result = WebDriverWait(browser, timeout).until(condition)
+        result = WebDriverWait(browser, timeout, poll_frequency).until(
+            condition
+        )
     except TimeoutException:
         return False
 
@@ -67,17 +172,63 @@ def wait_until(
     ec_params,
     condition_type: str = "POEL",
     timeout: int = 10,
+    poll_frequency: float = POLL_FREQUENCY,
 ):
     """Wait a maximum of `timeout` seconds until condition is met."""
+    condition = get_condition(ec_params, condition_type)
+    return wait(browser, condition, timeout, poll_frequency)
+
+
+def wait_for_any(
+    browser: Firefox,
+    conditions: dict,
+    timeout: float = 10,
+    poll_frequency: float = 0.1,
+):
+    """Wait until the first of several labelled conditions is met.
+
+    Returns `(label, result)` of the matching condition, or
+    `(None, False)` after `timeout` seconds.
+    """
+    condition = get_any_condition(conditions)
+    return wait(browser, condition, timeout, poll_frequency) or (None, False)
+
+
+def get_any_condition(conditions: dict):
+    """Get a condition met when any of the labelled `conditions` is.
+
+    `conditions` maps labels to `(ec_params, condition_type)` pairs, as
+    accepted by `get_condition`, or to callables taking the browser. All
+    are checked on each poll, in order, and the condition returns
+    `(label, result)` of the first to match.
+    """
+    checks = [
+        (label, spec if callable(spec) else get_condition(*spec))
+        for label, spec in conditions.items()
+    ]
+
+    def condition(driver):
+        for label, check in checks:
+            try:
+                result = check(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                continue
+            if result:
+                return label, result
+        return False
+
+    return condition
+
+
+def get_condition(ec_params, condition_type: str = "POEL"):
+    """Get the expected condition described by `condition_type`."""
 
     def get_locator_from_ec_params(ec_params):
         elem_address, find_method = ec_params
         find_by = (
             By.XPATH
             if find_method == "XPath"
-            else By.CLASS_NAME
-            if find_method == "CLASS"
-            else By.CSS_SELECTOR
+            else By.CLASS_NAME if find_method == "CLASS" else By.CSS_SELECTOR
         )
         return (find_by, elem_address)
 
@@ -113,15 +264,77 @@ def wait_until(
         locator = get_locator_from_ec_params((selector, by))
         condition = text_to_be_present_in_element(locator, search)
 
-    return wait(browser, condition, timeout)
+    return condition
+
+
+AMOUNT_RE = re.compile(
+    r"""
+    \s*(?P<open>\()?
+    \s*(?P<sign>[-+])?\s*\$?\s*(?P<inner_sign>-)?
+    (?P<dollars>\d[\d,]*)?(?:\.(?P<cents>\d*))?
+    \s*(?P<close>\))?
+    \s*(?P<suffix>CR|DR)?\s*
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+# Matches the common "-$1,234.56" form so it can skip the general pattern
+SIMPLE_AMOUNT_RE = re.compile(r"\s*(-?)\$?([\d,]+)\.(\d\d)\s*")
+LEGACY_AMOUNT_CHARS_RE = re.compile("[^0-9-.]")
+
+
+def parse_amount(text: str) -> int:
+    """Parse an amount such as "-$1,234.56" into exact integer cents.
+
+    Negatives may be written with a leading "-", in parentheses, or with
+    a "DR" (debit) suffix; a "CR" (credit) suffix is positive. Digits
+    past the cents place are truncated.
+    """
+    simple = SIMPLE_AMOUNT_RE.fullmatch(text)
+    if simple:
+        sign, dollars, cents = simple.groups()
+        return int(sign + dollars.replace(",", "") + cents)
+
+    match = AMOUNT_RE.fullmatch(text)
+    has_digits = match and (match["dollars"] or match["cents"])
+    if not has_digits or bool(match["open"]) != bool(match["close"]):
+        raise ValueError("Invalid amount: {!r}".format(text))
+
+    dollars = match["dollars"]
+    cents = (match["cents"] or "")[:2]
+    value = int(dollars.replace(",", "")) * 100 if dollars else 0
+    if cents:
+        value += int(cents) * (10 if len(cents) == 1 else 1)
+
+    is_debit = (match["suffix"] or "").upper() == "DR"
+    negative = any(
+        (match["sign"] == "-", match["inner_sign"], match["open"], is_debit)
+    )
+    return -value if negative else value
 
 
 def dollars_to_cents(dollars) -> int:
     """Convert dollars to cents."""
     if isinstance(dollars, str):
-        dollars = re.sub("[^0-9-.]", "", dollars)
+        try:
+            return parse_amount(dollars)
+        except ValueError:
+            # Fall back to ignoring any stray text around the amount
+            return parse_amount(LEGACY_AMOUNT_CHARS_RE.sub("", dollars))
+
+    return round(dollars * 100)
+
 
-    return int(float(dollars) * 100)
+def parse_amounts(cells) -> list:
+    """Convert a column of amount cell strings to cents."""
+    return list(map(dollars_to_cents, cells))
+
+
+def parse_date(text: str) -> date:
+    """Parse a "MM/DD/YYYY" date, or return None if `text` is not a date."""
+    try:
+        return datetime.strptime(text.strip(), "%m/%d/%Y").date()
+    except ValueError:
+        return None
 
 
 def html_whitespace(text: str) -> str:
@@ -0,0 +1,14 @@
+from pathlib import Path
+
+import pytest
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text()
+
+
+@pytest.fixture
+def fixture_html():
+    return read_fixture
@@ -0,0 +1,219 @@
+import asyncio
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver import Firefox
+
+from bofa_crawler.aio import (
+    AsyncBofaCrawler,
+    async_navigate,
+    async_wait,
+    async_wait_for_any,
+    async_wait_until,
+)
+from bofa_crawler.bank import Account, User
+from bofa_crawler.crawler import BAD_CREDENTIALS, SIGNED_IN
+from bofa_crawler.metrics import Metrics
+from bofa_crawler.util import RetryPolicy
+
+
+def test_async_wait_polls_until_condition_met():
+    condition = Mock(side_effect=[False, NoSuchElementException, "done"])
+    result = asyncio.run(
+        async_wait(Mock(), condition, timeout=1, poll_frequency=0)
+    )
+
+    assert result == "done"
+    assert condition.call_count == 3
+
+
+def test_async_wait_times_out():
+    condition = Mock(return_value=False)
+    result = asyncio.run(
+        async_wait(Mock(), condition, timeout=0.05, poll_frequency=0.01)
+    )
+
+    assert result is False
+    assert condition.call_count > 1
+
+
+def test_async_waits_run_concurrently():
+    async def wait_all():
+        return await asyncio.gather(
+            *[
+                async_wait(Mock(), Mock(return_value=False), 0.2, 0.05)
+                for _ in range(20)
+            ]
+        )
+
+    loop = asyncio.new_event_loop()
+    started = loop.time()
+    assert loop.run_until_complete(wait_all()) == [False] * 20
+    assert loop.time() - started < 1
+    loop.close()
+
+
+def test_async_wait_until_uses_condition_type():
+    browser = MagicMock(spec_set=Firefox)
+    browser.execute_script.return_value = "complete"
+    assert asyncio.run(async_wait_until(browser, None, "PFL"))
+
+
+def test_async_wait_for_any():
+    conditions = {"a": Mock(return_value=False), "b": Mock(return_value="b")}
+    assert asyncio.run(async_wait_for_any(Mock(), conditions)) == ("b", "b")
+
+    conditions = {"a": Mock(return_value=False)}
+    assert asyncio.run(
+        async_wait_for_any(Mock(), conditions, timeout=0.05, poll_frequency=0)
+    ) == (None, False)
+
+
+def test_async_navigate_retries_timeouts(mocker):
+    mocker.patch("bofa_crawler.aio.is_current_url", return_value=False)
+    wait_until = mocker.patch("bofa_crawler.aio.async_wait_until")
+    browser = MagicMock(spec_set=Firefox)
+    browser.get.side_effect = [TimeoutException, None]
+    policy = RetryPolicy(base_delay=0, jitter=0)
+
+    asyncio.run(async_navigate(browser, "link", policy))
+
+    assert browser.get.call_count == 2
+    wait_until.assert_awaited_once_with(browser, None, "PFL", 10)
+
+
+def test_async_navigate_raises_after_retries(mocker):
+    mocker.patch("bofa_crawler.aio.is_current_url", return_value=False)
+    browser = MagicMock(spec_set=Firefox)
+    browser.get.side_effect = TimeoutException
+    policy = RetryPolicy(max_retries=2, base_delay=0, jitter=0)
+
+    with pytest.raises(TimeoutException, match="Retried 2 times"):
+        asyncio.run(async_navigate(browser, "link", policy))
+
+
+def test_crawler_start(mocker, get_browser, fixture_html):
+    mocker.patch("bofa_crawler.aio.async_navigate")
+    browser = get_browser.return_value
+    browser.page_source = fixture_html("accounts.html")
+
+    async def wait_until(browser, ec_params, condition_type="POEL", *_):
+        if condition_type == "TPE":
+            browser.page_source = fixture_html("deposit.html")
+        return Mock()
+
+    mocker.patch("bofa_crawler.aio.async_wait_until", side_effect=wait_until)
+    mocker.patch(
+        "bofa_crawler.aio.async_wait_for_any", return_value=(SIGNED_IN, Mock())
+    )
+    user = User("online_id", "passcode")
+    crawler = AsyncBofaCrawler(user, ["Adv Plus Banking - 1234"])
+
+    assert asyncio.run(crawler.async_start())
+    (account,) = user.accounts
+    browser.get.assert_called_once_with(account.link)
+    assert account.balance == 250000
+    assert len(account.transactions) == 3
+
+
+def test_crawler_tab_mode(mocker, get_browser, fixture_html):
+    browser = get_browser.return_value
+    browser.page_source = fixture_html("deposit.html")
+    mocker.patch.object(AsyncBofaCrawler, "_open_tabs", return_value=["tab"])
+    mocker.patch.object(
+        AsyncBofaCrawler, "_wait_for_account", return_value=True
+    )
+    user = User("online_id", "passcode")
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+    user.accounts.append(account)
+    crawler = AsyncBofaCrawler(user, [account.name], max_tabs=2)
+
+    asyncio.run(crawler._async_get_user_accounts_detail())
+
+    assert crawler.errors == {}
+    assert account.balance == 250000
+    browser.switch_to.window.assert_any_call("tab")
+
+
+def test_crawler_isolates_account_errors(mocker, get_browser, fixture_html):
+    browser = get_browser.return_value
+    browser.page_source = fixture_html("deposit.html")
+
+    async def wait_until(browser, ec_params, condition_type="POEL", *_):
+        return ec_params[1] == "Adv Plus Banking - 1234"
+
+    mocker.patch("bofa_crawler.aio.async_wait_until", side_effect=wait_until)
+    user = User("online_id", "passcode")
+    missing = Account("Savings - 9012", "Deposit", "missing")
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+    user.accounts.extend([missing, account])
+    crawler = AsyncBofaCrawler(user, [])
+
+    asyncio.run(crawler._async_get_user_accounts_detail())
+
+    assert isinstance(crawler.errors[missing.name], TimeoutException)
+    assert account.balance == 250000
+
+
+def test_crawler_uses_script_extraction(mocker, get_browser):
+    extract_account = mocker.patch(
+        "bofa_crawler.crawler.extract_account",
+        return_value={"balance": "$2,500.00", "rows": []},
+    )
+    wait_until = mocker.patch("bofa_crawler.aio.async_wait_until")
+    user = User("online_id", "passcode")
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+    user.accounts.append(account)
+    crawler = AsyncBofaCrawler(user, [], script_extraction=True)
+
+    asyncio.run(crawler._async_get_user_accounts_detail())
+
+    extract_account.assert_called_once()
+    wait_until.assert_not_called()
+    assert account.balance == 250000
+
+
+def test_crawler_records_navigation_metrics(mocker, get_browser):
+    mocker.patch("bofa_crawler.aio.async_navigate", return_value=2)
+    mocker.patch("bofa_crawler.aio.async_wait_until", return_value=Mock())
+    mocker.patch(
+        "bofa_crawler.aio.async_wait_for_any",
+        return_value=(BAD_CREDENTIALS, Mock()),
+    )
+    metrics = Metrics()
+    crawler = AsyncBofaCrawler(User("user", "p"), [], metrics=metrics)
+
+    asyncio.run(crawler.async_start())
+
+    snapshot = metrics.snapshot()
+    names = {o["name"] for o in snapshot["observations"]}
+    assert {"navigate_seconds", "wait_seconds"} <= names
+    assert snapshot["counters"][0]["value"] == 2
+
+
+def test_crawler_sign_in_fails(mocker, get_browser):
+    mocker.patch("bofa_crawler.aio.async_navigate")
+    mocker.patch("bofa_crawler.aio.async_wait_until", return_value=Mock())
+    mocker.patch(
+        "bofa_crawler.aio.async_wait_for_any",
+        return_value=(BAD_CREDENTIALS, Mock()),
+    )
+    crawler = AsyncBofaCrawler(Mock(), [])
+
+    assert not asyncio.run(crawler.async_start())
+    assert crawler.sign_in_error.outcome == BAD_CREDENTIALS
+
+
+def test_create_and_end(get_browser):
+    async def run():
+        crawler = await AsyncBofaCrawler.create(Mock(), [])
+        await crawler.async_end()
+
+    asyncio.run(run())
+    get_browser.return_value.quit.assert_called_once()
+
+
+@pytest.fixture
+def get_browser(mocker):
+    return mocker.patch("bofa_crawler.crawler.get_browser")
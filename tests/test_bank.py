@@ -1,4 +1,9 @@
-from bofa_crawler.bank import User
+import pickle
+from datetime import date
+
+import pytest
+
+from bofa_crawler.bank import Transaction, TransactionBatch, User
 
 
 class TestUser:
@@ -9,3 +14,82 @@ class TestUser:
         assert user.online_id == "online_id"
         assert user.passcode == "passcode"
         assert user.security_responses == security_responses
+
+
+class TestTransaction:
+    def test_is_immutable(self):
+        transaction = Transaction("foo", 100)
+
+        with pytest.raises(AttributeError):
+            transaction.amount = 200
+        with pytest.raises(AttributeError):
+            transaction.extra = True
+        assert not hasattr(transaction, "__dict__")
+
+    def test_equality_and_hash(self):
+        assert Transaction("foo", 100, True, 5) == Transaction(
+            "foo", 100, True, 5
+        )
+        assert Transaction("foo", 100) != Transaction("foo", 101)
+        assert len({Transaction("foo", 100), Transaction("foo", 100)}) == 1
+
+    def test_pickle_round_trip(self):
+        transaction = Transaction("foo", 100, True, 5, date(2021, 6, 1))
+        assert pickle.loads(pickle.dumps(transaction)) == transaction
+
+    def test_as_dict(self):
+        assert Transaction("foo", 100).as_dict() == {
+            "description": "foo",
+            "amount": 100,
+            "is_pending": False,
+            "ending_balance": None,
+            "date": None,
+        }
+
+
+class TestTransactionBatch:
+    def test_round_trip(self, transactions):
+        batch = TransactionBatch(transactions)
+
+        assert len(batch) == 4
+        assert batch.to_transactions() == transactions
+        assert batch[3] == transactions[3]
+
+    def test_interns_descriptions(self, transactions):
+        batch = TransactionBatch(transactions)
+        assert batch.descriptions[0] is batch.descriptions[2]
+
+    def test_total(self, transactions):
+        batch = TransactionBatch(transactions)
+
+        assert batch.total() == -1550
+        assert batch.total(is_pending=True) == -450
+        assert batch.total(is_pending=False) == -1100
+
+    def test_filter(self, transactions):
+        batch = TransactionBatch(transactions)
+
+        cleared = batch.filter(is_pending=False)
+        assert cleared.to_transactions() == transactions[1:]
+
+        debits = batch.filter(max_amount=-1)
+        assert debits.to_transactions() == [transactions[0], transactions[2]]
+
+        pending_debits = batch.filter(is_pending=True, max_amount=-1)
+        assert pending_debits.to_transactions() == [transactions[0]]
+
+        recent = batch.filter(start_date=date(2021, 6, 2))
+        assert recent.to_transactions() == [
+            transactions[0],
+            transactions[1],
+            transactions[3],
+        ]
+
+    @pytest.fixture
+    def transactions(self):
+        return [
+            Transaction("COFFEE" + "".join(["SHOP"]), -450, True, None),
+            Transaction("PAYMENT", 2000, False, 5000, date(2021, 6, 2)),
+            Transaction("COFFEESHOP", -3100, False, 3000, date(2021, 6, 1)),
+            Transaction("FEE", None, False, 3000),
+        ]
@@ -0,0 +1,56 @@
+import json
+
+from benchmarks import pages
+from benchmarks.run import compare, main
+from bofa_crawler.bank import Account
+from bofa_crawler.parser import (
+    AccountListParser,
+    CreditCardParser,
+    DepositParser,
+)
+from bofa_crawler.util import dollars_to_cents
+
+
+def test_generated_pages_parse():
+    names = pages.account_names(3)
+    accounts = AccountListParser(pages.account_list_page(3)).get_accounts(names)
+    assert [account.name for account in accounts] == names
+
+    card = CreditCardParser(
+        Account("Card", "CreditCard", "link"), pages.credit_card_page(5)
+    )
+    assert len(card.get_transactions()) == 5
+
+    deposit = DepositParser(
+        Account("Checking", "Deposit", "link"), pages.deposit_page(5)
+    )
+    transactions = deposit.get_transactions()
+    assert [t.is_pending for t in transactions] == [True, True] + [False] * 3
+
+
+def test_amount_cells_round_trip():
+    assert dollars_to_cents(pages.format_amount(-123456)) == -123456
+    assert len(pages.amount_cells(4)) == 4
+
+
+def test_main_writes_results(tmp_path):
+    output = tmp_path / "results.json"
+    report = main(["--sizes", "5", "--repeat", "1", "-o", str(output)])
+
+    assert json.loads(output.read_text()) == report
+    assert {r["benchmark"] for r in report["results"]} == {
+        "account_list",
+        "credit_card",
+        "deposit",
+        "dollars_to_cents",
+        "crawl",
+    }
+    assert all(r["peak_bytes"] > 0 for r in report["results"])
+
+
+def test_compare():
+    baseline = {"results": [{"benchmark": "a", "size": 1, "seconds": 2.0}]}
+    report = {"results": [{"benchmark": "a", "size": 1, "seconds": 3.0}]}
+    assert compare(baseline, report) == [
+        {"benchmark": "a", "size": 1, "ratio": 1.5}
+    ]
@@ -1,14 +1,29 @@
+import json
+import os
 import shutil
-from unittest.mock import ANY
+from unittest.mock import ANY, MagicMock, call
+from urllib.parse import unquote
 
 import pytest
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver import Firefox, FirefoxOptions, FirefoxProfile
 
 from bofa_crawler.browser import (
+    BLOCKED_HOST_PATTERNS,
+    LIGHTWEIGHT_PREFERENCES,
     GeckodriverNotFoundError,
+    TemplateProfileOptions,
+    get_blocklist_pac,
     get_browser,
+    get_browser_memory,
+    get_cached_geckodriver,
     get_geckodriver,
+    get_template_profile,
+    load_cookies,
+    reset_browser,
+    save_cookies,
 )
+from bofa_crawler.constants import BOFA_SIGN_IN_URL, SECURE_BASE_URL
 
 
 def test_get_geckodriver(mocker):
@@ -31,6 +46,15 @@ def test_raises_if_geckodriver_none(mocker):
         get_geckodriver()
 
 
+def test_get_cached_geckodriver(mocker):
+    get_geckodriver = mocker.patch(
+        "bofa_crawler.browser.get_geckodriver", return_value="geckotest"
+    )
+    assert get_cached_geckodriver() == "geckotest"
+    assert get_cached_geckodriver() == "geckotest"
+    get_geckodriver.assert_called_once()
+
+
 def test_get_browser(firefox, options, profile, mocker):
     mocker.patch(
         "bofa_crawler.browser.get_geckodriver", return_value="geckotest"
@@ -62,6 +86,157 @@ def test_get_browser_disable_images(firefox, profile):
     )
 
 
+def test_get_browser_with_profile_dir(firefox, options, profile, tmp_path):
+    profile_dir = str(tmp_path / "profile")
+    get_browser(
+        disable_images=True,
+        geckodriver_path="geckotest",
+        profile_dir=profile_dir,
+    )
+
+    profile.assert_not_called()
+    options.return_value.add_argument.assert_any_call("-profile")
+    options.return_value.add_argument.assert_any_call(profile_dir)
+    options.return_value.set_preference.assert_called_once_with(
+        "permissions.default.image", 2
+    )
+    firefox.assert_called_once_with(
+        options=ANY, firefox_profile=None, executable_path="geckotest"
+    )
+
+
+def test_get_browser_lightweight(firefox, profile):
+    get_browser(lightweight=True, geckodriver_path="geckotest")
+
+    set_preference = profile.return_value.set_preference
+    for name, value in LIGHTWEIGHT_PREFERENCES.items():
+        set_preference.assert_any_call(name, value)
+    set_preference.assert_any_call("network.proxy.type", 2)
+    set_preference.assert_any_call(
+        "network.proxy.autoconfig_url",
+        get_blocklist_pac(BLOCKED_HOST_PATTERNS),
+    )
+
+
+def test_get_browser_custom_blocklist(firefox, profile):
+    get_browser(blocklist=["*.example.com"], geckodriver_path="geckotest")
+
+    assert profile.return_value.set_preference.call_args_list == [
+        call("network.proxy.type", 2),
+        call(
+            "network.proxy.autoconfig_url",
+            get_blocklist_pac(["*.example.com"]),
+        ),
+    ]
+
+
+def test_get_blocklist_pac():
+    pac = get_blocklist_pac(["*.ads.com", "tracker.net"])
+
+    assert pac.startswith("data:application/x-ns-proxy-autoconfig,")
+    script = unquote(pac.split(",", 1)[1])
+    assert 'shExpMatch(host, "*.ads.com") || ' in script
+    assert 'shExpMatch(host, "tracker.net")' in script
+    assert "return 'DIRECT'" in script
+
+
+def test_get_browser_with_template_profile(firefox):
+    get_browser(disable_images=True, geckodriver_path="geckotest")
+    get_browser(
+        disable_images=True, geckodriver_path="geckotest", template_profile=True
+    )
+    get_browser(
+        disable_images=True, geckodriver_path="geckotest", template_profile=True
+    )
+
+    options = firefox.call_args.kwargs["options"]
+    assert isinstance(options, TemplateProfileOptions)
+    assert firefox.call_args.kwargs["firefox_profile"] is None
+    capabilities = options.to_capabilities()
+    assert capabilities["moz:firefoxOptions"]["profile"]
+    assert get_template_profile.cache_info().misses == 1
+    assert get_template_profile.cache_info().hits == 1
+
+
+def test_get_browser_memory():
+    browser = MagicMock(spec=Firefox)
+    browser.capabilities = {"moz:processID": os.getpid()}
+    memory = get_browser_memory(browser)
+    if os.path.isdir("/proc"):
+        assert memory > 0
+
+    browser.capabilities = {}
+    assert get_browser_memory(browser) is None
+
+
+def test_save_and_load_cookies(tmp_path):
+    path = str(tmp_path / "cookies.json")
+    browser = MagicMock(spec=Firefox)
+    browser.get_cookies.return_value = [
+        {"name": "a", "value": "1", "expiry": 1700000000.5},
+        {"name": "b", "value": "2"},
+    ]
+    save_cookies(browser, path)
+
+    browser.add_cookie.side_effect = [None, WebDriverException]
+    assert load_cookies(browser, path) == 1
+    browser.add_cookie.assert_any_call(
+        {"name": "a", "value": "1", "expiry": 1700000000}
+    )
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_save_cookies_is_private(tmp_path):
+    browser = MagicMock(spec=Firefox)
+    browser.get_cookies.return_value = []
+    path = tmp_path / "cookies.json"
+    path.write_text("[]")
+    path.chmod(0o644)
+
+    save_cookies(browser, str(path))
+
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert json.loads(path.read_text()) == []
+
+
+def test_load_cookies_missing_file(tmp_path):
+    browser = MagicMock(spec=Firefox)
+    assert load_cookies(browser, str(tmp_path / "missing.json")) == 0
+    browser.add_cookie.assert_not_called()
+
+
+def test_reset_browser():
+    browser = MagicMock(spec=Firefox)
+    browser.window_handles = ["main", "tab"]
+    reset_browser(browser)
+
+    browser.close.assert_called_once()
+    browser.switch_to.window.assert_called_with("main")
+
+    # Cookies and storage are cleared on both the sign in and secure hosts
+    calls = []
+    browser.get.side_effect = lambda url: calls.append(("get", url))
+    browser.delete_all_cookies.side_effect = lambda: calls.append("cookies")
+    browser.execute_script.side_effect = lambda _: calls.append("storage")
+    reset_browser(browser)
+
+    assert calls == [
+        ("get", BOFA_SIGN_IN_URL),
+        "cookies",
+        "storage",
+        ("get", SECURE_BASE_URL),
+        "cookies",
+        "storage",
+        ("get", "about:blank"),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    get_cached_geckodriver.cache_clear()
+    get_template_profile.cache_clear()
+
+
 @pytest.fixture(name="firefox")
 def patched_firefox(mocker):
     return mocker.patch("bofa_crawler.browser.Firefox", spec_set=Firefox)
@@ -0,0 +1,101 @@
+import os
+import stat
+from datetime import date
+
+import pytest
+
+from bofa_crawler.bank import Account, Transaction
+from bofa_crawler.cache import (
+    ParseCache,
+    dump_result,
+    get_cache_key,
+    load_result,
+)
+from bofa_crawler.parser import get_account_parser
+
+
+def test_get_cache_key_normalizes_whitespace():
+    assert get_cache_key("Deposit", "<p>a  b</p>\n") == get_cache_key(
+        "Deposit", "<p>a b</p>"
+    )
+    assert get_cache_key("Deposit", "<p></p>") != get_cache_key(
+        "CreditCard", "<p></p>"
+    )
+
+
+def test_parse_hits_skip_parsing(mocker, account, fixture_html):
+    parser_factory = mocker.patch(
+        "bofa_crawler.cache.get_account_parser", wraps=get_account_parser
+    )
+    cache = ParseCache()
+    first = cache.parse(account, fixture_html("deposit.html"))
+    second = cache.parse(account, fixture_html("deposit.html"))
+
+    assert first == second
+    assert first[0] == 250000
+    assert len(first[1]) == 3
+    parser_factory.assert_called_once()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ParseCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_disk_tier_survives_new_instance(tmp_path, account, fixture_html):
+    ParseCache(directory=str(tmp_path)).parse(
+        account, fixture_html("deposit.html")
+    )
+    cache = ParseCache(directory=str(tmp_path))
+    key = get_cache_key("Deposit", fixture_html("deposit.html"))
+
+    assert cache.get(key)[0] == 250000
+    assert cache.hits == 1
+
+
+def test_disk_tier_is_private_json(tmp_path):
+    result = (
+        -500,
+        (
+            Transaction("COFFEE", -500, True, None),
+            Transaction("PAYROLL", 1500, False, 2500, date(2021, 6, 14)),
+        ),
+    )
+    cache = ParseCache(directory=str(tmp_path))
+    cache.set("key", result)
+
+    path = tmp_path / "key.json"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert load_result(path.read_text()) == result
+    assert dump_result(result) == path.read_text()
+
+
+def test_disk_tier_ignores_corrupt_files(tmp_path):
+    (tmp_path / "key.json").write_text("{not json")
+    cache = ParseCache(directory=str(tmp_path))
+
+    assert cache.get("key") is None
+
+
+def test_disk_tier_evicts_by_size(tmp_path):
+    cache = ParseCache(directory=str(tmp_path), max_disk_bytes=2500)
+    result = (0, (Transaction("x" * 1000, 0),))
+    for index, key in enumerate(["a", "b", "c"]):
+        cache.set(key, result)
+        os.utime(tmp_path / (key + ".json"), (index, index))
+    cache.set("d", result)
+
+    assert sorted(os.listdir(tmp_path)) == ["c.json", "d.json"]
+
+
+@pytest.fixture
+def account():
+    return Account("Adv Plus Banking - 1234", "Deposit", "link")
@@ -1,8 +1,30 @@
-from unittest.mock import ANY, Mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest.mock import Mock, PropertyMock
 
 import pytest
+from selenium.common.exceptions import (
+    NoSuchWindowException,
+    TimeoutException,
+    WebDriverException,
+)
 
-from bofa_crawler.crawler import BofaCrawler
+from bofa_crawler.bank import Account, User
+from bofa_crawler.cache import ParseCache
+from bofa_crawler.crawler import (
+    BAD_CREDENTIALS,
+    SECURITY_QUESTION,
+    SESSION_COOKIES_FILE,
+    SIGN_IN_OUTCOMES,
+    SIGNED_IN,
+    SIGNED_OUT,
+    BofaCrawler,
+    SignInError,
+)
+from bofa_crawler.export import JsonLinesExporter
+from bofa_crawler.metrics import Metrics
+from bofa_crawler.pipeline import ParsePipeline
+from bofa_crawler.state import StateStore
 
 
 def test_instantiate(get_browser):
@@ -18,10 +40,22 @@ def test_instantiate(get_browser):
     assert crawler.user == user
     assert crawler.accounts == accounts
     get_browser.assert_called_once_with(
-        headless=True, disable_images=True, geckodriver_path="geckotest"
+        headless=True,
+        disable_images=True,
+        geckodriver_path="geckotest",
+        profile_dir=None,
+        lightweight=False,
+        blocklist=None,
     )
 
 
+def test_instantiate_with_browser(get_browser):
+    browser = Mock()
+    crawler = BofaCrawler(Mock(), [], browser=browser)
+    assert crawler.browser is browser
+    get_browser.assert_not_called()
+
+
 def test_start(mocker, get_browser, crawler):
     sign_in = mocker.patch.object(crawler, "_sign_in", return_value=True)
     get_accounts = mocker.patch.object(crawler, "_get_accounts")
@@ -30,12 +64,445 @@ def test_start(mocker, get_browser, crawler):
     get_accounts.assert_called_once()
 
 
+def test_get_user_accounts_detail(mocker, get_browser, crawler):
+    wait_until = mocker.patch(
+        "bofa_crawler.crawler.wait_until", side_effect=[True, False]
+    )
+    parse_account = mocker.patch.object(crawler, "_parse_account")
+    accounts = [Mock(link="link1"), Mock(link="link2")]
+    crawler.user.accounts = accounts
+    crawler._get_user_accounts_detail()
+
+    browser = get_browser.return_value
+    assert browser.get.call_args_list == [(("link1",),), (("link2",),)]
+    assert wait_until.call_count == 2
+    parse_account.assert_called_once_with(accounts[0], browser.page_source)
+
+
+def test_get_user_accounts_detail_isolates_failed_accounts(
+    mocker, get_browser, crawler
+):
+    mocker.patch.object(crawler, "_wait_for_account", side_effect=[False, True])
+    parse_account = mocker.patch.object(
+        crawler, "_parse_account", side_effect=ValueError("bad row")
+    )
+    accounts = [Account("a", "Deposit", "1"), Account("b", "Deposit", "2")]
+    crawler.user = User("user", "passcode")
+    crawler.user.accounts.extend(accounts)
+
+    crawler._get_user_accounts_detail()
+
+    parse_account.assert_called_once()
+    assert isinstance(crawler.errors["a"], TimeoutException)
+    assert isinstance(crawler.errors["b"], ValueError)
+
+
+def test_get_user_accounts_detail_with_parse_pipeline(
+    mocker, get_browser, fixture_html
+):
+    mocker.patch("bofa_crawler.crawler.wait_until", return_value=Mock())
+    get_browser.return_value.page_source = fixture_html("deposit.html")
+    accounts = [
+        Account("Adv Plus Banking - 1234", "Deposit", "1"),
+        Account("Brokerage - 9999", "Brokerage", "2"),
+    ]
+    user = User("user", "passcode")
+    user.accounts.extend(accounts)
+    pipeline = ParsePipeline(executor=ThreadPoolExecutor(max_workers=1))
+    crawler = BofaCrawler(user, [], parse_pipeline=pipeline)
+
+    crawler._get_user_accounts_detail()
+    pipeline.close()
+
+    assert accounts[0].balance == 250000
+    assert len(accounts[0].transactions) == 3
+    assert list(crawler.errors) == ["Brokerage - 9999"]
+    assert isinstance(crawler.errors["Brokerage - 9999"], KeyError)
+    assert accounts[1].transactions is None
+
+
+def test_get_user_accounts_detail_with_script_extraction(mocker, get_browser):
+    extract_account = mocker.patch(
+        "bofa_crawler.crawler.extract_account",
+        return_value={
+            "balance": "$2,500.00",
+            "rows": [
+                [False, "PAYROLL", "$1,500.00", "$2,500.00", "06/14/2021"]
+            ],
+        },
+    )
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+    user = User("user", "passcode")
+    user.accounts.append(account)
+    browser = get_browser.return_value
+    type(browser).page_source = PropertyMock()
+    crawler = BofaCrawler(user, [], script_extraction=True)
+
+    crawler._get_user_accounts_detail()
+
+    extract_account.assert_called_once_with(browser, account, mocker.ANY)
+    type(browser).page_source.assert_not_called()
+    assert account.balance == 250000
+    assert account.transactions[0].date == date(2021, 6, 14)
+
+
+def test_get_user_accounts_detail_in_tabs(mocker, get_browser):
+    mocker.patch("bofa_crawler.crawler.wait_until", return_value=True)
+    crawler = BofaCrawler(Mock(), [], max_tabs=2)
+    parse_account = mocker.patch.object(crawler, "_parse_account")
+    browser = get_browser.return_value
+    browser.current_window_handle = "main"
+    handles = ["main"]
+    type(browser).window_handles = PropertyMock(
+        side_effect=lambda: list(handles)
+    )
+    browser.execute_script.side_effect = lambda *_: handles.append(
+        "tab{}".format(len(handles))
+    )
+    accounts = [Mock(link="link{}".format(i)) for i in range(3)]
+    crawler.user.accounts = accounts
+    crawler._get_user_accounts_detail()
+
+    assert browser.execute_script.call_count == 3
+    assert browser.close.call_count == 3
+    switched = [c.args[0] for c in browser.switch_to.window.call_args_list]
+    assert switched == ["tab1", "tab2", "main", "tab3", "main"]
+    assert [c.args[0] for c in parse_account.call_args_list] == accounts
+
+
+def test_get_user_accounts_detail_in_tabs_isolates_failed_tabs(
+    mocker, get_browser
+):
+    mocker.patch(
+        "bofa_crawler.crawler.wait_until",
+        side_effect=[WebDriverException("tab crashed"), True, True],
+    )
+    crawler = BofaCrawler(Mock(), [], max_tabs=3)
+    parse_account = mocker.patch.object(crawler, "_parse_account")
+    browser = get_browser.return_value
+    browser.current_window_handle = "main"
+    handles = ["main"]
+    type(browser).window_handles = PropertyMock(
+        side_effect=lambda: list(handles)
+    )
+    browser.execute_script.side_effect = lambda *_: handles.append(
+        "tab{}".format(len(handles))
+    )
+
+    def switch_to_window(handle):
+        if handle == "tab2":
+            raise NoSuchWindowException(handle)
+
+    browser.switch_to.window.side_effect = switch_to_window
+    accounts = [Account(str(i), "Deposit", "link") for i in range(3)]
+    crawler.user.accounts = accounts
+    crawler._get_user_accounts_detail()
+
+    assert isinstance(crawler.errors["0"], WebDriverException)
+    assert isinstance(crawler.errors["1"], NoSuchWindowException)
+    assert [c.args[0] for c in parse_account.call_args_list] == accounts[2:]
+    # Tabs that were switched to are closed even when reading them failed
+    assert browser.close.call_count == 2
+    assert browser.switch_to.window.call_args.args == ("main",)
+
+
+def test_get_user_accounts_detail_over_http(mocker, get_browser, fixture_html):
+    session = mocker.patch("bofa_crawler.crawler.HttpSession")
+    http = session.from_browser.return_value.__enter__.return_value
+    http.get.side_effect = [fixture_html("deposit.html"), "<html></html>"]
+    crawler = BofaCrawler(Mock(), [], http_mode=True)
+    parse_account = mocker.patch.object(crawler, "_parse_account")
+    accounts = [
+        Account("Adv Plus Banking - 1234", "Deposit", "link1"),
+        Account("Savings - 9012", "Deposit", "link2"),
+    ]
+    crawler.user.accounts = accounts
+    crawler._get_user_accounts_detail()
+
+    session.from_browser.assert_called_once_with(get_browser.return_value)
+    assert http.get.call_args_list == [(("link1",),), (("link2",),)]
+    parse_account.assert_called_once_with(
+        accounts[0], fixture_html("deposit.html")
+    )
+    get_browser.return_value.get.assert_not_called()
+
+
 def test_end(mocker, get_browser, crawler):
     browser = get_browser.return_value
     crawler.end()
     browser.quit.assert_called_once()
 
 
+def test_start_resumes_saved_session(mocker, get_browser, tmp_path):
+    mocker.patch("bofa_crawler.crawler.navigate")
+    mocker.patch(
+        "bofa_crawler.crawler.wait_for_any", return_value=(SIGNED_IN, Mock())
+    )
+    load_cookies = mocker.patch("bofa_crawler.crawler.load_cookies")
+    crawler = BofaCrawler(Mock(), [], profile_dir=str(tmp_path))
+    sign_in = mocker.patch.object(crawler, "_sign_in")
+    get_accounts = mocker.patch.object(crawler, "_get_accounts")
+
+    assert crawler.start()
+    load_cookies.assert_called_once_with(
+        get_browser.return_value, str(tmp_path / SESSION_COOKIES_FILE)
+    )
+    sign_in.assert_not_called()
+    get_accounts.assert_called_once()
+
+
+def test_start_signs_in_when_session_expired(mocker, get_browser, tmp_path):
+    mocker.patch("bofa_crawler.crawler.navigate")
+    mocker.patch("bofa_crawler.crawler.load_cookies")
+    mocker.patch(
+        "bofa_crawler.crawler.wait_for_any", return_value=(SIGNED_OUT, Mock())
+    )
+    crawler = BofaCrawler(Mock(), [], profile_dir=str(tmp_path))
+    sign_in = mocker.patch.object(crawler, "_sign_in", return_value=True)
+    mocker.patch.object(crawler, "_get_accounts")
+
+    assert crawler.start()
+    sign_in.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "outcome, error",
+    [
+        (SIGNED_IN, None),
+        (BAD_CREDENTIALS, SignInError),
+        (SECURITY_QUESTION, SignInError),
+        (None, TimeoutException),
+    ],
+)
+def test_sign_in_outcomes(mocker, get_browser, outcome, error):
+    mocker.patch("bofa_crawler.crawler.navigate")
+    mocker.patch("bofa_crawler.crawler.wait_until")
+    wait_for_any = mocker.patch(
+        "bofa_crawler.crawler.wait_for_any", return_value=(outcome, Mock())
+    )
+    crawler = BofaCrawler(User("user", "pass"), [])
+
+    assert crawler._sign_in() is (error is None)
+    wait_for_any.assert_called_once_with(
+        get_browser.return_value, SIGN_IN_OUTCOMES, 10
+    )
+    if error:
+        assert isinstance(crawler.sign_in_error, error)
+    if error is SignInError:
+        assert crawler.sign_in_error.outcome == outcome
+
+
+def test_end_saves_session_cookies(mocker, get_browser, tmp_path):
+    save_cookies = mocker.patch("bofa_crawler.crawler.save_cookies")
+    crawler = BofaCrawler(Mock(), [], profile_dir=str(tmp_path))
+    crawler.end()
+
+    save_cookies.assert_called_once_with(
+        get_browser.return_value, str(tmp_path / SESSION_COOKIES_FILE)
+    )
+    get_browser.return_value.quit.assert_called_once()
+
+
+def test_get_accounts_uses_discovered_accounts(mocker, get_browser):
+    store = StateStore()
+    store.set_accounts("user", [Account("Savings", "Deposit", "link")])
+    crawler = BofaCrawler(User("user", "pass"), ["Savings"], state_store=store)
+    get_page_source = mocker.patch.object(crawler, "_get_page_source")
+    get_detail = mocker.patch.object(crawler, "_get_user_accounts_detail")
+
+    crawler._get_accounts()
+
+    get_page_source.assert_not_called()
+    get_detail.assert_called_once_with()
+    assert [a.link for a in crawler.user.accounts] == ["link"]
+
+
+def test_get_accounts_rediscovers_stale_links(
+    mocker, get_browser, fixture_html
+):
+    mocker.patch("bofa_crawler.crawler.navigate", return_value=0)
+    mocker.patch("bofa_crawler.crawler.wait_until", return_value=Mock())
+    store = StateStore()
+    store.set_accounts("user", [Account("Savings - 9012", "Deposit", "old")])
+    crawler = BofaCrawler(
+        User("user", "pass"), ["Savings - 9012"], state_store=store
+    )
+    get_browser.return_value.page_source = fixture_html("accounts.html")
+
+    def get_account_detail(account):
+        if account.link == "old":
+            raise TimeoutException()
+
+    mocker.patch.object(
+        crawler, "_get_account_detail", side_effect=get_account_detail
+    )
+
+    crawler._get_accounts()
+
+    (account,) = crawler.user.accounts
+    assert account.link.endswith("adx=d2")
+    assert crawler.errors == {}
+    assert store.get_accounts("user")["Savings - 9012"].link == account.link
+
+
+def test_parse_account_incremental(get_browser, fixture_html):
+    store = StateStore()
+    crawler = BofaCrawler(Mock(online_id="user"), [], state_store=store)
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+
+    crawler._parse_account(account, fixture_html("deposit.html"))
+    assert len(account.transactions) == 3
+
+    crawler._parse_account(account, fixture_html("deposit.html"))
+    assert account.balance == 250000
+    assert account.transactions == []
+    assert account.changes == []
+
+
+def test_parse_account_uses_parse_cache(get_browser, fixture_html):
+    cache = ParseCache()
+    crawler = BofaCrawler(Mock(), [], parse_cache=cache)
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+
+    crawler._parse_account(account, fixture_html("deposit.html"))
+    crawler._parse_account(account, fixture_html("deposit.html"))
+
+    assert account.balance == 250000
+    assert len(account.transactions) == 3
+    assert cache.hits == 1
+
+
+def test_parse_account_streams_to_exporter(get_browser, fixture_html, tmp_path):
+    path = tmp_path / "out.jsonl"
+    exporter = JsonLinesExporter(str(path))
+    crawler = BofaCrawler(
+        Mock(online_id="user"),
+        [],
+        exporter=exporter,
+        keep_transactions=False,
+    )
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+
+    crawler._parse_account(account, fixture_html("deposit.html"))
+
+    assert account.balance == 250000
+    assert account.transactions is None
+    assert exporter.rows_written == 3
+    assert len(path.read_text().splitlines()) == 3
+
+
+def test_metrics_record_crawl_phases(mocker, get_browser, fixture_html):
+    mocker.patch("bofa_crawler.crawler.navigate", return_value=2)
+    mocker.patch("bofa_crawler.crawler.wait_until", return_value=Mock())
+    mocker.patch(
+        "bofa_crawler.crawler.wait_for_any", return_value=(SIGNED_IN, Mock())
+    )
+    browser = get_browser.return_value
+    browser.page_source = fixture_html("accounts.html")
+    browser.get.side_effect = lambda _: setattr(
+        browser, "page_source", fixture_html("deposit.html")
+    )
+    browser.execute_script.return_value = 850
+    metrics = Metrics()
+    user = User("user", "passcode")
+    crawler = BofaCrawler(user, ["Adv Plus Banking - 1234"], metrics=metrics)
+    crawler.start()
+
+    snapshot = metrics.snapshot()
+    names = {o["name"] for o in snapshot["observations"]}
+    assert names == {
+        "browser_start_seconds",
+        "navigate_seconds",
+        "wait_seconds",
+        "page_source_seconds",
+        "page_bytes",
+        "page_load_seconds",
+        "parse_seconds",
+        "rows",
+    }
+    rows = [o for o in snapshot["observations"] if o["name"] == "rows"]
+    assert rows[0]["labels"] == {
+        "user": "user",
+        "account": "Adv Plus Banking - 1234",
+    }
+    assert rows[0]["sum"] == 3
+    assert snapshot["counters"][0]["value"] == 2
+
+
+def test_get_account_history(mocker, get_browser, history_browser):
+    crawler = BofaCrawler(Mock(), [])
+    account = Account("Adv Plus Banking - 1234", "Deposit", "current")
+
+    transactions = crawler.get_account_history(account)
+
+    assert history_browser.get.call_args_list == [
+        (("current",),),
+        (("previous",),),
+    ]
+    assert [t.description for t in transactions] == [
+        "ATM WITHDRAWAL",
+        "PAYROLL DEPOSIT",
+        "RENT PAYMENT",
+        "COFFEE SHOP",
+        "PAYROLL DEPOSIT",
+    ]
+    assert account.transactions == transactions
+    assert account.balance == 250000
+
+
+def test_get_account_history_stops_at_start_date(
+    mocker, get_browser, history_browser
+):
+    crawler = BofaCrawler(Mock(), [])
+    account = Account("Adv Plus Banking - 1234", "Deposit", "current")
+
+    transactions = crawler.get_account_history(
+        account, start_date=date(2021, 6, 5)
+    )
+
+    history_browser.get.assert_called_once_with("current")
+    assert [t.description for t in transactions] == [
+        "ATM WITHDRAWAL",
+        "PAYROLL DEPOSIT",
+    ]
+
+
+def test_get_account_history_raises_on_missing_period(
+    mocker, get_browser, history_browser
+):
+    mocker.patch("bofa_crawler.crawler.wait_until", side_effect=[True, False])
+    crawler = BofaCrawler(Mock(), [])
+    account = Account("Adv Plus Banking - 1234", "Deposit", "current")
+
+    with pytest.raises(TimeoutException):
+        crawler.get_account_history(account)
+
+    assert account.transactions is None
+
+
+@pytest.fixture
+def history_browser(mocker, get_browser, fixture_html):
+    mocker.patch("bofa_crawler.crawler.wait_until", return_value=True)
+    browser = get_browser.return_value
+    pages = {
+        "current": (
+            fixture_html("deposit.html"),
+            [["Processing", "06/14/2021", "06/01/2021"], "previous"],
+        ),
+        "previous": (
+            fixture_html("deposit_previous.html"),
+            [["06/01/2021", "05/20/2021", "05/15/2021"], None],
+        ),
+    }
+
+    def get(link):
+        browser.page_source, period = pages[link]
+        browser.execute_script.return_value = period
+
+    browser.get.side_effect = get
+    return browser
+
+
 @pytest.fixture
 def crawler(get_browser):
     user = Mock()
@@ -0,0 +1,257 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from bofa_crawler.bank import Account, Transaction, User
+from bofa_crawler.crawler import MAINTENANCE, SignInError
+from bofa_crawler.daemon import CrawlDaemon, get_activity
+from bofa_crawler.pool import SignInFailedError
+from bofa_crawler.state import TransactionChange
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance the clock instead of sleeping."""
+        self.now += seconds
+
+
+def make_factory(balances=None, signed_in=True, errors=None, calls=None):
+    """Get a crawler factory adding accounts with the given balances."""
+
+    def factory(user, accounts, **kwargs):
+        if calls is not None:
+            calls.append((user.online_id, list(accounts)))
+        crawler = Mock(errors=dict(errors or {}), sign_in_error=None)
+
+        def start():
+            for name in accounts:
+                account = Account(name, "Deposit", "link")
+                account.balance = (balances or {}).get(name, 0)
+                account.transactions = []
+                user.accounts.append(account)
+            return signed_in
+
+        crawler.start.side_effect = start
+        return crawler
+
+    return factory
+
+
+def test_get_activity():
+    account = Account("Checking", "Deposit", "link")
+    account.balance = 100
+    account.transactions = [
+        Transaction("PENDING", -5, is_pending=True),
+        Transaction("CLEARED", -5),
+    ]
+    assert get_activity(account) == 1
+    assert get_activity(account, previous_balance=100) == 1
+    assert get_activity(account, previous_balance=50) == 2
+
+    account.changes = []
+    assert get_activity(account, previous_balance=100) == 0
+    account.changes = [TransactionChange(TransactionChange.NEW, None)]
+    assert get_activity(account, previous_balance=100) == 1
+
+
+def test_get_next_interval_stays_within_bounds():
+    daemon = CrawlDaemon([], min_interval=10, max_interval=100, backoff=2)
+
+    assert daemon.get_next_interval(40, activity=0) == 80
+    assert daemon.get_next_interval(80, activity=0) == 100
+    assert daemon.get_next_interval(40, activity=3) == 20
+    assert daemon.get_next_interval(15, activity=1) == 10
+
+    with pytest.raises(ValueError):
+        CrawlDaemon([], min_interval=100, max_interval=10)
+
+
+def test_dormant_accounts_are_crawled_less_often():
+    clock = FakeClock()
+    calls = []
+    balances = {"Busy": 0, "Dormant": 0}
+
+    def factory(user, accounts, **kwargs):
+        # The busy account's balance moves on every crawl
+        balances["Busy"] += 1
+        return make_factory(balances, calls=calls)(user, accounts)
+
+    daemon = CrawlDaemon(
+        [(User("busy", "p"), ["Busy"]), (User("dormant", "p"), ["Dormant"])],
+        min_interval=10,
+        max_interval=80,
+        crawler_factory=factory,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    results = list(daemon.run(max_crawls=10))
+
+    assert all(result.ok for result in results)
+    crawled = [online_id for online_id, _ in calls]
+    assert crawled.count("busy") > crawled.count("dormant")
+    assert daemon.schedules["busy"].intervals["Busy"] == 10
+    assert daemon.schedules["dormant"].intervals["Dormant"] == 80
+
+
+def test_accounts_due_soon_share_a_crawl():
+    clock = FakeClock()
+    calls = []
+    daemon = CrawlDaemon(
+        [(User("user", "p"), ["Checking", "Savings"])],
+        min_interval=10,
+        crawler_factory=make_factory(calls=calls),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    daemon.schedules["user"].due["Savings"] = 5
+
+    list(daemon.run(max_crawls=1))
+
+    assert calls == [("user", ["Checking", "Savings"])]
+
+
+def test_failed_accounts_are_retried_soon():
+    clock = FakeClock()
+    error = Exception("markup")
+    daemon = CrawlDaemon(
+        [(User("user", "p"), ["Checking", "Savings"])],
+        min_interval=10,
+        crawler_factory=make_factory(errors={"Savings": error}),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    (result,) = daemon.run(max_crawls=1)
+
+    assert result.error is error
+    schedule = daemon.schedules["user"]
+    assert schedule.due == {"Checking": 20, "Savings": 10}
+    assert schedule.intervals["Savings"] == 10
+
+
+def test_sign_in_failure_backs_off_then_parks_user():
+    clock = FakeClock()
+    calls = []
+    daemon = CrawlDaemon(
+        [(User("user", "p"), ["Checking"])],
+        min_interval=10,
+        max_interval=100,
+        crawler_factory=make_factory(signed_in=False, calls=calls),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    results = list(daemon.run())
+
+    assert all(isinstance(r.error, SignInFailedError) for r in results)
+    # Retried once after the longest interval, then parked
+    assert len(calls) == 2
+    assert clock.now == 100
+    assert isinstance(daemon.parked["user"], SignInFailedError)
+
+    daemon.resume("user")
+    assert daemon.parked == {}
+    assert len(list(daemon.run(max_crawls=1))) == 1
+    assert len(calls) == 3
+
+
+def test_sign_in_timeout_is_retried_soon():
+    clock = FakeClock()
+
+    def factory(user, accounts, **kwargs):
+        crawler = make_factory(signed_in=False)(user, accounts)
+        crawler.sign_in_error = SignInError(MAINTENANCE)
+        return crawler
+
+    daemon = CrawlDaemon(
+        [(User("user", "p"), ["Checking"])],
+        min_interval=10,
+        crawler_factory=factory,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    results = list(daemon.run(max_crawls=3))
+
+    assert [r.error.outcome for r in results] == [MAINTENANCE] * 3
+    assert clock.now == 20
+    assert daemon.parked == {}
+
+
+def test_browser_launch_failure_is_retried_soon():
+    clock = FakeClock()
+    launch_error = WebDriverException("geckodriver failed to start")
+    factories = [launch_error, make_factory()]
+
+    def factory(user, accounts, **kwargs):
+        create = factories.pop(0)
+        if isinstance(create, Exception):
+            raise create
+        return create(user, accounts)
+
+    daemon = CrawlDaemon(
+        [(User("user", "p"), ["Checking"])],
+        min_interval=10,
+        crawler_factory=factory,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    results = list(daemon.run(max_crawls=2))
+
+    assert results[0].error is launch_error
+    assert results[1].ok
+    assert clock.now == 10
+
+
+def test_concurrent_crawls_are_limited():
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def factory(user, accounts, **kwargs):
+        crawler = make_factory()(user, accounts)
+        start = crawler.start.side_effect
+
+        def tracked_start():
+            with lock:
+                running.append(user)
+                peak.append(len(running))
+            threading.Event().wait(0.01)
+            with lock:
+                running.remove(user)
+            return start()
+
+        crawler.start.side_effect = tracked_start
+        return crawler
+
+    jobs = [(User(str(i), "p"), ["Checking"]) for i in range(6)]
+    daemon = CrawlDaemon(jobs, max_browsers=2, crawler_factory=factory)
+
+    results = list(daemon.run(max_crawls=6))
+
+    assert len(results) == 6
+    assert max(peak) <= 2
+
+
+def test_stop_ends_run():
+    clock = FakeClock()
+    daemon = CrawlDaemon(
+        [(User("user", "p"), ["Checking"])],
+        crawler_factory=make_factory(),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    for _ in daemon.run():
+        daemon.stop()
+
+    assert clock.now == 0
@@ -0,0 +1,109 @@
+import csv
+import json
+import sys
+from datetime import date
+
+import pytest
+
+from bofa_crawler.bank import Account, Transaction
+from bofa_crawler.export import (
+    EXPORT_FIELDS,
+    ColumnarExporter,
+    CsvExporter,
+    JsonLinesExporter,
+)
+
+
+def test_csv_exporter_writes_rows(tmp_path, account, transactions):
+    path = tmp_path / "out.csv"
+    with CsvExporter(str(path)) as exporter:
+        assert exporter.write(account, transactions, "user") == 2
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == list(EXPORT_FIELDS)
+    assert rows[0]["date"] == "2021-07-01"
+    assert rows[0]["amount"] == "-1234"
+    assert rows[1]["date"] == ""
+    assert rows[1]["is_pending"] == "True"
+
+
+def test_csv_exporter_appends_without_repeating_header(
+    tmp_path, account, transactions
+):
+    path = str(tmp_path / "out.csv")
+    for _ in range(2):
+        with CsvExporter(path, append=True) as exporter:
+            exporter.write(account, transactions, "user")
+
+    with open(path, newline="") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 5
+    assert lines[0] == ",".join(EXPORT_FIELDS)
+
+
+def test_json_lines_exporter(tmp_path, account, transactions):
+    path = tmp_path / "out.jsonl"
+    with JsonLinesExporter(str(path)) as exporter:
+        exporter.write(account, iter(transactions), "user")
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert rows[0] == {
+        "user": "user",
+        "account": "Adv Plus Banking - 1234",
+        "account_type": "Deposit",
+        "date": "2021-07-01",
+        "description": "Coffee",
+        "amount": -1234,
+        "is_pending": False,
+        "ending_balance": 5000,
+    }
+    assert rows[1]["date"] is None
+
+
+def test_exporter_batches_rows(tmp_path, account, transactions):
+    path = tmp_path / "out.jsonl"
+    exporter = JsonLinesExporter(
+        str(path), batch_size=3, flush_per_account=False
+    )
+    exporter.write(account, transactions, "user")
+    assert exporter.rows_written == 0
+    assert not path.exists()
+
+    exporter.write(account, transactions, "user")
+    assert exporter.rows_written == 3
+
+    exporter.close()
+    assert exporter.rows_written == 4
+    assert len(path.read_text().splitlines()) == 4
+
+
+def test_columnar_exporter(tmp_path, account, transactions):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+    with ColumnarExporter(path) as exporter:
+        exporter.write(account, transactions, "user")
+
+    table = parquet.read_table(path)
+    assert table.column_names == list(EXPORT_FIELDS)
+    assert table.column("amount").to_pylist() == [-1234, 500]
+    assert table.column("date").to_pylist() == [date(2021, 7, 1), None]
+
+
+def test_columnar_exporter_requires_pyarrow(mocker, tmp_path):
+    mocker.patch.dict(sys.modules, {"pyarrow": None})
+    with pytest.raises(ImportError, match="pyarrow"):
+        ColumnarExporter(str(tmp_path / "out.parquet"))
+
+
+@pytest.fixture
+def account():
+    return Account("Adv Plus Banking - 1234", "Deposit", "link")
+
+
+@pytest.fixture
+def transactions():
+    return [
+        Transaction("Coffee", -1234, False, 5000, date(2021, 7, 1)),
+        Transaction("Refund", 500, True),
+    ]
@@ -0,0 +1,91 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Firefox
+
+from bofa_crawler.bank import Account
+from bofa_crawler.extract import (
+    EXTRACT_SCRIPT,
+    ExtractedParser,
+    extract_account,
+    get_extract_spec,
+)
+from bofa_crawler.parser import get_account_parser
+
+CREDIT_CARD_DATA = {
+    "balance": "$1,234.56",
+    "rows": [
+        [True, "COFFEE SHOP", "-$4.50", "$1,239.06", "Pending"],
+        [False, "GROCERY STORE", "-$52.10", "$1,234.56", "06/14/2021"],
+        [False, "PAYMENT - THANK YOU", "$200.00", "$1,182.46", "06/10/2021"],
+    ],
+}
+
+DEPOSIT_DATA = {
+    "balance": "$2,500.00",
+    "rows": [
+        [True, "ATM WITHDRAWAL", "-$60.00", None, "Processing"],
+        [False, "PAYROLL DEPOSIT", "$1,500.00", "$2,500.00", "06/14/2021"],
+        [False, "RENT PAYMENT", "-$1,200.00", "$1,000.00", "06/01/2021"],
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    "account_type, fixture, data",
+    [
+        ("CreditCard", "credit_card.html", CREDIT_CARD_DATA),
+        ("Deposit", "deposit.html", DEPOSIT_DATA),
+    ],
+)
+def test_extracted_parser_matches_html_parser(
+    fixture_html, account_type, fixture, data
+):
+    account = Account("name", account_type, "link")
+    html_parser = get_account_parser(account, fixture_html(fixture))
+    parser = ExtractedParser(account, data)
+
+    assert parser.get_balance() == html_parser.get_balance()
+    assert parser.get_transactions() == html_parser.get_transactions()
+
+
+def test_get_extract_spec():
+    account = Account("Cash Rewards Visa - 5678", "CreditCard", "link")
+    spec = get_extract_spec(account, "#title")
+
+    assert spec["name"] == "Cash Rewards Visa - 5678"
+    assert spec["title"] == "#title"
+    assert spec["rows"] == "table#transactions > tbody > tr"
+    assert spec["follows"] is True
+    assert spec["cells"] == [
+        "trans-desc-cell",
+        "trans-amount-cell",
+        "trans-balance-cell",
+        "trans-date-cell",
+    ]
+
+
+def test_extract_account():
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+    browser = MagicMock(spec_set=Firefox)
+    browser.execute_script.return_value = json.dumps(DEPOSIT_DATA)
+
+    assert extract_account(browser, account, "#title") == DEPOSIT_DATA
+    browser.execute_script.assert_called_once_with(
+        EXTRACT_SCRIPT, get_extract_spec(account, "#title")
+    )
+
+
+def test_extract_account_returns_none_on_timeout(mocker):
+    wait = mocker.patch(
+        "bofa_crawler.extract.wait",
+        side_effect=lambda browser, condition, timeout: condition(browser),
+    )
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+    browser = MagicMock(spec_set=Firefox)
+    browser.execute_script.side_effect = WebDriverException
+
+    assert extract_account(browser, account, "#title", timeout=3) is None
+    wait.assert_called_once_with(browser, mocker.ANY, 3)
@@ -0,0 +1,37 @@
+from datetime import date
+
+from bofa_crawler.bank import Transaction
+from bofa_crawler.history import merge_transactions
+
+
+def test_merge_transactions_dedupes_overlap():
+    pending = Transaction("TOLL", -200, True)
+    june = Transaction("RENT", -1000, False, 5000, date(2021, 6, 1))
+    may = Transaction("PAY", 2000, False, 6000, date(2021, 5, 20))
+    merged = merge_transactions([[pending, june], [june, may]])
+
+    assert merged == [pending, june, may]
+
+
+def test_merge_transactions_keeps_repeats_within_a_page():
+    coffee = Transaction("COFFEE", -500, False, 100, date(2021, 6, 1))
+    merged = merge_transactions([[coffee, coffee], [coffee]])
+
+    assert merged == [coffee, coffee]
+
+
+def test_merge_transactions_orders_newest_first():
+    old = Transaction("OLD", 1, False, 1, date(2021, 5, 1))
+    new = Transaction("NEW", 2, False, 2, date(2021, 6, 1))
+    pending = Transaction("PENDING", 3, True)
+
+    assert merge_transactions([[old], [new, pending]]) == [pending, new, old]
+
+
+def test_merge_transactions_drops_before_start_date():
+    old = Transaction("OLD", 1, False, 1, date(2021, 5, 1))
+    new = Transaction("NEW", 2, False, 2, date(2021, 6, 1))
+    pending = Transaction("PENDING", 3, True)
+    merged = merge_transactions([[pending, new, old]], date(2021, 5, 15))
+
+    assert merged == [pending, new]
@@ -0,0 +1,121 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bofa_crawler.http_client import HttpFetchError, HttpSession
+from tests.conftest import read_fixture
+
+PAGES = {
+    "/deposit": "deposit.html",
+    "/card": "credit_card.html",
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("Cookie")))
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/deposit")
+            self.send_header("Set-Cookie", "hop=1; Path=/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path == "/sign-off":
+            self.send_response(302)
+            self.send_header("Location", "/deposit")
+            self.send_header("Set-Cookie", "SMSESSION=; Max-Age=0; Path=/")
+            self.send_header(
+                "Set-Cookie",
+                "old=; Expires=Thu, 01 Jan 1970 00:00:00 GMT; Path=/",
+            )
+            self.send_header("Set-Cookie", "new=1; Max-Age=60; Path=/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path not in PAGES:
+            self.send_error(404)
+            return
+
+        body = read_fixture(PAGES[self.path]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_get_sends_browser_cookies(server):
+    cookies = [
+        {"name": "SMSESSION", "value": "abc", "domain": ".127.0.0.1"},
+        {"name": "other", "value": "x", "domain": "example.test"},
+    ]
+    with HttpSession(cookies) as session:
+        page_source = session.get(server + "/deposit")
+
+    assert page_source == read_fixture("deposit.html")
+    assert StubHandler.requests == [("/deposit", "SMSESSION=abc")]
+
+
+def test_get_follows_redirects_and_keeps_cookies(server):
+    with HttpSession() as session:
+        page_source = session.get(server + "/redirect")
+
+    assert "PAYROLL DEPOSIT" in page_source
+    assert StubHandler.requests == [("/redirect", None), ("/deposit", "hop=1")]
+
+
+def test_get_drops_cookies_deleted_by_server(server):
+    cookies = [
+        {"name": "SMSESSION", "value": "abc", "domain": "127.0.0.1"},
+        {"name": "old", "value": "x", "domain": "127.0.0.1"},
+    ]
+    with HttpSession(cookies) as session:
+        session.get(server + "/sign-off")
+
+    assert StubHandler.requests[-1] == ("/deposit", "new=1")
+
+
+def test_get_reuses_connection(server):
+    with HttpSession() as session:
+        session.get(server + "/deposit")
+        session.get(server + "/card")
+        pool = session.pool.connection_from_url(server)
+
+    assert pool.num_connections == 1
+
+
+def test_get_raises_on_error_status(server):
+    with HttpSession() as session, pytest.raises(HttpFetchError):
+        session.get(server + "/missing")
+
+
+def test_secure_cookies_not_sent_over_http(server):
+    cookies = [{"name": "s", "value": "1", "domain": "127.0.0.1"}]
+    cookies[0]["secure"] = True
+    with HttpSession(cookies) as session:
+        session.get(server + "/card")
+
+    assert StubHandler.requests == [("/card", None)]
+
+
+@pytest.fixture
+def server():
+    StubHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(
+        target=httpd.serve_forever, args=(0.01,), daemon=True
+    )
+    thread.start()
+    yield "http://127.0.0.1:{}".format(httpd.server_port)
+    httpd.shutdown()
+    httpd.server_close()
@@ -0,0 +1,69 @@
+import json
+from unittest.mock import Mock
+
+from bofa_crawler.metrics import NULL_METRICS, Metrics
+
+
+def test_phase_records_duration():
+    clock = Mock(side_effect=[1.0, 3.5])
+    metrics = Metrics(clock=clock)
+    with metrics.phase("parse", user="u", account="a"):
+        pass
+
+    (observation,) = metrics.snapshot()["observations"]
+    assert observation == {
+        "name": "parse_seconds",
+        "labels": {"account": "a", "user": "u"},
+        "count": 1,
+        "sum": 2.5,
+        "max": 2.5,
+    }
+
+
+def test_observe_and_incr_aggregate():
+    metrics = Metrics()
+    metrics.observe("rows", 3, user="u")
+    metrics.observe("rows", 7, user="u")
+    metrics.incr("navigate_retries", 2, user="u")
+    metrics.incr("navigate_retries", user="u")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["observations"][0]["count"] == 2
+    assert snapshot["observations"][0]["sum"] == 10
+    assert snapshot["observations"][0]["max"] == 7
+    assert snapshot["counters"] == [
+        {"name": "navigate_retries", "labels": {"user": "u"}, "value": 3}
+    ]
+
+
+def test_to_json():
+    metrics = Metrics()
+    metrics.incr("navigate_retries", user="u")
+    assert json.loads(metrics.to_json()) == metrics.snapshot()
+
+
+def test_to_prometheus():
+    metrics = Metrics()
+    metrics.observe("rows", 3, user='a"b')
+    metrics.observe("rows", 5, user="c")
+    metrics.incr("navigate_retries", 2, user="u")
+
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE bofa_crawler_rows summary",
+        'bofa_crawler_rows_count{user="a\\"b"} 1',
+        'bofa_crawler_rows_sum{user="a\\"b"} 3',
+        'bofa_crawler_rows_count{user="c"} 1',
+        'bofa_crawler_rows_sum{user="c"} 5',
+        "# TYPE bofa_crawler_rows_max gauge",
+        'bofa_crawler_rows_max{user="a\\"b"} 3',
+        'bofa_crawler_rows_max{user="c"} 5',
+        "# TYPE bofa_crawler_navigate_retries_total counter",
+        'bofa_crawler_navigate_retries_total{user="u"} 2',
+    ]
+
+
+def test_null_metrics_records_nothing():
+    with NULL_METRICS.phase("parse", user="u"):
+        NULL_METRICS.observe("rows", 1)
+        NULL_METRICS.incr("navigate_retries")
+    assert not NULL_METRICS.enabled
@@ -1,12 +1,17 @@
+from datetime import date
 from unittest.mock import Mock
 
 import pytest
 
 from bofa_crawler.bank import Account
+from bofa_crawler.constants import SECURE_BASE_URL
 from bofa_crawler.parser import (
+    DEFAULT_FEATURES,
+    AccountListParser,
     CreditCardParser,
     DepositParser,
     get_account_parser,
+    get_fast_features,
 )
 
 
@@ -17,3 +22,134 @@ from bofa_crawler.parser import (
 def test_get_account_parser(account_type, expected_parser):
     account = Mock(spec=Account, account_type=account_type)
     assert isinstance(get_account_parser(account, ""), expected_parser)
+
+
+def test_get_accounts(fixture_html):
+    parser = AccountListParser(fixture_html("accounts.html"))
+    accounts = parser.get_accounts(
+        ["Savings - 9012", "Cash Rewards Visa - 5678"]
+    )
+
+    assert [(a.name, a.account_type) for a in accounts] == [
+        ("Cash Rewards Visa - 5678", "CreditCard"),
+        ("Savings - 9012", "Deposit"),
+    ]
+    path = "/myaccounts/details/deposit/account-details.go?adx=d2"
+    assert accounts[1].link == SECURE_BASE_URL + path
+
+
+def test_get_accounts_stops_once_all_are_found(mocker, fixture_html):
+    html_whitespace = mocker.patch(
+        "bofa_crawler.parser.html_whitespace", side_effect=str.strip
+    )
+    parser = AccountListParser(fixture_html("accounts.html"))
+    accounts = parser.get_accounts(("Cash Rewards Visa - 5678",))
+
+    assert [a.name for a in accounts] == ["Cash Rewards Visa - 5678"]
+    assert html_whitespace.call_count == 2
+
+
+def test_credit_card_parser(features, fixture_html):
+    account = Account("Cash Rewards Visa - 5678", "CreditCard", "link")
+    parser = CreditCardParser(
+        account, fixture_html("credit_card.html"), features
+    )
+
+    assert parser.get_balance() == 123906
+    assert [t.as_dict() for t in parser.get_transactions()] == [
+        {
+            "description": "COFFEE SHOP",
+            "amount": -450,
+            "is_pending": True,
+            "ending_balance": 123906,
+            "date": None,
+        },
+        {
+            "description": "GROCERY STORE",
+            "amount": -5210,
+            "is_pending": False,
+            "ending_balance": 123456,
+            "date": date(2021, 6, 14),
+        },
+        {
+            "description": "PAYMENT - THANK YOU",
+            "amount": 20000,
+            "is_pending": False,
+            "ending_balance": 118246,
+            "date": date(2021, 6, 10),
+        },
+    ]
+
+
+def test_deposit_parser(features, fixture_html):
+    account = Account("Adv Plus Banking - 1234", "Deposit", "link")
+    parser = DepositParser(account, fixture_html("deposit.html"), features)
+
+    assert parser.get_balance() == 250000
+    assert [t.as_dict() for t in parser.get_transactions()] == [
+        {
+            "description": "ATM WITHDRAWAL",
+            "amount": -6000,
+            "is_pending": True,
+            "ending_balance": None,
+            "date": None,
+        },
+        {
+            "description": "PAYROLL DEPOSIT",
+            "amount": 150000,
+            "is_pending": False,
+            "ending_balance": 250000,
+            "date": date(2021, 6, 14),
+        },
+        {
+            "description": "RENT PAYMENT",
+            "amount": -120000,
+            "is_pending": False,
+            "ending_balance": 100000,
+            "date": date(2021, 6, 1),
+        },
+    ]
+
+
+def test_get_fast_features_falls_back(mocker):
+    get_fast_features.cache_clear()
+    mocker.patch.dict("sys.modules", {"lxml": None})
+    try:
+        assert get_fast_features() == DEFAULT_FEATURES
+    finally:
+        get_fast_features.cache_clear()
+
+
+def test_parsers_default_to_fast_features(mocker):
+    mocker.patch("bofa_crawler.parser.get_fast_features", return_value="fast")
+    soup = mocker.patch("bofa_crawler.parser.BeautifulSoup")
+
+    AccountListParser("<html></html>")
+    soup.assert_called_once_with("<html></html>", "fast")
+
+
+@pytest.fixture(params=["html.parser", "lxml"])
+def features(request):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    return request.param
+
+
+def test_iter_transactions_is_lazy(mocker, fixture_html):
+    account = Account("Cash Rewards Visa - 5678", "CreditCard", "link")
+    parser = CreditCardParser(account, fixture_html("credit_card.html"))
+    parse_row = mocker.spy(parser, "_parse_row")
+
+    transactions = parser.iter_transactions()
+    assert parse_row.call_count == 0
+    assert next(transactions).description == "COFFEE SHOP"
+    assert parse_row.call_count == 1
+
+
+def test_credit_card_pending_balance_reads_first_row(mocker, fixture_html):
+    account = Account("Cash Rewards Visa - 5678", "CreditCard", "link")
+    parser = CreditCardParser(account, fixture_html("credit_card.html"))
+    parse_row = mocker.spy(parser, "_parse_row")
+
+    assert parser.get_balance() == 123906
+    assert parse_row.call_count == 1
@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bofa_crawler.bank import Account
+from bofa_crawler.cache import ParseCache
+from bofa_crawler.parser import get_account_parser
+from bofa_crawler.pipeline import ParsePipeline, parse_page
+
+
+def test_parse_page(account, fixture_html):
+    page_source = fixture_html("deposit.html")
+    parser = get_account_parser(account, page_source)
+
+    balance, transactions = parse_page(account, page_source)
+    assert balance == parser.get_balance()
+    assert transactions == tuple(parser.get_transactions())
+
+
+def test_pipeline_parses_in_worker_processes(account, fixture_html):
+    with ParsePipeline(max_workers=1) as pipeline:
+        future = pipeline.submit(account, fixture_html("deposit.html"))
+        balance, transactions = future.result(timeout=30)
+
+    assert balance == 250000
+    assert len(transactions) == 3
+
+
+def test_pipeline_blocks_when_queue_is_full(mocker, account):
+    release = threading.Event()
+    mocker.patch(
+        "bofa_crawler.pipeline.parse_page",
+        side_effect=lambda *args: release.wait(),
+    )
+    pipeline = ParsePipeline(
+        max_pending=1, executor=ThreadPoolExecutor(max_workers=2)
+    )
+    first = pipeline.submit(account, "first")
+    submitted = threading.Event()
+    thread = threading.Thread(
+        target=lambda: pipeline.submit(account, "second") and submitted.set()
+    )
+    thread.start()
+
+    assert not submitted.wait(0.05)
+    release.set()
+    first.result()
+    thread.join(timeout=5)
+    assert submitted.is_set()
+    pipeline.close()
+
+
+def test_pipeline_uses_parse_cache(account, fixture_html):
+    cache = ParseCache()
+    page_source = fixture_html("deposit.html")
+    pipeline = ParsePipeline(executor=ThreadPoolExecutor(max_workers=1))
+
+    parsed = pipeline.submit(account, page_source, cache=cache).result()
+    cached = pipeline.submit(account, page_source, cache=cache)
+
+    assert cached.done()
+    assert cached.result() == parsed
+    assert cache.hits == 1
+    pipeline.close()
+
+
+@pytest.fixture
+def account():
+    return Account("Adv Plus Banking - 1234", "Deposit", "link")
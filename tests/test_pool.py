@@ -0,0 +1,234 @@
+import threading
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Firefox
+
+from bofa_crawler.pool import (
+    BrowserPool,
+    CrawlerPool,
+    SignInFailedError,
+)
+
+
+def test_browser_pool_reuses_released_browsers(get_browser, reset_browser):
+    pool = BrowserPool(size=2)
+    browser = pool.acquire()
+    pool.release(browser)
+
+    assert pool.acquire() is browser
+    get_browser.assert_called_once()
+    reset_browser.assert_called_once_with(browser)
+
+
+def test_browser_pool_launches_up_to_size(get_browser, reset_browser):
+    pool = BrowserPool(size=2)
+    first = pool.acquire()
+    second = pool.acquire()
+
+    assert first is not second
+    assert get_browser.call_count == 2
+
+
+def test_browser_pool_discards_browser_that_fails_reset(
+    get_browser, reset_browser
+):
+    reset_browser.side_effect = WebDriverException
+    pool = BrowserPool(size=1)
+    browser = pool.acquire()
+    pool.release(browser)
+
+    browser.quit.assert_called_once()
+    assert pool.acquire() is not browser
+
+
+def test_browser_pool_close_quits_browsers(get_browser, reset_browser):
+    pool = BrowserPool(size=2)
+    browsers = [pool.acquire(), pool.acquire()]
+    pool.close()
+
+    for browser in browsers:
+        browser.quit.assert_called_once()
+
+
+def test_browser_pool_warms_up_in_background(get_browser, reset_browser):
+    pool = BrowserPool(size=3, warm=2)
+    pool._warmer.join()
+
+    assert get_browser.call_count == 2
+    assert get_browser.call_args.kwargs["template_profile"] is True
+    pool.acquire()
+    assert get_browser.call_count == 2
+
+    # Taking an idle browser refills the warm pool in the background
+    pool._warmer.join()
+    assert get_browser.call_count == 3
+    pool.acquire()
+    pool.acquire()
+    assert get_browser.call_count == 3
+
+
+def test_browser_pool_recycles_after_max_uses(get_browser, reset_browser):
+    pool = BrowserPool(size=1, max_uses=2)
+    browser = pool.acquire()
+    pool.release(browser)
+    assert pool.acquire() is browser
+    pool.release(browser)
+
+    browser.quit.assert_called_once()
+    assert pool.acquire() is not browser
+
+
+def test_browser_pool_wakes_waiters_when_browser_recycled(
+    get_browser, reset_browser
+):
+    pool = BrowserPool(size=1, max_uses=1)
+    browser = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    pool.release(browser)
+    waiter.join(timeout=5)
+
+    assert not waiter.is_alive()
+    assert acquired[0] is not browser
+
+
+def test_browser_pool_wakes_waiters_when_launch_fails(
+    get_browser, reset_browser
+):
+    launching = threading.Event()
+    proceed = threading.Event()
+
+    def launch(**kwargs):
+        launching.set()
+        proceed.wait()
+        raise WebDriverException
+
+    get_browser.side_effect = launch
+    pool = BrowserPool(size=1, warm=1)
+    launching.wait()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    get_browser.side_effect = None
+    proceed.set()
+    waiter.join(timeout=5)
+
+    assert not waiter.is_alive()
+    assert acquired == [get_browser.return_value]
+
+
+def test_browser_pool_quits_browser_launched_after_close(
+    get_browser, reset_browser
+):
+    launching = threading.Event()
+    proceed = threading.Event()
+    browser = Mock()
+
+    def launch(**kwargs):
+        launching.set()
+        proceed.wait()
+        return browser
+
+    get_browser.side_effect = launch
+    pool = BrowserPool(size=1, warm=1)
+    launching.wait()
+    pool.close()
+    proceed.set()
+    pool._warmer.join()
+
+    browser.quit.assert_called_once()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_browser_pool_recycles_when_memory_too_large(
+    mocker, get_browser, reset_browser
+):
+    memory = mocker.patch(
+        "bofa_crawler.pool.get_browser_memory", side_effect=[100, 300]
+    )
+    pool = BrowserPool(size=1, max_memory=200)
+    browser = pool.acquire()
+    pool.release(browser)
+    assert pool.acquire() is browser
+    pool.release(browser)
+
+    assert memory.call_count == 2
+    browser.quit.assert_called_once()
+
+
+def test_browser_pool_replaces_recycled_browsers_when_warm(
+    get_browser, reset_browser
+):
+    pool = BrowserPool(size=1, warm=1, max_uses=1)
+    pool._warmer.join()
+    browser = pool.acquire()
+    pool.release(browser)
+    pool._warmer.join()
+
+    assert get_browser.call_count == 2
+    assert pool.acquire() is not browser
+
+
+def test_crawler_pool_yields_results(
+    mocker, get_browser, reset_browser, crawler
+):
+    crawler.return_value.start.side_effect = [True, False]
+    users = [Mock(online_id="a"), Mock(online_id="b")]
+
+    with CrawlerPool(max_workers=1) as pool:
+        results = list(pool.crawl([(user, ["acct"]) for user in users]))
+
+    assert [result.user for result in results] == users
+    assert results[0].ok
+    assert isinstance(results[1].error, SignInFailedError)
+    assert get_browser.call_count == 1
+    assert reset_browser.call_count == 2
+
+
+def test_crawler_pool_reports_crawl_errors(get_browser, reset_browser, crawler):
+    crawler.return_value.start.side_effect = ValueError("boom")
+    user = Mock(online_id="a")
+
+    with CrawlerPool(max_workers=2) as pool:
+        (result,) = pool.crawl([(user, ["acct"])])
+
+    assert not result.ok
+    assert isinstance(result.error, ValueError)
+
+
+def test_crawler_pool_reports_account_errors(
+    get_browser, reset_browser, crawler
+):
+    error = ValueError("bad row")
+    crawler.return_value.start.return_value = True
+    crawler.return_value.errors = {"acct": error}
+    user = Mock(online_id="a")
+
+    with CrawlerPool(max_workers=1) as pool:
+        (result,) = pool.crawl([(user, ["acct", "other"])])
+
+    assert not result.ok
+    assert result.error is error
+    assert result.errors == {"acct": error}
+
+
+@pytest.fixture
+def get_browser(mocker):
+    return mocker.patch(
+        "bofa_crawler.pool.get_browser",
+        side_effect=lambda **_: MagicMock(spec_set=Firefox),
+    )
+
+
+@pytest.fixture
+def reset_browser(mocker):
+    return mocker.patch("bofa_crawler.pool.reset_browser")
+
+
+@pytest.fixture
+def crawler(mocker):
+    return mocker.patch("bofa_crawler.pool.BofaCrawler")
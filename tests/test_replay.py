@@ -0,0 +1,162 @@
+from unittest.mock import Mock
+
+import pytest
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    WebDriverException,
+)
+from selenium.webdriver.common.keys import Keys
+
+from bofa_crawler.bank import User
+from bofa_crawler.constants import BOFA_SIGN_IN_URL, SECURE_BASE_URL
+from bofa_crawler.crawler import BofaCrawler
+from bofa_crawler.replay import CrawlArchive, RecordingBrowser, ReplayBrowser
+
+OVERVIEW_URL = SECURE_BASE_URL + "/myaccounts/overview"
+DETAILS_URL = SECURE_BASE_URL + "/myaccounts/details/"
+SIGN_IN_PAGE = '<html><body><input id="oid"><input id="pass"></body></html>'
+
+
+@pytest.fixture
+def archive(fixture_html):
+    archive = CrawlArchive()
+    archive.add_page(BOFA_SIGN_IN_URL, SIGN_IN_PAGE)
+    archive.add_transition(BOFA_SIGN_IN_URL, OVERVIEW_URL)
+    archive.add_page(OVERVIEW_URL, fixture_html("accounts.html"))
+    archive.add_page(
+        DETAILS_URL + "deposit/account-details.go?adx=d1",
+        fixture_html("deposit.html"),
+    )
+    archive.add_page(
+        DETAILS_URL + "card/account-details.go?adx=c1",
+        fixture_html("credit_card.html"),
+    )
+    return archive
+
+
+def test_archive_round_trip(archive, tmp_path):
+    archive.add_page(OVERVIEW_URL + "?again", SIGN_IN_PAGE)
+    path = tmp_path / "crawl.json.gz"
+    archive.save(str(path))
+
+    loaded = CrawlArchive.load(str(path))
+    assert loaded.pages == archive.pages
+    assert loaded.transitions == archive.transitions
+    assert loaded.get_page(BOFA_SIGN_IN_URL) == SIGN_IN_PAGE
+    # Identical snapshots are stored once
+    assert len(loaded.snapshots) == 4
+
+
+def test_recording_browser_records_crawl():
+    browser = Mock()
+    browser.current_url = "https://example.com/landed"
+    browser.page_source = "<html>first</html>"
+    browser.execute_script.return_value = "complete"
+    recorder = RecordingBrowser(browser, clock=Mock(side_effect=[1.0, 1.5]))
+
+    recorder.get("https://example.com/")
+    assert recorder.execute_script("return document.readyState") == "complete"
+
+    browser.current_url = "https://example.com/next"
+    browser.page_source = "<html>next</html>"
+    assert recorder.page_source == "<html>next</html>"
+    assert recorder.window_handles is browser.window_handles
+
+    archive = recorder.archive
+    assert archive.redirects == {
+        "https://example.com/": "https://example.com/landed"
+    }
+    assert archive.timings == {"https://example.com/landed": 0.5}
+    assert archive.transitions == {
+        "https://example.com/landed": "https://example.com/next"
+    }
+    assert (
+        archive.get_page("https://example.com/landed") == "<html>first</html>"
+    )
+    assert archive.get_page("https://example.com/next") == "<html>next</html>"
+    assert list(archive.scripts.values()) == ["complete"]
+
+
+def test_recording_browser_skips_unserializable_results():
+    browser = Mock()
+    browser.current_url = "https://example.com/"
+    browser.page_source = "<html></html>"
+    recorder = RecordingBrowser(browser)
+
+    recorder.execute_script("return document.body")
+    assert recorder.archive.scripts == {}
+
+
+def test_replay_browser_answers_from_snapshots(archive):
+    browser = ReplayBrowser(archive)
+    browser.get(BOFA_SIGN_IN_URL)
+
+    assert browser.find_element("css selector", "#oid").is_displayed()
+    with pytest.raises(NoSuchElementException):
+        browser.find_element("css selector", "div.Accounts")
+
+    browser.find_element("id", "pass").send_keys("passcode", Keys.RETURN)
+    assert browser.current_url == OVERVIEW_URL
+    assert browser.find_elements("class name", "AccountName")
+
+    with pytest.raises(WebDriverException):
+        browser.get(SECURE_BASE_URL + "/unrecorded")
+
+
+def test_replay_browser_simulates_latency(archive):
+    archive.timings[OVERVIEW_URL] = 0.25
+    sleep = Mock()
+
+    ReplayBrowser(archive, latency=0.1, sleep=sleep).get(BOFA_SIGN_IN_URL)
+    sleep.assert_called_once_with(0.1)
+
+    sleep.reset_mock()
+    browser = ReplayBrowser(archive, recorded_latency=True, sleep=sleep)
+    browser.get(OVERVIEW_URL)
+    sleep.assert_called_once_with(0.25)
+
+
+def test_replay_browser_opens_tabs(archive):
+    browser = ReplayBrowser(archive)
+    browser.get(OVERVIEW_URL)
+    link = DETAILS_URL + "deposit/account-details.go?adx=d1"
+
+    browser.execute_script("window.open(arguments[0], '_blank');", link)
+    assert browser.current_url == OVERVIEW_URL
+
+    handle = browser.window_handles[1]
+    browser.switch_to.window(handle)
+    assert browser.current_url == link
+    browser.close()
+    assert browser.window_handles == ["0"]
+
+
+@pytest.mark.parametrize("max_tabs", [1, 2])
+def test_crawl_replays_archive(archive, max_tabs):
+    user = User("user", "passcode")
+    names = ["Adv Plus Banking - 1234", "Cash Rewards Visa - 5678"]
+    crawler = BofaCrawler(
+        user, names, browser=ReplayBrowser(archive), max_tabs=max_tabs
+    )
+
+    assert crawler.start()
+    assert crawler.errors == {}
+    assert [account.balance for account in user.accounts] == [250000, 123906]
+    assert all(account.transactions for account in user.accounts)
+
+
+def test_crawl_replays_recording(archive, tmp_path):
+    user = User("user", "passcode")
+    names = ["Adv Plus Banking - 1234", "Cash Rewards Visa - 5678"]
+    recorder = RecordingBrowser(ReplayBrowser(archive))
+    BofaCrawler(user, names, browser=recorder, max_tabs=2).start()
+    path = tmp_path / "crawl.json.gz"
+    recorder.save(str(path))
+
+    user.accounts.clear()
+    browser = ReplayBrowser(CrawlArchive.load(str(path)))
+    crawler = BofaCrawler(user, names, browser=browser, max_tabs=2)
+
+    assert crawler.start()
+    assert crawler.errors == {}
+    assert [account.balance for account in user.accounts] == [250000, 123906]
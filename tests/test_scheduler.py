@@ -0,0 +1,174 @@
+from unittest.mock import Mock
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from bofa_crawler.bank import Account, User
+from bofa_crawler.crawler import BAD_CREDENTIALS, MAINTENANCE, SignInError
+from bofa_crawler.pool import SignInFailedError
+from bofa_crawler.scheduler import (
+    AUTH,
+    DONE,
+    FAILED,
+    PARSE,
+    TIMEOUT,
+    CrawlScheduler,
+    classify_error,
+)
+from bofa_crawler.state import StateStore
+from bofa_crawler.util import RetryPolicy
+
+
+def test_classify_error():
+    assert classify_error(TimeoutException()) == TIMEOUT
+    assert classify_error(SignInFailedError("user")) == AUTH
+    assert classify_error(AttributeError()) == PARSE
+    assert classify_error(SignInError(MAINTENANCE)) == TIMEOUT
+    assert classify_error(SignInError(BAD_CREDENTIALS)) == AUTH
+
+
+def test_crawls_and_checkpoints_user(store, crawler_factory):
+    scheduler = CrawlScheduler(store, "run", crawler_factory=crawler_factory)
+    (result,) = scheduler.run([(User("user", "pass"), ["a", "b"])])
+
+    assert result.ok
+    assert store.get_checkpoints("run") == {
+        "user": DONE,
+        "user:a": DONE,
+        "user:b": DONE,
+    }
+    crawler_factory.crawlers[0].end.assert_called_once()
+
+
+def test_retries_only_failed_accounts(store, crawler_factory):
+    crawler_factory.errors = [{"b": ValueError("bad row")}, {}]
+    sleep = Mock()
+    scheduler = CrawlScheduler(
+        store, "run", crawler_factory=crawler_factory, sleep=sleep
+    )
+    user = User("user", "pass")
+
+    assert scheduler.crawl_user(user, ["a", "b"]).ok
+    assert crawler_factory.calls == [["a", "b"], ["b"]]
+    assert [account.name for account in user.accounts] == ["a", "b"]
+    sleep.assert_called_once()
+
+
+def test_gives_up_after_retry_policy(store, crawler_factory):
+    crawler_factory.errors = [{"a": TimeoutException()}] * 3
+    scheduler = CrawlScheduler(
+        store,
+        "run",
+        retry_policies={TIMEOUT: RetryPolicy(max_retries=2, base_delay=0)},
+        crawler_factory=crawler_factory,
+        sleep=Mock(),
+    )
+    result = scheduler.crawl_user(User("user", "pass"), ["a"])
+
+    assert isinstance(result.error, TimeoutException)
+    assert len(crawler_factory.calls) == 3
+    assert store.get_checkpoints("run")["user"] == FAILED
+
+
+def test_sign_in_failure_is_auth_error(store, crawler_factory):
+    crawler_factory.signed_in = False
+    scheduler = CrawlScheduler(
+        store, "run", crawler_factory=crawler_factory, sleep=Mock()
+    )
+    result = scheduler.crawl_user(User("user", "pass"), ["a"])
+
+    assert isinstance(result.error, SignInFailedError)
+    assert len(crawler_factory.calls) == 2
+
+
+def test_accounts_not_found_are_not_done(store, crawler_factory):
+    crawler_factory.missing = {"b"}
+    scheduler = CrawlScheduler(
+        store, "run", crawler_factory=crawler_factory, sleep=Mock()
+    )
+    result = scheduler.crawl_user(User("user", "pass"), ["a", "b"])
+
+    assert isinstance(result.error, LookupError)
+    assert crawler_factory.calls == [["a", "b"], ["b"]]
+    assert store.get_checkpoints("run") == {"user": FAILED, "user:a": DONE}
+
+
+def test_browser_launch_failure_is_retried(store, crawler_factory):
+    launch_error = WebDriverException("geckodriver failed to start")
+
+    def factory(user, accounts, **kwargs):
+        if user.online_id == "broken":
+            raise launch_error
+        return crawler_factory(user, accounts, **kwargs)
+
+    scheduler = CrawlScheduler(
+        store, "run", crawler_factory=factory, sleep=Mock()
+    )
+    results = list(
+        scheduler.run(
+            [(User("broken", "pass"), ["a"]), (User("user", "pass"), ["a"])]
+        )
+    )
+
+    assert results[0].error is launch_error
+    assert results[1].ok
+    assert crawler_factory.calls == [["a"]]
+    assert store.get_checkpoints("run")["broken"] == FAILED
+
+
+def test_resumes_interrupted_run(store, crawler_factory):
+    store.set_checkpoint("run", "done-user", DONE)
+    store.set_checkpoint("run", "user:a", DONE)
+    scheduler = CrawlScheduler(store, "run", crawler_factory=crawler_factory)
+    results = list(
+        scheduler.run(
+            [
+                (User("done-user", "pass"), ["a"]),
+                (User("user", "pass"), ["a", "b"]),
+            ]
+        )
+    )
+
+    assert all(result.ok for result in results)
+    assert crawler_factory.calls == [["b"]]
+
+
+@pytest.fixture
+def store():
+    store = StateStore()
+    yield store
+    store.close()
+
+
+class FakeCrawlerFactory:
+    """Create crawlers that sign in and fail accounts as configured."""
+
+    def __init__(self):
+        self.signed_in = True
+        self.missing = set()
+        self.errors = []
+        self.calls = []
+        self.crawlers = []
+
+    def __call__(self, user, accounts, **kwargs):
+        self.calls.append(list(accounts))
+        errors = self.errors.pop(0) if self.errors else {}
+        crawler = Mock(errors=errors, sign_in_error=None)
+
+        def start():
+            if self.signed_in:
+                user.accounts.extend(
+                    Account(name, "Deposit", "link")
+                    for name in accounts
+                    if name not in self.missing
+                )
+            return self.signed_in
+
+        crawler.start.side_effect = start
+        self.crawlers.append(crawler)
+        return crawler
+
+
+@pytest.fixture
+def crawler_factory():
+    return FakeCrawlerFactory()
@@ -0,0 +1,125 @@
+from unittest.mock import Mock
+
+import pytest
+
+from bofa_crawler.bank import Account, Transaction
+from bofa_crawler.state import (
+    StateStore,
+    TransactionChange,
+    get_account_key,
+    get_fingerprint,
+)
+
+
+def test_get_fingerprint_is_stable():
+    assert get_fingerprint(Transaction("foo", 100, False, 5)) == (
+        get_fingerprint(Transaction("foo", 100, True, 5))
+    )
+    assert get_fingerprint(Transaction("foo", 100)) != (
+        get_fingerprint(Transaction("foo", 101))
+    )
+
+
+def test_get_account_key():
+    user = Mock(online_id="user")
+    account = Account("Savings", "Deposit", "link")
+    assert get_account_key(user, account) == "user:Savings"
+
+
+def test_first_run_reports_everything(store):
+    transactions = [
+        Transaction("COFFEE", -450, True),
+        Transaction("RENT", -1000, False, 5000),
+        Transaction("PAY", 2000, False, 6000),
+    ]
+    changes = store.update_account("key", iter(transactions))
+
+    assert [(c.kind, c.transaction) for c in changes] == [
+        (TransactionChange.PENDING, transactions[0]),
+        (TransactionChange.NEW, transactions[1]),
+        (TransactionChange.NEW, transactions[2]),
+    ]
+    assert store.get_watermark("key") == get_fingerprint(transactions[1])
+
+
+def test_stops_at_watermark(store):
+    store.update_account("key", [Transaction("RENT", -1000, False, 5000)])
+
+    consumed = []
+
+    def transactions():
+        for transaction in [
+            Transaction("FEE", -100, False, 4900),
+            Transaction("RENT", -1000, False, 5000),
+            Transaction("PAY", 2000, False, 6000),
+        ]:
+            consumed.append(transaction)
+            yield transaction
+
+    changes = store.update_account("key", transactions())
+
+    assert [c.transaction.description for c in changes] == ["FEE"]
+    assert len(consumed) == 2
+    assert store.get_watermark("key") == get_fingerprint(consumed[0])
+
+
+def test_reports_pending_transitions(store):
+    store.update_account(
+        "key",
+        [
+            Transaction("COFFEE", -450, True),
+            Transaction("TOLL", -200, True),
+            Transaction("RENT", -1000, False, 5000),
+        ],
+    )
+    changes = store.update_account(
+        "key",
+        [
+            Transaction("TOLL", -200, True),
+            Transaction("COFFEE", -450, False, 4550),
+            Transaction("RENT", -1000, False, 5000),
+        ],
+    )
+
+    assert [(c.kind, c.transaction.description) for c in changes] == [
+        (TransactionChange.POSTED, "COFFEE"),
+    ]
+
+
+def test_unchanged_account_reports_nothing(store):
+    transactions = [
+        Transaction("COFFEE", -450, True),
+        Transaction("RENT", -1000, False, 5000),
+    ]
+    store.update_account("key", transactions)
+    assert store.update_account("key", transactions) == []
+
+
+def test_persists_between_connections(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path)
+    store.update_account("key", [Transaction("RENT", -1000, False, 5000)])
+    store.close()
+
+    assert StateStore(path).get_watermark("key") is not None
+
+
+def test_remembers_discovered_accounts(store):
+    assert store.get_accounts("user") == {}
+    store.set_accounts("user", [Account("Savings", "Deposit", "old")])
+    store.set_accounts("user", [Account("Savings", "Deposit", "new")])
+    store.set_accounts("other", [Account("Visa", "CreditCard", "link")])
+
+    (account,) = store.get_accounts("user").values()
+    assert (account.name, account.account_type, account.link) == (
+        "Savings",
+        "Deposit",
+        "new",
+    )
+
+
+@pytest.fixture
+def store():
+    store = StateStore()
+    yield store
+    store.close()
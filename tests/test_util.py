@@ -1,14 +1,23 @@
-from unittest.mock import MagicMock, PropertyMock
+from unittest.mock import MagicMock, Mock, PropertyMock
 
 import pytest
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver import Firefox
 
 from bofa_crawler.util import (
+    RetryPolicy,
     dollars_to_cents,
     get_current_url,
+    get_page_load_time,
     html_whitespace,
     navigate,
+    parse_amount,
+    parse_amounts,
+    wait_for_any,
 )
 
 
@@ -32,10 +41,63 @@ def test_get_current_url_returns_none_if_none():
     assert get_current_url(browser) is None
 
 
-def test_navigate_browses_to_url(sleep):
+def test_get_page_load_time():
+    browser = MagicMock(spec_set=Firefox)
+    browser.execute_script.return_value = 1250
+    assert get_page_load_time(browser) == 1.25
+
+    browser.execute_script.return_value = None
+    assert get_page_load_time(browser) is None
+
+    browser.execute_script.side_effect = WebDriverException
+    assert get_page_load_time(browser) is None
+
+
+def test_wait_for_any_returns_first_match():
+    browser = MagicMock(spec_set=Firefox)
+    error_shown = Mock(side_effect=[False, "error"])
+
+    label, result = wait_for_any(
+        browser,
+        {"accounts": lambda driver: False, "error": error_shown},
+        poll_frequency=0.01,
+    )
+
+    assert (label, result) == ("error", "error")
+    assert error_shown.call_count == 2
+
+
+def test_wait_for_any_accepts_condition_types():
+    browser = MagicMock(spec_set=Firefox)
+    browser.find_element.side_effect = NoSuchElementException
+    browser.title = "Site Maintenance"
+
+    label, _ = wait_for_any(
+        browser,
+        {"accounts": ("div.Accounts", "VOEL"), "down": ("Maintenance", "TC")},
+    )
+    assert label == "down"
+
+
+def test_wait_for_any_times_out():
+    browser = MagicMock(spec_set=Firefox)
+    conditions = {"a": lambda driver: False}
+
+    assert wait_for_any(browser, conditions, 0.05, 0.01) == (None, False)
+
+
+def test_navigate_browses_to_url(sleep, wait_until):
     browser = MagicMock(spec_set=Firefox)
     navigate(browser, "http://example.test")
     browser.get.assert_called_once_with("http://example.test")
+    sleep.assert_not_called()
+    wait_until.assert_called_once_with(browser, None, "PFL", 10)
+
+
+def test_navigate_waits_for_ready_selector(sleep, wait_until):
+    browser = MagicMock(spec_set=Firefox)
+    navigate(browser, "http://example.test", ready_selector="#oid")
+    wait_until.assert_called_with(browser, "#oid", "VOEL", 10)
 
 
 @pytest.mark.parametrize(
@@ -55,7 +117,7 @@ def test_navigate_does_nothing_if_url_matches_current(
     browser.get.assert_not_called()
 
 
-def test_navigate_raises_exception_after_7_timeouts(sleep):
+def test_navigate_raises_exception_after_7_timeouts(sleep, wait_until):
     browser = MagicMock(spec_set=Firefox)
     browser.get.side_effect = TimeoutException
 
@@ -66,6 +128,45 @@ def test_navigate_raises_exception_after_7_timeouts(sleep):
     assert sleep.call_count == 7
 
 
+def test_navigate_retries_page_loads_slower_than_deadline(
+    mocker, sleep, wait_until
+):
+    clock = iter(range(0, 3000, 300))
+    mocker.patch("bofa_crawler.util.monotonic", side_effect=lambda: next(clock))
+    browser = MagicMock(spec_set=Firefox)
+    browser.get.side_effect = [TimeoutException] * 3 + [None]
+
+    assert navigate(browser, "test") == 3
+
+
+def test_navigate_stops_retrying_at_deadline(sleep, wait_until):
+    browser = MagicMock(spec_set=Firefox)
+    browser.get.side_effect = TimeoutException
+    policy = RetryPolicy(base_delay=1, jitter=0, deadline=3)
+
+    with pytest.raises(TimeoutException, match="Retried 2 times"):
+        navigate(browser, "test", retry_policy=policy)
+
+    assert [c.args[0] for c in sleep.call_args_list] == [1, 2]
+
+
+def test_navigate_returns_retry_count(sleep, wait_until):
+    browser = MagicMock(spec_set=Firefox)
+    browser.get.side_effect = [TimeoutException, TimeoutException, None]
+    assert navigate(browser, "test") == 2
+
+
+def test_retry_policy_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+    assert [policy.get_delay(n) for n in range(5)] == [1, 2, 4, 5, 5]
+
+
+def test_retry_policy_applies_jitter(mocker):
+    mocker.patch("bofa_crawler.util.random.random", return_value=1)
+    policy = RetryPolicy(base_delay=2, jitter=0.5)
+    assert policy.get_delay(0) == 1
+
+
 @pytest.mark.parametrize(
     "input, expected",
     [
@@ -74,12 +175,45 @@ def test_navigate_raises_exception_after_7_timeouts(sleep):
         ("$7.92", 792),
         ("$7,000.42", 700042),
         ("-$700", -70000),
+        ("$0.29", 29),
+        (0.29, 29),
+        ("Balance: $5.00", 500),
     ],
 )
 def test_dollars_to_cents(input, expected):
     assert dollars_to_cents(input) == expected
 
 
+@pytest.mark.parametrize(
+    "input, expected",
+    [
+        ("$0.29", 29),
+        ("$1,234,567.89", 123456789),
+        ("-$700", -70000),
+        ("$-700", -70000),
+        ("($12.34)", -1234),
+        ("12.34 CR", 1234),
+        ("12.34DR", -1234),
+        ("7.9", 790),
+        (".05", 5),
+        ("1.999", 199),
+        ("\n  $42.00  \n", 4200),
+    ],
+)
+def test_parse_amount(input, expected):
+    assert parse_amount(input) == expected
+
+
+@pytest.mark.parametrize("input", ["", "$", "($12.34", "abc", "1.2.3"])
+def test_parse_amount_rejects_invalid(input):
+    with pytest.raises(ValueError, match="Invalid amount"):
+        parse_amount(input)
+
+
+def test_parse_amounts():
+    assert parse_amounts(["$1.00", "($0.29)", "3 CR"]) == [100, -29, 300]
+
+
 @pytest.mark.parametrize(
     "input, expected",
     [("foo  bar", "foo bar"), ("  foo  ", "foo"), (" foo    bar", "foo bar")],
@@ -91,3 +225,8 @@ def test_html_whitespace(input, expected):
 @pytest.fixture
 def sleep(mocker):
     return mocker.patch("bofa_crawler.util.sleep")
+
+
+@pytest.fixture
+def wait_until(mocker):
+    return mocker.patch("bofa_crawler.util.wait_until")